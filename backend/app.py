@@ -1,154 +1,317 @@
-from flask import Flask, jsonify, request
+import json
+import math
+import time
+from typing import Any, Optional
+
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+from flask_sock import Sock
 
-from sim.world import reset_world
-from sim.serialize import state_payload
-from sim.physics import step_sim
-from sim.state import STATE
-from sim.config import clamp, DT_MIN, DT_MAX, DV_MAX, PLAN_COOLDOWN_S
+from sim.world import reset_world, world_cache_stats
+from sim.field import FIELD_CACHE
+from sim.serialize import state_payload, versioned_payload
+from sim.physics import step_many, requested_steps
+from sim.commands import apply_plan, plan_args, resolve_event, apply_command
+from sim.predict import predict_burn, predict_args
+from sim.trajectory import trajectory_args, trajectory_payload
+from sim.warp import warp, warp_args
+from sim.snapshot import snapshot, restore
+from sim.replay import state_hash
+from sim.integrators import INTEGRATORS
+from sim.session import SessionStore, SimSession
+from sim.scheduler import start_scheduler
+from sim.metrics import METRICS, PAYLOAD_SECONDS, REQUESTS, REQUEST_SECONDS
+from sim.config import (
+    clamp, DT_MIN, DT_MAX, DV_MAX, PLAN_COOLDOWN_S,
+    STREAM_TICK_HZ, STREAM_SUBSTEP_DT, STREAM_MAX_LAG_TICKS,
+)
 from sim.mathutil import norm, unit
 
 app = Flask(__name__)
 CORS(app)
+sock = Sock(app)
+
+SESSIONS = SessionStore()
+# Set when the server ticks sessions itself (SERVER_TICK_HZ > 0)
+SCHEDULER = start_scheduler(SESSIONS)
+
+METRICS.gauge("deltax_active_sessions", "Sessions currently held in the session store.", lambda: len(SESSIONS))
+
+@app.before_request
+def start_request_timer():
+    if METRICS.enabled:
+        g.request_t0 = time.perf_counter()
+
+@app.after_request
+def count_request(response: Response) -> Response:
+    t0 = g.pop("request_t0", None)
+    if t0 is not None:
+        endpoint = request.endpoint or "unknown"
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - t0)
+        REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    return response
+
+def session_id_from_request() -> Optional[str]:
+    """Clients send their session id as a header, a query arg or in the JSON body."""
+    sid = request.headers.get("X-Session-Id") or request.args.get("session_id")
+    if not sid:
+        data = request.get_json(silent=True) or {}
+        sid = data.get("session_id")
+    return sid
+
+def current_session() -> SimSession:
+    # Unknown or evicted ids get a fresh game; the client picks up the new id
+    return SESSIONS.get_or_create(session_id_from_request())
+
+def delta_base_from_request() -> Any:
+    """
+    Versioned mode is opt-in: a `since` key (query arg or JSON body) asks for a
+    delta against that acknowledged version; `since: null` asks for a full
+    versioned reply. Returns False when the client wants the plain payload.
+    """
+    if "since" in request.args:
+        raw = request.args.get("since")
+    else:
+        data = request.get_json(silent=True) or {}
+        if "since" not in data:
+            return False
+        raw = data["since"]
+    try:
+        return int(raw) if raw not in (None, "", "null") else None
+    except (TypeError, ValueError):
+        return None
+
+def reply(sess: SimSession, **extra: Any):
+    since = delta_base_from_request()
+    if since is not False:
+        extra["session_id"] = sess.id
+        return Response(versioned_payload(sess.state, since, extra), mimetype="application/json")
+
+    payload = state_payload(sess.state)
+    payload["session_id"] = sess.id
+    payload.update(extra)
+    with PAYLOAD_SECONDS.labels("json").time():
+        return jsonify(payload)
 
 @app.get("/api/state")
 def api_state():
-    return jsonify(state_payload())
+    sess = current_session()
+    with sess.lock:
+        return reply(sess)
 
 @app.post("/api/reset")
 def api_reset():
     data = request.get_json(silent=True) or {}
     seed = data.get("seed")
-    reset_world(seed=seed)
-    return jsonify(state_payload())
-
-import random
+    integrator = data.get("integrator")
+    sess = current_session()
+    with sess.lock:
+        if integrator in INTEGRATORS:
+            sess.state["integrator"] = integrator
+        if "gravity_field" in data:
+            sess.state["gravity_field"] = bool(data["gravity_field"])
+        reset_world(sess.state, seed=seed)
+        return reply(sess)
 
 @app.post("/api/event/resolve")
 def api_event_resolve():
-    if STATE["status"] != "running":
-        return jsonify(state_payload())
-
     data = request.get_json(silent=True) or {}
-    choice = data.get("choice")
-
-    ev = STATE.get("pending_event")
-    if not ev:
-        return jsonify(state_payload())
+    sess = current_session()
+    with sess.lock:
+        resolve_event(sess.state, data.get("choice"))
+        return reply(sess)
 
-    ev_type = ev.get("type")
+@app.post("/api/plan")
+def api_plan():
+    data = request.get_json(silent=True) or {}
+    try:
+        dvx, dvy = plan_args(data)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    sess = current_session()
+    with sess.lock:
+        apply_plan(sess.state, dvx, dvy)
+        return reply(sess)
 
-    valid = {
-        "planet_latch_repair": {"repair", "skip"},
-        "planet_water_recycler": {"fix", "ignore"},
-        "planet_crew_rest": {"rest", "push"},
-    }.get(ev_type, set())
+@app.post("/api/warp")
+def api_warp():
+    """
+    Coast to the next capture, crash, success, out-of-bounds or game over (or
+    `horizon` sim seconds) in one call, with the outcome stepping by `dt` gives.
+    """
+    data = request.get_json(silent=True) or {}
+    dt, horizon = warp_args(data)
+    sess = current_session()
+    with sess.lock:
+        result = warp(sess.state, dt, horizon)
+        return reply(sess, warp=result)
 
-    if choice not in valid:
-        return jsonify(state_payload())
+@app.post("/api/predict")
+def api_predict():
+    """Where would a burn of (dvx, dvy) take us? Read-only; state is not touched."""
+    data = request.get_json(silent=True) or {}
+    try:
+        dvx, dvy, horizon = predict_args(data)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    sess = current_session()
+    with sess.lock:
+        result = predict_burn(sess.state, dvx, dvy, horizon=horizon)
+    result["session_id"] = sess.id
+    return jsonify(result)
 
-    # --- Apply consequences for this event type ---
-    if ev_type == "planet_latch_repair":
-        if choice == "repair":
-            # Food goes down 10% (current value)
-            STATE["food"] = max(0.0, STATE.get("food", 100.0) * 0.90)
+@app.post("/api/step")
+def api_step():
+    data = request.get_json(silent=True) or {}
+    try:
+        dt = clamp(float(data.get("dt", 0.016)), DT_MIN, DT_MAX)
+        steps = requested_steps(data, dt)
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    sess = current_session()
+    with sess.lock:
+        if SCHEDULER is not None:
+            # The server advances the session on its own clock; just report
+            return reply(sess, steps_run=0, trail=[])
+        trail = step_many(sess.state, dt, steps)
+        return reply(sess, steps_run=len(trail), trail=trail)
 
-            # Morale boost for taking care of ship
-            STATE["morale"] = min(100.0, STATE.get("morale", 100.0) + 6.0)
+@app.get("/api/snapshot")
+def api_snapshot():
+    """The session's full state as a binary snapshot (see sim.snapshot)."""
+    sess = current_session()
+    with sess.lock:
+        blob = snapshot(sess.state)
+    return Response(blob, mimetype="application/octet-stream", headers={"X-Session-Id": sess.id})
 
-        elif choice == "skip":
-            # Ship health decreases randomly
-            dmg = random.uniform(5.0, 20.0)
-            STATE["ship_health"] = max(0.0, STATE.get("ship_health", 100.0) - dmg)
+@app.post("/api/restore")
+def api_restore():
+    """Replace the session's state with a snapshot sent as the raw request body."""
+    sess = current_session()
+    with sess.lock:
+        try:
+            restore(sess.state, request.get_data())
+        except ValueError as exc:
+            return jsonify({"error": str(exc), "session_id": sess.id}), 400
+        return reply(sess)
 
-            # Morale penalty for ignoring repairs
-            STATE["morale"] = max(0.0, STATE.get("morale", 100.0) - 8.0)
+@app.get("/api/inputs")
+def api_inputs():
+    """
+    The session's input log since its last reset (or restore), sealed with the
+    current state hash; `python -m sim.replay` re-runs and verifies it.
+    """
+    sess = current_session()
+    with sess.lock:
+        log = sess.state.get("input_log")
+        if log is None:
+            return jsonify({"error": "input recording is off", "session_id": sess.id}), 404
+        digest = state_hash(sess.state)
+        blob = log.to_bytes(digest)
+    headers = {"X-Session-Id": sess.id, "X-State-Hash": digest.hex()}
+    return Response(blob, mimetype="application/octet-stream", headers=headers)
 
-        # If ship health < 50, oxygen decreases by 25% at every planet decision
-        if STATE.get("ship_health", 100.0) < 50.0:
-            STATE["oxygen"] = max(0.0, STATE.get("oxygen", 100.0) * 0.75)
+@app.get("/api/trajectory")
+def api_trajectory():
+    """
+    The flight path kept server-side since the last reset (newest
+    TRAJECTORY_CAPACITY samples), thinned to `points` rows of [t, x, y, vx, vy].
+    """
+    try:
+        points, tolerance = trajectory_args(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    sess = current_session()
+    with sess.lock:
+        if sess.state.get("trajectory") is None:
+            return jsonify({"error": "trajectory recording is off", "session_id": sess.id}), 404
+        result = trajectory_payload(sess.state, points, tolerance)
+    result["session_id"] = sess.id
+    return jsonify(result)
 
-    elif ev_type == "planet_crew_rest":
-        if choice == "rest":
-            STATE["morale"] = min(100.0, STATE.get("morale", 100.0) + 25.0)
-            STATE["food"] = max(0.0, STATE.get("food", 100.0) - 10.0)
-        elif choice == "push":
-            STATE["morale"] = max(0.0, STATE.get("morale", 100.0) - 15.0)
+@app.get("/api/cache")
+def api_cache():
+    """Hit/miss counters of the process-wide world and gravity-field caches."""
+    return jsonify({"worlds": world_cache_stats(), "fields": FIELD_CACHE.stats()})
 
+@app.get("/api/metrics")
+def api_metrics():
+    """Step phase timings, payload timings, request and outcome counters (Prometheus text)."""
+    if not METRICS.enabled:
+        return jsonify({"error": "metrics are off"}), 404
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
 
-    elif ev_type == "planet_water_recycler":
-        if choice == "fix":
-            # Food cost
-            STATE["food"] = max(0.0, STATE.get("food", 100.0) * 0.90)
+def stream_error(cmd_id: Any, message: str) -> str:
+    """Error ack for a stream command that could not be applied."""
+    return json.dumps({"type": "error", "id": cmd_id, "error": message})
 
-            # Morale boost for fixing systems
-            STATE["morale"] = min(100.0, STATE.get("morale", 100.0) + 6.0)
+@sock.route("/api/stream")
+def api_stream(ws):
+    """
+    Server-driven game loop over a WebSocket.
 
-        elif choice == "ignore":
-            # Water drops immediately
-            STATE["water"] = max(0.0, STATE.get("water", 100.0) - 20.0)
+    The server advances the session at STREAM_TICK_HZ and pushes one frame per
+    tick: {"type": "frame", "seq", "ack", "trail", "state"}. The client sends
+    commands on the same socket: plan / resolve / warp / reset (see apply_command),
+    plus "pause" and "resume". Commands may carry an "id"; frames echo the last
+    applied id as "ack". A command that can't be applied gets
+    {"type": "error", "id", "error"} instead and changes nothing. Stepping holds while an event prompt is pending. With
+    the tick scheduler on, the scheduler steps the session and this loop only
+    sends frames (pause / resume then pause the session itself).
+    """
+    sess = current_session()
+    period = 1.0 / STREAM_TICK_HZ
+    substeps = math.ceil(period / STREAM_SUBSTEP_DT)
+    dt = period / substeps
 
-            # Morale penalty for taking the risk
-            STATE["morale"] = max(0.0, STATE.get("morale", 100.0) - 4.0)
+    paused = request.args.get("paused") == "1"
+    seq = 0
+    ack = None
+    next_tick = time.monotonic()
 
-    # Clear event so sim resumes
-    STATE["pending_event"] = None
-    return jsonify(state_payload())
+    while True:
+        # Drain commands until the next tick is due
+        msg = ws.receive(timeout=max(0.0, next_tick - time.monotonic()))
+        if msg is not None:
+            try:
+                cmd = json.loads(msg)
+            except ValueError:
+                ws.send(stream_error(None, "command is not valid JSON"))
+                continue
+            if not isinstance(cmd, dict):
+                ws.send(stream_error(None, "command must be a JSON object"))
+                continue
+            try:
+                if cmd.get("cmd") in ("pause", "resume"):
+                    paused = sess.paused = cmd["cmd"] == "pause"
+                else:
+                    with sess.lock:
+                        apply_command(sess.state, cmd)
+            except (TypeError, ValueError, OverflowError) as exc:
+                # Bad arguments: tell the client, keep the stream going
+                ws.send(stream_error(cmd.get("id"), str(exc)))
+                continue
+            ack = cmd.get("id", ack)
+            continue
 
-@app.post("/api/plan")
-def api_plan():
-    if STATE["status"] != "running":
-        return jsonify(state_payload())
+        now = time.monotonic()
+        next_tick += period
+        if now - next_tick > STREAM_MAX_LAG_TICKS * period:
+            # Fell too far behind (slow client or overloaded box): skip ahead
+            next_tick = now + period
 
-    data = request.get_json(silent=True) or {}
-    t = float(STATE["t"])
-    rocket = STATE["rocket"]
-    is_latched = STATE.get("latched_planet_id") is not None
-
-    # --- UPDATED PROPULSION LOGIC ---
-    if not is_latched:
-        total_left = STATE.get("space_burns_left", 0)
-        burst_count = STATE.get("consecutive_burns", 0)
-        
-        # Check total pool (10) and burst limit (3)
-        if total_left <= 0 or burst_count >= 3:
-            return jsonify(state_payload())
-
-    # Apply Velocity
-    dvx = float(data.get("dvx", 0.0))
-    dvy = float(data.get("dvy", 0.0))
-    rocket.vx += dvx
-    rocket.vy += dvy
-
-    # Handle State Transitions
-    if is_latched:
-        STATE["latched_planet_id"] = None
-        STATE["consecutive_burns"] = 0   # Reset when taking off from a planet
-        STATE["can_space_burn"] = True
-    else:
-        # Increment the burst count
-        STATE["space_burns_left"] -= 1
-        STATE["consecutive_burns"] += 1
-        
-        # implement fuel deduction after each emergency propulsion
-        # Subtract 10% of total fuel per emergency thrust
-        STATE["fuel"] = max(0, STATE.get("fuel", 100.0) - 10.0)
-
-        # If 3 burns are hit, lock the engines
-        if STATE["consecutive_burns"] >= 3:
-            STATE["can_space_burn"] = False
-            
-    STATE["last_plan_time"] = t
-    return jsonify(state_payload())
+        with sess.lock:
+            trail = []
+            if SCHEDULER is None and not paused and sess.state.get("pending_event") is None:
+                trail = step_many(sess.state, dt, substeps)
+            payload = state_payload(sess.state)
+        payload["session_id"] = sess.id
+        SESSIONS.touch(sess)
 
-@app.post("/api/step")
-def api_step():
-    data = request.get_json(silent=True) or {}
-    dt = float(data.get("dt", 0.016))
-    dt = clamp(dt, DT_MIN, DT_MAX)
-    step_sim(dt)
-    return jsonify(state_payload())
+        seq += 1
+        with PAYLOAD_SECONDS.labels("json").time():
+            frame = json.dumps({"type": "frame", "seq": seq, "ack": ack, "trail": trail, "state": payload})
+        ws.send(frame)
 
 if __name__ == "__main__":
-    reset_world()
     app.run(host="127.0.0.1", port=5000, debug=True)
@@ -0,0 +1,364 @@
+"""
+ASGI entry point serving the same /api/* contract as app.py.
+
+    uvicorn asgi:app --host 127.0.0.1 --port 5000
+
+One event loop holds every connection. Anything that takes a session lock or
+runs the sim (steps, predictions, payload building, world generation) goes to
+a thread pool, so a long batch of substeps never stalls other clients.
+Sessions live in this process: run a single worker.
+"""
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from sim.world import reset_world, world_cache_stats
+from sim.field import FIELD_CACHE
+from sim.serialize import state_payload, versioned_payload
+from sim.physics import step_many, requested_steps
+from sim.commands import apply_plan, plan_args, resolve_event, apply_command
+from sim.predict import predict_burn, predict_args
+from sim.trajectory import trajectory_args, trajectory_payload
+from sim.warp import warp, warp_args
+from sim.snapshot import snapshot, restore
+from sim.replay import state_hash
+from sim.integrators import INTEGRATORS
+from sim.session import SessionStore, SimSession
+from sim.scheduler import start_scheduler
+from sim.metrics import METRICS, PAYLOAD_SECONDS, REQUESTS, REQUEST_SECONDS
+from sim.config import (
+    clamp, DT_MIN, DT_MAX, ASGI_EXECUTOR_THREADS,
+    STREAM_TICK_HZ, STREAM_SUBSTEP_DT, STREAM_MAX_LAG_TICKS,
+)
+
+SESSIONS = SessionStore()
+# Set when the server ticks sessions itself (SERVER_TICK_HZ > 0)
+SCHEDULER = start_scheduler(SESSIONS)
+EXECUTOR = ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix="sim")
+
+METRICS.gauge("deltax_active_sessions", "Sessions currently held in the session store.", lambda: len(SESSIONS))
+
+async def offload(fn: Callable, *args: Any) -> Any:
+    """Run blocking sim work on the executor."""
+    return await asyncio.get_running_loop().run_in_executor(EXECUTOR, partial(fn, *args))
+
+# -------------------------
+# Request parsing (mirrors app.py)
+# -------------------------
+
+async def body_json(request: Request) -> Dict[str, Any]:
+    try:
+        data = json.loads(await request.body() or b"null")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def session_id(request: Request, data: Dict[str, Any]) -> Optional[str]:
+    """Clients send their session id as a header, a query arg or in the JSON body."""
+    return request.headers.get("x-session-id") or request.query_params.get("session_id") or data.get("session_id")
+
+def delta_base(request: Request, data: Dict[str, Any]) -> Any:
+    """Same rules as app.delta_base_from_request: False means the plain payload."""
+    if "since" in request.query_params:
+        raw = request.query_params.get("since")
+    elif "since" in data:
+        raw = data["since"]
+    else:
+        return False
+    try:
+        return int(raw) if raw not in (None, "", "null") else None
+    except (TypeError, ValueError):
+        return None
+
+def reply(sess: SimSession, since: Any, **extra: Any) -> Response:
+    """State reply; call with the session lock held (on the executor)."""
+    if since is not False:
+        extra["session_id"] = sess.id
+        return Response(versioned_payload(sess.state, since, extra), media_type="application/json")
+
+    payload = state_payload(sess.state)
+    payload["session_id"] = sess.id
+    payload.update(extra)
+    with PAYLOAD_SECONDS.labels("json").time():
+        return Response(json.dumps(payload), media_type="application/json")
+
+async def in_session(request: Request, data: Dict[str, Any], fn: Callable[..., Response], *args: Any) -> Response:
+    """
+    Look up (or create) the caller's session and run `fn(sess, since, *args)`
+    under its lock, all on the executor: both the lock and a fresh world block.
+    """
+    sid = session_id(request, data)
+    since = delta_base(request, data)
+
+    def work() -> Response:
+        sess = SESSIONS.get_or_create(sid)
+        with sess.lock:
+            return fn(sess, since, *args)
+    return await offload(work)
+
+# -------------------------
+# Routes
+# -------------------------
+
+async def api_state(request: Request) -> Response:
+    return await in_session(request, {}, reply)
+
+def _reset(sess: SimSession, since: Any, data: Dict[str, Any]) -> Response:
+    integrator = data.get("integrator")
+    if integrator in INTEGRATORS:
+        sess.state["integrator"] = integrator
+    if "gravity_field" in data:
+        sess.state["gravity_field"] = bool(data["gravity_field"])
+    reset_world(sess.state, seed=data.get("seed"))
+    return reply(sess, since)
+
+async def api_reset(request: Request) -> Response:
+    data = await body_json(request)
+    return await in_session(request, data, _reset, data)
+
+def _resolve(sess: SimSession, since: Any, choice: Optional[str]) -> Response:
+    resolve_event(sess.state, choice)
+    return reply(sess, since)
+
+async def api_event_resolve(request: Request) -> Response:
+    data = await body_json(request)
+    return await in_session(request, data, _resolve, data.get("choice"))
+
+def _plan(sess: SimSession, since: Any, dvx: float, dvy: float) -> Response:
+    apply_plan(sess.state, dvx, dvy)
+    return reply(sess, since)
+
+async def api_plan(request: Request) -> Response:
+    data = await body_json(request)
+    try:
+        dvx, dvy = plan_args(data)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return await in_session(request, data, _plan, dvx, dvy)
+
+def _warp(sess: SimSession, since: Any, dt: float, horizon: float) -> Response:
+    result = warp(sess.state, dt, horizon)
+    return reply(sess, since, warp=result)
+
+async def api_warp(request: Request) -> Response:
+    """Coast to the next discrete event in one call (see app.api_warp)."""
+    data = await body_json(request)
+    dt, horizon = warp_args(data)
+    return await in_session(request, data, _warp, dt, horizon)
+
+def _predict(sess: SimSession, since: Any, dvx: float, dvy: float, horizon: float) -> Response:
+    result = predict_burn(sess.state, dvx, dvy, horizon=horizon)
+    result["session_id"] = sess.id
+    return JSONResponse(result)
+
+async def api_predict(request: Request) -> Response:
+    """Where would a burn of (dvx, dvy) take us? Read-only; state is not touched."""
+    data = await body_json(request)
+    try:
+        dvx, dvy, horizon = predict_args(data)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return await in_session(request, data, _predict, dvx, dvy, horizon)
+
+def _step(sess: SimSession, since: Any, dt: float, steps: int) -> Response:
+    if SCHEDULER is not None:
+        # The server advances the session on its own clock; just report
+        return reply(sess, since, steps_run=0, trail=[])
+    trail = step_many(sess.state, dt, steps)
+    return reply(sess, since, steps_run=len(trail), trail=trail)
+
+async def api_step(request: Request) -> Response:
+    data = await body_json(request)
+    try:
+        dt = clamp(float(data.get("dt", 0.016)), DT_MIN, DT_MAX)
+        steps = requested_steps(data, dt)
+    except (TypeError, ValueError) as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return await in_session(request, data, _step, dt, steps)
+
+def _snapshot(sess: SimSession, since: Any) -> Response:
+    return Response(snapshot(sess.state), media_type="application/octet-stream", headers={"X-Session-Id": sess.id})
+
+async def api_snapshot(request: Request) -> Response:
+    """The session's full state as a binary snapshot (see sim.snapshot)."""
+    return await in_session(request, {}, _snapshot)
+
+def _restore(sess: SimSession, since: Any, blob: bytes) -> Response:
+    try:
+        restore(sess.state, blob)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc), "session_id": sess.id}, status_code=400)
+    return reply(sess, since)
+
+async def api_restore(request: Request) -> Response:
+    """Replace the session's state with a snapshot sent as the raw request body."""
+    blob = await request.body()
+    return await in_session(request, {}, _restore, blob)
+
+def _inputs(sess: SimSession, since: Any) -> Response:
+    log = sess.state.get("input_log")
+    if log is None:
+        return JSONResponse({"error": "input recording is off", "session_id": sess.id}, status_code=404)
+    digest = state_hash(sess.state)
+    headers = {"X-Session-Id": sess.id, "X-State-Hash": digest.hex()}
+    return Response(log.to_bytes(digest), media_type="application/octet-stream", headers=headers)
+
+async def api_inputs(request: Request) -> Response:
+    """The session's input log, sealed with the current state hash (see app.api_inputs)."""
+    return await in_session(request, {}, _inputs)
+
+def _trajectory(sess: SimSession, since: Any, points: int, tolerance: float) -> Response:
+    if sess.state.get("trajectory") is None:
+        return JSONResponse({"error": "trajectory recording is off", "session_id": sess.id}, status_code=404)
+    result = trajectory_payload(sess.state, points, tolerance)
+    result["session_id"] = sess.id
+    return JSONResponse(result)
+
+async def api_trajectory(request: Request) -> Response:
+    """The server-side flight path, thinned to `points` rows (see app.api_trajectory)."""
+    try:
+        points, tolerance = trajectory_args(request.query_params)
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+    return await in_session(request, {}, _trajectory, points, tolerance)
+
+async def api_cache(request: Request) -> Response:
+    """Hit/miss counters of the process-wide world and gravity-field caches."""
+    return JSONResponse({"worlds": world_cache_stats(), "fields": FIELD_CACHE.stats()})
+
+async def api_metrics(request: Request) -> Response:
+    """Step phase timings, payload timings, request and outcome counters (Prometheus text)."""
+    if not METRICS.enabled:
+        return JSONResponse({"error": "metrics are off"}, status_code=404)
+    return Response(await offload(METRICS.render), media_type="text/plain; version=0.0.4")
+
+def stream_error(cmd_id: Any, message: str) -> str:
+    """Error ack for a stream command that could not be applied (see app.stream_error)."""
+    return json.dumps({"type": "error", "id": cmd_id, "error": message})
+
+async def api_stream(ws: WebSocket) -> None:
+    """The /api/stream game loop of app.api_stream, with a timer on the event loop."""
+    await ws.accept()
+    sess = await offload(SESSIONS.get_or_create, ws.headers.get("x-session-id") or ws.query_params.get("session_id"))
+    period = 1.0 / STREAM_TICK_HZ
+    substeps = math.ceil(period / STREAM_SUBSTEP_DT)
+    dt = period / substeps
+
+    paused = ws.query_params.get("paused") == "1"
+    seq = 0
+    ack = None
+    next_tick = time.monotonic()
+
+    def command(cmd: Dict[str, Any]) -> None:
+        with sess.lock:
+            apply_command(sess.state, cmd)
+
+    def tick(seq: int, ack: Any, paused: bool) -> str:
+        with sess.lock:
+            trail = []
+            if SCHEDULER is None and not paused and sess.state.get("pending_event") is None:
+                trail = step_many(sess.state, dt, substeps)
+            payload = state_payload(sess.state)
+        payload["session_id"] = sess.id
+        SESSIONS.touch(sess)
+        with PAYLOAD_SECONDS.labels("json").time():
+            return json.dumps({"type": "frame", "seq": seq, "ack": ack, "trail": trail, "state": payload})
+
+    try:
+        while True:
+            # Drain commands until the next tick is due
+            try:
+                msg = await asyncio.wait_for(ws.receive_text(), max(0.0, next_tick - time.monotonic()))
+            except asyncio.TimeoutError:
+                msg = None
+            if msg is not None:
+                try:
+                    cmd = json.loads(msg)
+                except ValueError:
+                    await ws.send_text(stream_error(None, "command is not valid JSON"))
+                    continue
+                if not isinstance(cmd, dict):
+                    await ws.send_text(stream_error(None, "command must be a JSON object"))
+                    continue
+                try:
+                    if cmd.get("cmd") in ("pause", "resume"):
+                        paused = sess.paused = cmd["cmd"] == "pause"
+                    else:
+                        await offload(command, cmd)
+                except (TypeError, ValueError, OverflowError) as exc:
+                    # Bad arguments: tell the client, keep the stream going
+                    await ws.send_text(stream_error(cmd.get("id"), str(exc)))
+                    continue
+                ack = cmd.get("id", ack)
+                continue
+
+            now = time.monotonic()
+            next_tick += period
+            if now - next_tick > STREAM_MAX_LAG_TICKS * period:
+                next_tick = now + period
+
+            seq += 1
+            await ws.send_text(await offload(tick, seq, ack, paused))
+    except WebSocketDisconnect:
+        pass
+
+class RequestMetrics:
+    """ASGI middleware feeding the same request counters as app.py's hooks."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS.enabled:
+            return await self.app(scope, receive, send)
+
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # The router records the matched handler on the scope
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unknown")
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - t0)
+            REQUESTS.inc(endpoint, scope["method"], str(status["code"]))
+
+app = Starlette(
+    routes=[
+        Route("/api/state", api_state, methods=["GET"]),
+        Route("/api/reset", api_reset, methods=["POST"]),
+        Route("/api/event/resolve", api_event_resolve, methods=["POST"]),
+        Route("/api/plan", api_plan, methods=["POST"]),
+        Route("/api/warp", api_warp, methods=["POST"]),
+        Route("/api/predict", api_predict, methods=["POST"]),
+        Route("/api/step", api_step, methods=["POST"]),
+        Route("/api/snapshot", api_snapshot, methods=["GET"]),
+        Route("/api/restore", api_restore, methods=["POST"]),
+        Route("/api/inputs", api_inputs, methods=["GET"]),
+        Route("/api/trajectory", api_trajectory, methods=["GET"]),
+        Route("/api/cache", api_cache, methods=["GET"]),
+        Route("/api/metrics", api_metrics, methods=["GET"]),
+        WebSocketRoute("/api/stream", api_stream),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+        Middleware(RequestMetrics),
+    ],
+)
@@ -0,0 +1,361 @@
+"""
+Reproducible micro/macro benchmarks for the sim and the HTTP layer.
+
+    python -m bench.run                          # run, print table
+    python -m bench.run --save bench/baseline.json
+    python -m bench.run --compare bench/baseline.json
+
+Every case uses fixed seeds. Cases that depend on world size run once per
+planet count (--planets). --compare exits non-zero when a case's p50 is more
+than --tolerance slower than the baseline. Timings only compare on the host
+that produced them, so the baseline is not checked in: save one on your
+machine before changing code, then compare against it.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from sim.state import new_state
+from sim.world import reset_world, WORLD_CACHE
+from sim.physics import step_sim
+from sim.vector import step_sessions
+from sim.serialize import state_payload
+from sim.hud import compute_success_probability, hud
+from sim.models import Planet
+from sim.planets import PlanetArrays, KINDS
+from sim.integrators import INTEGRATORS, advance
+from sim.field import field_for
+from sim.snapshot import snapshot, restore
+from sim.metrics import METRICS
+from sim.config import (
+    MAX_WORLD_ABS, BATCH_DT,
+    GOOD_MASS_RANGE, BAD_MASS_RANGE, PLANET_RADIUS_RANGE,
+)
+
+SEED = 1234
+DEFAULT_PLANETS = (22, 200, 2000)
+SESSION_COUNTS = (100, 1000)
+
+# -------------------------
+# Harness
+# -------------------------
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 20,
+            setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """Time `fn` call by call. `setup` runs untimed before each call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples = np.empty(iterations, dtype=np.float64)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        if setup:
+            setup()
+        t0 = clock()
+        fn()
+        samples[i] = clock() - t0
+
+    us = samples / 1000.0
+    return {
+        "n": iterations,
+        "ops_per_sec": 1e6 / float(us.mean()),
+        "mean_us": float(us.mean()),
+        "p50_us": float(np.percentile(us, 50)),
+        "p95_us": float(np.percentile(us, 95)),
+        "p99_us": float(np.percentile(us, 99)),
+    }
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+def synthetic_world(n_planets: int, seed: int = SEED) -> Dict[str, Any]:
+    """
+    A reset world with its planets replaced by `n_planets` random ones spread
+    over the playable area (clear of the start point), a third of them revealed
+    and some revealed as bad so the HUD risk term has work to do.
+    """
+    state = new_state()
+    state["rng"] = random.Random(seed)
+    reset_world(state, seed=seed)
+
+    rng = random.Random(seed)
+    span = MAX_WORLD_ABS * 0.9
+    planets: List[Planet] = []
+    while len(planets) < n_planets:
+        x, y = rng.uniform(-span, span), rng.uniform(-span, span)
+        if x * x + y * y < 300.0 ** 2:
+            continue
+        kind = rng.choice(KINDS)
+        mass = rng.uniform(*(GOOD_MASS_RANGE if kind == "good" else BAD_MASS_RANGE))
+        planets.append(Planet(
+            id=len(planets) + 1, x=x, y=y, mass=mass,
+            radius=rng.uniform(*PLANET_RADIUS_RANGE), kind=kind,
+            revealed=rng.random() < 0.33, recoverable=rng.random() < 0.5, color="",
+        ))
+    state["planets"] = PlanetArrays.from_planets(planets)
+    state["world_version"] += 1
+    return state
+
+def _restorer(state: Dict[str, Any]) -> Callable[[], None]:
+    """Put the rocket and status back to their current values (untimed, per call)."""
+    rocket = state["rocket"]
+    saved = (rocket.x, rocket.y, rocket.vx, rocket.vy)
+    keys = ("t", "status", "fail_reason", "latched_planet_id", "pending_event", "countdown",
+            "oxygen", "food", "water", "fuel", "morale", "crew_health", "ship_health")
+    fields = {k: state.get(k) for k in keys}
+
+    def restore() -> None:
+        rocket.x, rocket.y, rocket.vx, rocket.vy = saved
+        state.update(fields)
+    return restore
+
+def flying_state(n: int) -> Dict[str, Any]:
+    return synthetic_world(n)
+
+def latched_state(n: int) -> Dict[str, Any]:
+    state = synthetic_world(n)
+    planets: PlanetArrays = state["planets"]
+    # Latch onto a good planet so the okay-planet countdown never fires
+    i = int(np.flatnonzero(planets.kind == 0)[0])
+    planets.revealed[i] = True
+    state["latched_planet_id"] = int(planets.id[i])
+    rocket = state["rocket"]
+    rocket.x = float(planets.x[i] + planets.radius[i] + 20.0)
+    rocket.y = float(planets.y[i])
+    rocket.vx, rocket.vy = 0.0, 0.0
+    return state
+
+def paused_state(n: int) -> Dict[str, Any]:
+    state = latched_state(n)
+    state["pending_event"] = {
+        "type": "planet_crew_rest", "planet_id": state["latched_planet_id"],
+        "prompt": "bench", "choices": [{"id": "rest", "label": "rest"}, {"id": "push", "label": "push"}],
+    }
+    return state
+
+# -------------------------
+# Cases
+# -------------------------
+
+def bench_sim(planet_counts, iterations: int) -> Dict[str, Dict[str, float]]:
+    out: Dict[str, Dict[str, float]] = {}
+
+    reset_state = new_state()
+    seeds = itertools.count(SEED)
+    out["reset_world"] = measure(
+        lambda: reset_world(reset_state, seed=next(seeds)), max(50, iterations // 10), setup=WORLD_CACHE.clear)
+    # Same seed every time: served from the world cache
+    out["reset_world[cached]"] = measure(lambda: reset_world(reset_state, seed=SEED), iterations)
+    # Seeded world: restore rebuilds the planets from the world cache
+    seeded_blob = snapshot(reset_state)
+    out["restore[seeded]"] = measure(lambda: restore(reset_state, seeded_blob), iterations)
+
+    for n in planet_counts:
+        for phase, make in (("flying", flying_state), ("latched", latched_state), ("paused", paused_state)):
+            state = make(n)
+            out[f"step_sim[{phase},n={n}]"] = measure(
+                lambda: step_sim(state, BATCH_DT), iterations, setup=_restorer(state))
+
+        # Instrumentation cost: the same flying step with metrics switched off
+        state = flying_state(n)
+        enabled, METRICS.enabled = METRICS.enabled, False
+        try:
+            out[f"step_sim[flying,n={n},no-metrics]"] = measure(
+                lambda: step_sim(state, BATCH_DT), iterations, setup=_restorer(state))
+        finally:
+            METRICS.enabled = enabled
+
+        state = flying_state(n)
+        out[f"state_payload[n={n}]"] = measure(lambda: state_payload(state), iterations)
+        out[f"success_probability[n={n}]"] = measure(lambda: compute_success_probability(state), iterations)
+        # Rocket at rest between calls: the cached probability is reused
+        out[f"hud[n={n}]"] = measure(lambda: hud(state), iterations)
+        blob = snapshot(state)
+        out[f"snapshot[n={n}]"] = measure(lambda: snapshot(state), iterations)
+        out[f"restore[n={n}]"] = measure(lambda: restore(state, blob), iterations)
+
+        # One force evaluation, exact sum vs precomputed field, at random points
+        planets = state["planets"]
+        field = field_for(planets.x, planets.y, planets.mass)
+        rng = random.Random(SEED)
+        span = MAX_WORLD_ABS * 0.95
+        points = itertools.cycle([(rng.uniform(-span, span), rng.uniform(-span, span)) for _ in range(1000)])
+        out[f"accel[exact,n={n}]"] = measure(lambda: planets.accel_at(*next(points)), iterations)
+        out[f"accel[field,n={n}]"] = measure(lambda: field.accel_at(*next(points)), iterations)
+
+    # One scheduler tick's worth of free flight for many sessions at once
+    for sessions in SESSION_COUNTS:
+        states = []
+        for seed in range(sessions):
+            state = new_state()
+            reset_world(state, seed=SEED + seed % 16)
+            states.append(state)
+        restorers = [_restorer(s) for s in states]
+        out[f"step_sessions[sessions={sessions}]"] = measure(
+            lambda: step_sessions(states, BATCH_DT, 1), max(20, iterations // 50),
+            setup=lambda: [r() for r in restorers])
+    return out
+
+def bench_http(iterations: int) -> Dict[str, Dict[str, float]]:
+    from app import app
+
+    client = app.test_client()
+    sid = client.post("/api/reset", json={"seed": SEED}).get_json()["session_id"]
+    headers = {"X-Session-Id": sid}
+    restore_body = {"seed": SEED}
+
+    out: Dict[str, Dict[str, float]] = {}
+    steps = {"n": 0}
+
+    def step_once() -> None:
+        client.post("/api/step", json={"dt": 0.016}, headers=headers)
+        steps["n"] += 1
+
+    def reset_every_500() -> None:
+        # Keep the run from ending mid-benchmark
+        if steps["n"] % 500 == 0:
+            client.post("/api/reset", json=restore_body, headers=headers)
+
+    out["http_step"] = measure(step_once, iterations, setup=reset_every_500)
+    out["http_step[span=0.25]"] = measure(
+        lambda: client.post("/api/step", json={"dt": 0.016, "span": 0.25}, headers=headers),
+        max(50, iterations // 10),
+        setup=lambda: client.post("/api/reset", json=restore_body, headers=headers),
+    )
+    return out
+
+def bench_integrators(dts, sim_seconds: float = 120.0) -> Dict[str, Dict[str, float]]:
+    """
+    Energy drift per integrator and dt on a fixed coasting trajectory (pure
+    gravity, collisions ignored). Drift is |E - E0| relative to the energy
+    scale 0.5 v0^2 + |phi0|; cost is force evaluations and wall time.
+    """
+    state = new_state()
+    reset_world(state, seed=SEED)
+    planets: PlanetArrays = state["planets"]
+    x0, y0, vx0, vy0 = 0.0, 0.0, 4.0, 0.6
+
+    def energy(x, y, vx, vy):
+        return 0.5 * (vx * vx + vy * vy) + planets.potential_at(x, y)
+
+    e0 = energy(x0, y0, vx0, vy0)
+    scale = 0.5 * (vx0 * vx0 + vy0 * vy0) + abs(planets.potential_at(x0, y0))
+
+    out: Dict[str, Dict[str, float]] = {}
+    for method in INTEGRATORS:
+        for dt in dts:
+            x, y, vx, vy, a0 = x0, y0, vx0, vy0, None
+            evals = 0
+            worst = 0.0
+            t0 = time.perf_counter()
+            for _ in range(int(round(sim_seconds / dt))):
+                x, y, vx, vy, a0, e = advance(method, planets, x, y, vx, vy, dt, a0)
+                evals += e
+                worst = max(worst, abs(energy(x, y, vx, vy) - e0) / scale)
+            wall = time.perf_counter() - t0
+            out[f"{method}[dt={dt:g}]"] = {
+                "max_energy_drift": worst,
+                "final_energy_drift": abs(energy(x, y, vx, vy) - e0) / scale,
+                "force_evals": evals,
+                "wall_ms": wall * 1000.0,
+            }
+    return out
+
+# -------------------------
+# Reporting
+# -------------------------
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    base = (baseline or {}).get("results", {})
+    print(f"{'case':44} {'ops/s':>11} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'vs base':>8}")
+    for name, r in results.items():
+        delta = ""
+        if name in base:
+            delta = f"{(r['p50_us'] / base[name]['p50_us'] - 1.0) * 100:+.0f}%"
+        print(f"{name:44} {r['ops_per_sec']:11.0f} {r['p50_us']:9.1f} {r['p95_us']:9.1f} {r['p99_us']:9.1f} {delta:>8}")
+
+def print_integrators(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{'integrator':24} {'max drift':>11} {'end drift':>11} {'evals':>8} {'wall ms':>9}")
+    for name, r in results.items():
+        print(f"{name:24} {r['max_energy_drift']:11.2e} {r['final_energy_drift']:11.2e} "
+              f"{r['force_evals']:8d} {r['wall_ms']:9.1f}")
+
+def regressions(results, baseline, tolerance: float) -> List[str]:
+    slow = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if b and r["p50_us"] > b["p50_us"] * (1.0 + tolerance):
+            slow.append(f"{name}: p50 {b['p50_us']:.1f}us -> {r['p50_us']:.1f}us")
+    return slow
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark step_sim, reset_world, payloads and /api/step.")
+    ap.add_argument("--planets", default=",".join(map(str, DEFAULT_PLANETS)), help="comma-separated planet counts")
+    ap.add_argument("--iterations", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3, help="rounds per case; the best round is kept")
+    ap.add_argument("--only", default=None, help="substring filter on case names")
+    ap.add_argument("--no-http", action="store_true", help="skip the Flask test-client cases")
+    ap.add_argument("--integrator-dts", default="0.05,0.2,0.5", help="dt values for the energy-drift table")
+    ap.add_argument("--save", default=None, help="write results as a baseline JSON")
+    ap.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before failing")
+    args = ap.parse_args(argv)
+
+    counts = [int(n) for n in args.planets.split(",") if n]
+    results: Dict[str, Dict[str, float]] = {}
+    # Keep each case's best round: scheduling noise only ever makes things slower
+    for _ in range(args.repeat):
+        round_results = bench_sim(counts, args.iterations)
+        if not args.no_http:
+            round_results.update(bench_http(args.iterations))
+        for name, r in round_results.items():
+            if name not in results or r["p50_us"] < results[name]["p50_us"]:
+                results[name] = r
+    if args.only:
+        results = {k: v for k, v in results.items() if args.only in k}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print(f"note: {args.compare} was saved on another host or setup; timings may not compare")
+
+    print_table(results, baseline)
+    integrators = bench_integrators([float(d) for d in args.integrator_dts.split(",") if d])
+    print_integrators(integrators)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results, "integrators": integrators}, f, indent=2)
+        print(f"saved {args.save}")
+
+    if baseline:
+        slow = regressions(results, baseline, args.tolerance)
+        if slow:
+            print("REGRESSIONS:")
+            for line in slow:
+                print("  " + line)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
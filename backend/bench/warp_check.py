@@ -0,0 +1,91 @@
+"""
+Warp vs stepping: a warp must land in exactly the state that stepping by the
+same dt would, and get there faster.
+
+    python -m bench.warp_check --seeds 0-99 --dts 0.016,0.05,0.1
+
+For every seed, dt, opening burn and integrator, one copy of the game warps
+for --horizon sim seconds while another calls step_sim until the same stop
+(capture, event, end of run or horizon). Both must end with identical
+snapshots. Exits non-zero on any mismatch and prints the first few.
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sim.state import new_state
+from sim.world import reset_world
+from sim.physics import step_sim
+from sim.commands import apply_plan
+from sim.warp import warp, warp_blocker
+from sim.snapshot import snapshot
+from sim.batch import parse_seeds
+from sim.integrators import INTEGRATORS
+from sim.config import INTEGRATOR
+
+def start(seed: int, dvy: float, integrator: str) -> Dict[str, Any]:
+    state = new_state()
+    state["rng"] = random.Random(seed)
+    state["integrator"] = integrator
+    reset_world(state, seed=seed)
+    if dvy:
+        apply_plan(state, 0.0, dvy)
+    return state
+
+def outcome(state: Dict[str, Any]) -> Tuple[Any, ...]:
+    event = state.get("pending_event") or {}
+    return state["status"], state.get("fail_reason"), state.get("latched_planet_id"), event.get("id"), round(state["t"], 6)
+
+def check(seed: int, dt: float, dvy: float, integrator: str, horizon: float) -> Tuple[bool, float, float, Tuple, Tuple]:
+    """(identical, warp seconds, stepping seconds, warp outcome, stepping outcome) for one case."""
+    warped, stepped = start(seed, dvy, integrator), start(seed, dvy, integrator)
+
+    t0 = time.perf_counter()
+    warp(warped, dt, horizon)
+    t_warp = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(int(round(horizon / dt))):
+        step_sim(stepped, dt)
+        if warp_blocker(stepped) is not None:
+            break
+    t_step = time.perf_counter() - t0
+
+    same = snapshot(warped) == snapshot(stepped)
+    return same, t_warp, t_step, outcome(warped), outcome(stepped)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Check that warping ends in the same state as stepping.")
+    ap.add_argument("--seeds", default="0-49", help="e.g. 0-99 or 3,7,42")
+    ap.add_argument("--dts", default="0.016,0.05,0.1", help="comma-separated session step sizes")
+    ap.add_argument("--burns", default="0,2,-3", help="comma-separated opening dvy burns")
+    ap.add_argument("--integrators", default=INTEGRATOR, help=f"comma-separated, from {','.join(INTEGRATORS)}")
+    ap.add_argument("--horizon", type=float, default=120.0)
+    args = ap.parse_args(argv)
+
+    cases = [
+        (seed, float(dt), float(dvy), integrator)
+        for integrator in args.integrators.split(",")
+        for dt in args.dts.split(",")
+        for seed in parse_seeds(args.seeds)
+        for dvy in args.burns.split(",")
+    ]
+    mismatches = []
+    t_warp = t_step = 0.0
+    for case in cases:
+        same, tw, ts, got, want = check(*case, args.horizon)
+        t_warp += tw
+        t_step += ts
+        if not same:
+            mismatches.append((case, got, want))
+
+    print(f"{len(cases) - len(mismatches)}/{len(cases)} identical; "
+          f"warp {t_warp:.1f}s vs stepping {t_step:.1f}s ({t_step / max(t_warp, 1e-9):.1f}x)")
+    for (seed, dt, dvy, integrator), got, want in mismatches[:10]:
+        print(f"  MISMATCH seed={seed} dt={dt} dvy={dvy} {integrator}: warp {got} stepping {want}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
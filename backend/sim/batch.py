@@ -0,0 +1,319 @@
+"""
+Headless Monte Carlo runner.
+
+Plays many seeds with a scripted policy (no Flask, no camera, no payloads)
+across a process pool and writes per-run results, sampled resource curves and
+an aggregate summary:
+
+    python -m sim.batch --seeds 1-2000 --policy aim --workers 8 --out runs/aim
+
+writes runs/aim_runs.csv, runs/aim_curves.csv and runs/aim_summary.json.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from sim.state import new_state
+from sim.world import reset_world
+from sim.physics import step_sim
+from sim.commands import apply_plan, can_plan, resolve_event
+from sim.mathutil import norm, unit
+from sim.integrators import INTEGRATORS
+from sim.config import BATCH_DT, DV_MAX, INTEGRATOR, GRAVITY_FIELD
+
+RESOURCES = ("oxygen", "food", "water", "fuel", "morale", "ship_health", "crew_health")
+
+# -------------------------
+# Policies
+# -------------------------
+
+class Policy:
+    """
+    Scripted player. `burn` is asked at every decision point and returns a
+    (dvx, dvy) or None; `choose` picks a choice id for an event prompt.
+    Policies get their own RNG so their draws never disturb the sim's.
+    """
+
+    name = "base"
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def burn(self, state: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        return None
+
+    def choose(self, state: Dict[str, Any], event: Dict[str, Any]) -> str:
+        return event["choices"][0]["id"]
+
+class CoastPolicy(Policy):
+    """Never burns; accepts every event. A baseline for the world itself."""
+
+    name = "coast"
+
+class AimPolicy(Policy):
+    """After a short stop on each planet, relaunch straight at Earth."""
+
+    name = "aim"
+    DWELL_S = 1.0
+    SPEED = 6.0
+
+    def __init__(self, rng: random.Random):
+        super().__init__(rng)
+        self._latched = None
+        self._since = 0.0
+
+    def burn(self, state: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        latched = state.get("latched_planet_id")
+        if latched != self._latched:
+            self._latched, self._since = latched, state["t"]
+        if latched is None or state["t"] - self._since < self.DWELL_S:
+            return None
+
+        rocket, dest = state["rocket"], state["dest"]
+        ux, uy = unit(dest.x - rocket.x, dest.y - rocket.y)
+        dvx, dvy = ux * self.SPEED - rocket.vx, uy * self.SPEED - rocket.vy
+        m = norm(dvx, dvy)
+        if m > DV_MAX:
+            dvx, dvy = dvx / m * DV_MAX, dvy / m * DV_MAX
+        return dvx, dvy
+
+class RandomPolicy(AimPolicy):
+    """Like aim, but with a noisy heading and speed and random event choices."""
+
+    name = "random"
+
+    def burn(self, state: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        dv = super().burn(state)
+        if dv is None:
+            return None
+        ang = self.rng.gauss(0.0, 0.6)
+        scale = self.rng.uniform(0.5, 1.5)
+        c, s = math.cos(ang), math.sin(ang)
+        return (dv[0] * c - dv[1] * s) * scale, (dv[0] * s + dv[1] * c) * scale
+
+    def choose(self, state: Dict[str, Any], event: Dict[str, Any]) -> str:
+        return self.rng.choice(event["choices"])["id"]
+
+POLICIES: Dict[str, Type[Policy]] = {p.name: p for p in (CoastPolicy, AimPolicy, RandomPolicy)}
+
+# -------------------------
+# Single run
+# -------------------------
+
+def run_one(
+    seed: int,
+    policy: Union[str, Type[Policy]] = "aim",
+    dt: float = BATCH_DT,
+    max_time: float = 600.0,
+    decide_every: float = 0.25,
+    curve_every: float = 5.0,
+    integrator: str = INTEGRATOR,
+    gravity_field: bool = GRAVITY_FIELD,
+) -> Dict[str, Any]:
+    """Play one seed to the end (or `max_time`) and return its outcome and resource curve."""
+    policy_cls = POLICIES[policy] if isinstance(policy, str) else policy
+
+    # Every random draw of this run comes from RNGs derived from its seed,
+    # so results don't depend on which worker ran it or in what order.
+    state = new_state()
+    state["rng"] = random.Random(seed)
+    state["integrator"] = integrator
+    state["gravity_field"] = gravity_field
+    reset_world(state, seed=seed)
+    player = policy_cls(random.Random(seed ^ 0x5EED))
+
+    burns = events = visits = 0
+    last_latched = None
+    next_decision = 0.0
+    next_sample = 0.0
+    curve: List[Tuple[float, ...]] = []
+
+    while state["status"] == "running" and state["t"] < max_time:
+        if state["t"] >= next_sample:
+            curve.append((state["t"],) + tuple(float(state[k]) for k in RESOURCES))
+            next_sample += curve_every
+
+        ev = state.get("pending_event")
+        if ev is not None:
+            choice = player.choose(state, ev)
+            if choice not in {c["id"] for c in ev["choices"]}:
+                choice = ev["choices"][0]["id"]
+            resolve_event(state, choice)
+            events += 1
+            continue
+
+        if state["t"] >= next_decision:
+            dv = player.burn(state)
+            if dv is not None and can_plan(state):
+                apply_plan(state, dv[0], dv[1])
+                burns += 1
+            next_decision = state["t"] + decide_every
+
+        step_sim(state, dt, camera=False)
+
+        latched = state.get("latched_planet_id")
+        if latched is not None and latched != last_latched:
+            visits += 1
+        last_latched = latched
+
+    status = state["status"] if state["status"] != "running" else "timeout"
+    curve.append((state["t"],) + tuple(float(state[k]) for k in RESOURCES))
+
+    result = {
+        "seed": seed,
+        "policy": policy_cls.name,
+        "integrator": integrator,
+        "status": status,
+        "fail_reason": state.get("fail_reason"),
+        "t_end": state["t"],
+        "time_to_earth": state["t"] if status == "success" else None,
+        "planets_visited": visits,
+        "burns": burns,
+        "events": events,
+    }
+    result.update({k: float(state[k]) for k in RESOURCES})
+    result["curve"] = curve
+    return result
+
+# -------------------------
+# Batches
+# -------------------------
+
+def run_batch(
+    seeds: Iterable[int],
+    policy: Union[str, Type[Policy]] = "aim",
+    workers: Optional[int] = None,
+    **run_kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run `run_one` for every seed, spread over a process pool. workers=1 runs
+    inline. Custom policy classes must be importable (top-level) to pickle.
+    """
+    seeds = list(seeds)
+    job = partial(run_one, policy=policy, **run_kwargs)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(seeds) < 2:
+        return [job(s) for s in seeds]
+
+    chunksize = max(1, len(seeds) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, seeds, chunksize=chunksize))
+
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    arr = np.asarray(values, dtype=float)
+    return {
+        "mean": float(arr.mean()),
+        "p10": float(np.percentile(arr, 10)),
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+    }
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate statistics over a batch: outcome rates, fail reasons, times, resources."""
+    n = len(results)
+    statuses = Counter(r["status"] for r in results)
+    reasons = Counter(r["fail_reason"] for r in results if r["status"] == "failed")
+    # "crashed_into_<id>" is one reason per planet; also report them together
+    categories = Counter(
+        "crashed" if r["fail_reason"].startswith("crashed_into_") else r["fail_reason"]
+        for r in results if r["status"] == "failed" and r["fail_reason"]
+    )
+
+    # Mean resource curve: average over runs still going at each sample time
+    buckets: Dict[float, List[Tuple[float, ...]]] = {}
+    for r in results:
+        for row in r["curve"][:-1]:
+            buckets.setdefault(round(row[0], 6), []).append(row[1:])
+    mean_curve = [
+        {"t": t, "runs": len(rows), **{k: float(v) for k, v in zip(RESOURCES, np.mean(rows, axis=0))}}
+        for t, rows in sorted(buckets.items())
+    ]
+
+    return {
+        "runs": n,
+        "success_rate": statuses.get("success", 0) / n if n else 0.0,
+        "status": dict(statuses),
+        "fail_reasons": dict(reasons.most_common()),
+        "fail_categories": dict(categories.most_common()),
+        "time_to_earth": _percentiles([r["time_to_earth"] for r in results if r["time_to_earth"] is not None]),
+        "t_end": _percentiles([r["t_end"] for r in results]),
+        "planets_visited": _percentiles([r["planets_visited"] for r in results]),
+        "final_resources": {k: _percentiles([r[k] for r in results]) for k in RESOURCES},
+        "mean_curve": mean_curve,
+    }
+
+def write_results(prefix: str, results: List[Dict[str, Any]], summary: Dict[str, Any]) -> List[str]:
+    """Write <prefix>_runs.csv, <prefix>_curves.csv and <prefix>_summary.json."""
+    folder = os.path.dirname(prefix)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    runs_path = f"{prefix}_runs.csv"
+    fields = [k for k in results[0] if k != "curve"] if results else []
+    with open(runs_path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(results)
+
+    curves_path = f"{prefix}_curves.csv"
+    with open(curves_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(("seed", "t") + RESOURCES)
+        for r in results:
+            for row in r["curve"]:
+                w.writerow((r["seed"],) + row)
+
+    summary_path = f"{prefix}_summary.json"
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    return [runs_path, curves_path, summary_path]
+
+def parse_seeds(spec: str) -> List[int]:
+    """'1-1000', '5,9,42' or a mix like '1-10,99'."""
+    seeds: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            seeds.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            seeds.append(int(part))
+    return seeds
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Headless Monte Carlo runs across seeds.")
+    ap.add_argument("--seeds", default="1-200", help="e.g. 1-1000 or 3,7,42")
+    ap.add_argument("--policy", default="aim", choices=sorted(POLICIES))
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--dt", type=float, default=BATCH_DT)
+    ap.add_argument("--integrator", default=INTEGRATOR, choices=INTEGRATORS)
+    ap.add_argument("--field", action="store_true", help="sample gravity from a precomputed grid (sim.field)")
+    ap.add_argument("--max-time", type=float, default=600.0, help="sim seconds before a run counts as timeout")
+    ap.add_argument("--curve-every", type=float, default=5.0, help="resource sample interval (sim seconds)")
+    ap.add_argument("--out", default="batch", help="output path prefix")
+    args = ap.parse_args(argv)
+
+    results = run_batch(
+        parse_seeds(args.seeds), policy=args.policy, workers=args.workers,
+        dt=args.dt, max_time=args.max_time, curve_every=args.curve_every,
+        integrator=args.integrator, gravity_field=args.field,
+    )
+    summary = summarize(results)
+    for path in write_results(args.out, results, summary):
+        print(path)
+    print(json.dumps({k: summary[k] for k in ("runs", "success_rate", "status", "fail_categories")}, indent=2))
+
+if __name__ == "__main__":
+    main()
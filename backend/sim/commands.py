@@ -0,0 +1,161 @@
+import math
+from typing import Any, Dict, Optional, Tuple
+
+from sim.world import reset_world
+from sim.warp import warp, warp_args
+
+def can_plan(state: Dict[str, Any]) -> bool:
+    """Whether a burn would be accepted right now."""
+    if state["status"] != "running":
+        return False
+
+    # Launching from orbit is always allowed
+    if state.get("latched_planet_id") is not None:
+        return True
+
+    # --- UPDATED PROPULSION LOGIC ---
+    total_left = state.get("space_burns_left", 0)
+    burst_count = state.get("consecutive_burns", 0)
+
+    # Check total pool (10) and burst limit (3)
+    return total_left > 0 and burst_count < 3
+
+def finite_arg(data: Dict[str, Any], key: str, default: float) -> float:
+    """data[key] as a float. Raises ValueError unless it is a finite number."""
+    try:
+        value = float(data.get(key, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number") from None
+    if not math.isfinite(value):
+        raise ValueError(f"{key} must be finite")
+    return value
+
+def plan_args(data: Dict[str, Any]) -> Tuple[float, float]:
+    """(dvx, dvy) of a plan request. Raises ValueError unless both are finite numbers."""
+    return finite_arg(data, "dvx", 0.0), finite_arg(data, "dvy", 0.0)
+
+def apply_plan(state: Dict[str, Any], dvx: float, dvy: float) -> None:
+    if not can_plan(state):
+        return
+
+    log = state.get("input_log")
+    if log is not None:
+        log.plan(dvx, dvy)
+
+    t = float(state["t"])
+    rocket = state["rocket"]
+    is_latched = state.get("latched_planet_id") is not None
+
+    # Apply Velocity
+    rocket.vx += dvx
+    rocket.vy += dvy
+
+    # Handle State Transitions
+    if is_latched:
+        state["latched_planet_id"] = None
+        state["consecutive_burns"] = 0   # Reset when taking off from a planet
+        state["can_space_burn"] = True
+    else:
+        # Increment the burst count
+        state["space_burns_left"] -= 1
+        state["consecutive_burns"] += 1
+        
+        # implement fuel deduction after each emergency propulsion
+        # Subtract 10% of total fuel per emergency thrust
+        state["fuel"] = max(0, state.get("fuel", 100.0) - 10.0)
+
+        # If 3 burns are hit, lock the engines
+        if state["consecutive_burns"] >= 3:
+            state["can_space_burn"] = False
+            
+    state["last_plan_time"] = t
+
+def resolve_event(state: Dict[str, Any], choice: Optional[str]) -> None:
+    if state["status"] != "running":
+        return
+
+    ev = state.get("pending_event")
+    if not ev:
+        return
+
+    ev_type = ev.get("type")
+
+    valid = {
+        "planet_latch_repair": {"repair", "skip"},
+        "planet_water_recycler": {"fix", "ignore"},
+        "planet_crew_rest": {"rest", "push"},
+    }.get(ev_type, set())
+
+    if choice not in valid:
+        return
+
+    log = state.get("input_log")
+    if log is not None:
+        log.choice(choice)
+
+    # --- Apply consequences for this event type ---
+    if ev_type == "planet_latch_repair":
+        if choice == "repair":
+            # Food goes down 10% (current value)
+            state["food"] = max(0.0, state.get("food", 100.0) * 0.90)
+
+            # Morale boost for taking care of ship
+            state["morale"] = min(100.0, state.get("morale", 100.0) + 6.0)
+
+        elif choice == "skip":
+            # Ship health decreases randomly
+            dmg = state["rng"].uniform(5.0, 20.0)
+            state["ship_health"] = max(0.0, state.get("ship_health", 100.0) - dmg)
+
+            # Morale penalty for ignoring repairs
+            state["morale"] = max(0.0, state.get("morale", 100.0) - 8.0)
+
+        # If ship health < 50, oxygen decreases by 25% at every planet decision
+        if state.get("ship_health", 100.0) < 50.0:
+            state["oxygen"] = max(0.0, state.get("oxygen", 100.0) * 0.75)
+
+    elif ev_type == "planet_crew_rest":
+        if choice == "rest":
+            state["morale"] = min(100.0, state.get("morale", 100.0) + 25.0)
+            state["food"] = max(0.0, state.get("food", 100.0) - 10.0)
+        elif choice == "push":
+            state["morale"] = max(0.0, state.get("morale", 100.0) - 15.0)
+
+
+    elif ev_type == "planet_water_recycler":
+        if choice == "fix":
+            # Food cost
+            state["food"] = max(0.0, state.get("food", 100.0) * 0.90)
+
+            # Morale boost for fixing systems
+            state["morale"] = min(100.0, state.get("morale", 100.0) + 6.0)
+
+        elif choice == "ignore":
+            # Water drops immediately
+            state["water"] = max(0.0, state.get("water", 100.0) - 20.0)
+
+            # Morale penalty for taking the risk
+            state["morale"] = max(0.0, state.get("morale", 100.0) - 4.0)
+
+    # Clear event so sim resumes
+    state["pending_event"] = None
+
+def apply_command(state: Dict[str, Any], cmd: Dict[str, Any]) -> bool:
+    """
+    Apply one command from the streaming channel. Mirrors the HTTP routes:
+    {"cmd": "plan", "dvx", "dvy"}, {"cmd": "resolve", "choice"},
+    {"cmd": "warp", "dt", "horizon"}, {"cmd": "reset", "seed"}. Returns False
+    for unknown commands; raises ValueError for bad arguments.
+    """
+    kind = cmd.get("cmd")
+    if kind == "plan":
+        apply_plan(state, *plan_args(cmd))
+    elif kind == "warp":
+        warp(state, *warp_args(cmd))
+    elif kind == "resolve":
+        resolve_event(state, cmd.get("choice"))
+    elif kind == "reset":
+        reset_world(state, seed=cmd.get("seed"))
+    else:
+        return False
+    return True
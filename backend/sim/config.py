@@ -1,6 +1,31 @@
 G = 1.0
 SOFTENING_R2 = 25.0
-DT_MIN, DT_MAX = 0.001, 0.05
+# Collisions are swept along each step's path (physics.stop_at_first_contact),
+# so long steps can't tunnel through planets, capture zones or the destination
+# (the latched orbit only against the destination: physics.stop_at_destination).
+DT_MIN, DT_MAX = 0.001, 0.25
+# Default step of headless runs (sim.batch, bench); DT_MAX before it was raised
+BATCH_DT = 0.05
+# Orbit motion blends once per move, so latched steps longer than this are
+# split into equal moves; up to it orbits are exactly as they always were
+ORBIT_MAX_DT = BATCH_DT
+# Flight integrator: "euler" (original), "verlet", "rk4" or "adaptive"
+INTEGRATOR = "euler"
+ADAPTIVE_ETA = 0.02          # adaptive substep = ETA * shortest orbital time scale
+ADAPTIVE_MAX_SUBSTEPS = 64
+STEP_BATCH_MAX = 600  # most substeps one /api/step call may run
+STREAM_TICK_HZ = 30.0       # frames per second pushed on /api/stream
+STREAM_SUBSTEP_DT = 0.016   # upper bound on the substep used per stream tick
+STREAM_MAX_LAG_TICKS = 5    # beyond this many missed ticks the stream skips ahead
+# Server-driven ticking (sim.scheduler): off at 0. When on, the server steps
+# every active session by SERVER_TICK_DT and /api/step only reads state.
+SERVER_TICK_HZ = 0.0
+SERVER_TICK_DT = 1.0 / 60.0
+SERVER_TICK_MAX_CATCHUP = 30   # most fixed steps one wake-up may run
+SERVER_TICK_ACTIVE_S = 30.0    # sessions unseen for longer are not stepped
+SERVER_TICK_VECTORIZED = True  # step free-flying sessions together (sim.vector)
+SERVER_TICK_CHUNK = 256        # sessions locked and stepped together per vectorized pass
+STACK_CACHE_SIZE = 64          # stacked planet arrays kept by sim.vector (a few per chunk)
 MAX_WORLD_ABS = 4000.0
 REVEAL_MARGIN = 100.0
 DV_MAX = 60.0
@@ -15,6 +40,66 @@ BAD_MASS_RANGE = (1600.0, 4200.0)
 PLANET_RADIUS_RANGE = (14.0, 26.0)
 DEATH_RADIUS_FACTOR = 0.65
 CRASH_RADIUS_FACTOR = 1.0
+SPATIAL_CELL_SIZE = 128.0  # grid cell for capture/crash lookups
+
+# Generated worlds are cached by seed; set WORLD_CACHE_DIR to also keep them on disk
+WORLD_CACHE_SIZE = 256
+WORLD_CACHE_DIR = None
+
+# Precomputed gravity field (sim.field), off by default
+GRAVITY_FIELD = False
+FIELD_CELL = 20.0             # grid spacing of the sampled field
+FIELD_EXACT_RADIUS = 200.0    # planets this close are summed exactly
+FIELD_CACHE_SIZE = 8          # worlds whose field is kept in memory
+
+# The HUD success probability is recomputed once the rocket has moved or its
+# velocity changed by more than these (per axis), or on a reveal
+HUD_POS_TOLERANCE = 2.0
+HUD_VEL_TOLERANCE = 0.02
+
+# Burn previews (/api/predict)
+PREDICT_DT = 0.05
+PREDICT_HORIZON_S = 20.0
+PREDICT_HORIZON_MAX = 60.0
+PREDICT_PATH_POINTS = 200     # path is thinned to about this many points
+PREDICT_CACHE_SIZE = 64       # memoized previews kept per session
+PREDICT_DV_QUANTUM = 0.1
+PREDICT_POS_QUANTUM = 0.5
+PREDICT_VEL_QUANTUM = 0.01
+
+# Time warp (sim.warp, /api/warp): session steps without collision queries
+# while nothing discrete is within WARP_MARGIN of the path, else step_sim
+WARP_MIN_STEPS = 4            # ordinary steps taken before trying to coast again
+WARP_MARGIN = 5.0             # world units kept clear of any capture/crash radius or edge
+WARP_HORIZON_S = 120.0        # default and largest sim time one warp may cover
+WARP_HORIZON_MAX = 600.0
+
+# Session store: idle sessions are evicted after this many seconds, and the
+# least recently used sessions are dropped once the store is full.
+SESSION_IDLE_TTL_S = 15 * 60.0
+SESSION_MAX = 5000
+
+# Every session records its inputs (sim.inputlog) for replay; once a log has
+# grown this far past its reset/snapshot entry it restarts from a snapshot of
+# the current state. INPUT_LOG_MEMORY is shared out over SESSION_MAX, so a
+# full store stays within it (about 16 KB or several hundred burns a log).
+RECORD_INPUTS = True
+INPUT_LOG_MEMORY = 80 * 1024 * 1024
+INPUT_LOG_MAX_BYTES = INPUT_LOG_MEMORY // SESSION_MAX
+
+# Every session keeps its recent flight path (sim.trajectory), served
+# decimated at /api/trajectory. 0 capacity turns it off.
+TRAJECTORY_CAPACITY = 4096    # samples held; 4096 x 0.05 s is about 200 s of flight
+TRAJECTORY_SAMPLE_DT = 0.05   # sim seconds between samples
+TRAJECTORY_POINTS = 500       # default point budget of a query
+TRAJECTORY_POINTS_MAX = 4096
+
+# Per-phase step timings, payload timings and request counters (sim.metrics),
+# served at /api/metrics. Off, instrumented code only pays a flag check.
+METRICS_ENABLED = True
+
+# asgi.py runs sim work (steps, predictions, payloads) on this many threads
+ASGI_EXECUTOR_THREADS = 8
 
 def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
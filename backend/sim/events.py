@@ -25,6 +25,6 @@ EVENTS = {
     }
 }
 
-def get_random_event():
-    event_id = random.choice(list(EVENTS.keys()))
+def get_random_event(rng: random.Random):
+    event_id = rng.choice(list(EVENTS.keys()))
     return {"id": event_id, **EVENTS[event_id]}
@@ -0,0 +1,111 @@
+import hashlib
+import math
+from typing import Tuple
+
+import numpy as np
+
+from sim.lru import LRUCache
+from sim.spatial import UniformGrid
+from sim.config import G, SOFTENING_R2, MAX_WORLD_ABS, FIELD_CELL, FIELD_EXACT_RADIUS, FIELD_CACHE_SIZE
+
+def _accel_grid(px, py, pm, gx, gy) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact softened acceleration of planets (px, py, pm) at points (gx, gy)."""
+    ax = np.zeros(np.broadcast(gx, gy).shape)
+    ay = np.zeros_like(ax)
+    for x, y, m in zip(px, py, pm):
+        dx = x - gx
+        dy = y - gy
+        r2 = np.maximum(dx * dx + dy * dy, SOFTENING_R2)
+        f = G * m / (r2 * np.sqrt(r2))
+        ax += f * dx
+        ay += f * dy
+    return ax, ay
+
+class GravityField:
+    """
+    Precomputed acceleration grid over the playable area for one static world.
+
+    Far from planets the field is smooth, so it is sampled with bilinear
+    interpolation. Within FIELD_EXACT_RADIUS of a planet, that planet's
+    interpolated share is swapped for its exact pull, so the steep part of the
+    field stays exact while the cost depends only on the planets nearby, not
+    on how many planets the world has. Outside the grid it sums exactly.
+    """
+
+    __slots__ = ("x0", "y0", "cell", "nx", "ny", "ax", "ay", "px", "py", "pm", "bodies", "near")
+
+    def __init__(self, px: np.ndarray, py: np.ndarray, pm: np.ndarray,
+                 half_extent: float = MAX_WORLD_ABS, cell: float = FIELD_CELL,
+                 exact_radius: float = FIELD_EXACT_RADIUS):
+        self.px, self.py, self.pm = px, py, pm
+        self.cell = float(cell)
+        self.x0 = self.y0 = -float(half_extent)
+        self.nx = self.ny = int(math.ceil(2.0 * half_extent / cell)) + 1
+
+        xs = self.x0 + self.cell * np.arange(self.nx)
+        ys = self.y0 + self.cell * np.arange(self.ny)
+        self.ax, self.ay = _accel_grid(px, py, pm, xs[None, :], ys[:, None])
+        self.bodies = [(float(bx), float(by), G * float(bm)) for bx, by, bm in zip(px, py, pm)]
+        self.near = UniformGrid(px, py, np.full(len(px), float(exact_radius)), exact_radius)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ax.nbytes + self.ay.nbytes
+
+    def accel_at(self, x: float, y: float) -> Tuple[float, float]:
+        fx = (x - self.x0) / self.cell
+        fy = (y - self.y0) / self.cell
+        i = math.floor(fx)
+        j = math.floor(fy)
+        if i < 0 or j < 0 or i >= self.nx - 1 or j >= self.ny - 1:
+            return self.exact(x, y)
+
+        # Per-sample work is a handful of scalars, where plain floats beat
+        # NumPy's per-call overhead
+        tx, ty = fx - i, fy - j
+        w00, w10 = (1 - tx) * (1 - ty), tx * (1 - ty)
+        w01, w11 = (1 - tx) * ty, tx * ty
+        ax, ay = self.ax.item, self.ay.item
+        gx = w00 * ax(j, i) + w10 * ax(j, i + 1) + w01 * ax(j + 1, i) + w11 * ax(j + 1, i + 1)
+        gy = w00 * ay(j, i) + w10 * ay(j, i + 1) + w01 * ay(j + 1, i) + w11 * ay(j + 1, i + 1)
+
+        near = self.near.query(x, y)
+        if near.size:
+            # Swap the nearby planets' interpolated pull (at the cell corners)
+            # for their exact pull at (x, y)
+            x0 = self.x0 + self.cell * i
+            y0 = self.y0 + self.cell * j
+            x1, y1 = x0 + self.cell, y0 + self.cell
+            points = ((x0, y0, -w00), (x1, y0, -w10), (x0, y1, -w01), (x1, y1, -w11), (x, y, 1.0))
+            for k in near.tolist():
+                px, py, gm = self.bodies[k]
+                for qx, qy, w in points:
+                    dx = px - qx
+                    dy = py - qy
+                    r2 = max(dx * dx + dy * dy, SOFTENING_R2)
+                    f = w * gm / (r2 * math.sqrt(r2))
+                    gx += f * dx
+                    gy += f * dy
+        return gx, gy
+
+    def exact(self, x: float, y: float) -> Tuple[float, float]:
+        ax, ay = _accel_grid(self.px, self.py, self.pm, np.float64(x), np.float64(y))
+        return float(ax), float(ay)
+
+# Fields are immutable and depend only on planet geometry, so sessions playing
+# the same world share one.
+FIELD_CACHE = LRUCache(FIELD_CACHE_SIZE)
+
+def field_key(px: np.ndarray, py: np.ndarray, pm: np.ndarray) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for arr in (px, py, pm):
+        h.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    return h.digest()
+
+def field_for(px: np.ndarray, py: np.ndarray, pm: np.ndarray) -> GravityField:
+    key = field_key(px, py, pm)
+    field = FIELD_CACHE.get(key)
+    if field is None:
+        field = GravityField(px, py, pm)
+        FIELD_CACHE.put(key, field)
+    return field
@@ -1,24 +1,26 @@
 import math
 from typing import Any, Dict, List
 
-from sim.state import STATE
+import numpy as np
+
 from sim.mathutil import norm, unit, dist
-from sim.config import clamp
-from sim.models import Rocket, Destination, Planet
+from sim.config import clamp, HUD_POS_TOLERANCE, HUD_VEL_TOLERANCE
+from sim.models import Rocket, Destination
+from sim.planets import PlanetArrays
 
-def compute_success_probability() -> float:
+def compute_success_probability(state: Dict[str, Any]) -> float:
     """
     Heuristic "probability of success" that reacts to alignment, distance,
     and revealed bad-planet risk. Returns [0,1].
     """
-    status = STATE["status"]
+    status = state["status"]
     if status == "failed":
         return 0.0
     if status == "success":
         return 1.0
-    rocket: Rocket = STATE["rocket"]
-    dest: Destination = STATE["dest"]
-    planets: List[Planet] = STATE["planets"]
+    rocket: Rocket = state["rocket"]
+    dest: Destination = state["dest"]
+    planets: PlanetArrays = state["planets"]
 
     # Distance & alignment
     to_dx, to_dy = (dest.x - rocket.x), (dest.y - rocket.y)
@@ -29,12 +31,13 @@ def compute_success_probability() -> float:
     wx, wy = unit(rocket.vx, rocket.vy)
     alignment = ux * wx + uy * wy  # [-1,1]
 
-    # Risk from revealed bad planets (closer + heavier => worse)
+    # Risk from revealed bad planets (closer + heavier => worse). The set is
+    # kept incrementally on reveal / kind change, so this does not scan the world.
     risk = 0.0
-    for p in planets:
-        if p.revealed and p.kind == "bad":
-            r = max(30.0, dist((rocket.x, rocket.y), (p.x, p.y)))
-            risk += (p.mass / (r * r)) * (1.25 if not p.recoverable else 1.0)
+    bad, bx, by, weighted_mass = planets.revealed_bad
+    if bad.size:
+        r = np.maximum(30.0, np.hypot(bx - rocket.x, by - rocket.y))
+        risk = float(np.sum(weighted_mass / (r * r)))
     risk = min(risk, 2.5)
 
     # Normalize distance
@@ -46,9 +49,30 @@ def compute_success_probability() -> float:
     p = 1.0 / (1.0 + math.exp(-score))
     return float(clamp(p, 0.0, 1.0))
 
-def hud() -> Dict[str, Any]:
-    rocket: Rocket = STATE["rocket"]
-    dest: Destination = STATE["dest"]
+def success_probability(state: Dict[str, Any]) -> float:
+    """
+    compute_success_probability, reused until one of its inputs changes: the
+    world, the revealed-bad set, the status, or the rocket moving / turning by
+    more than the HUD tolerances. Cached on the state under "hud_cache".
+    """
+    rocket: Rocket = state["rocket"]
+    planets: PlanetArrays = state["planets"]
+    key = (state["world_version"], planets.bad_version, state["status"])
+
+    cached = state.get("hud_cache")
+    if cached is not None and cached[0] == key:
+        _, x, y, vx, vy, p = cached
+        if (abs(rocket.x - x) <= HUD_POS_TOLERANCE and abs(rocket.y - y) <= HUD_POS_TOLERANCE
+                and abs(rocket.vx - vx) <= HUD_VEL_TOLERANCE and abs(rocket.vy - vy) <= HUD_VEL_TOLERANCE):
+            return p
+
+    p = compute_success_probability(state)
+    state["hud_cache"] = (key, rocket.x, rocket.y, rocket.vx, rocket.vy, p)
+    return p
+
+def hud(state: Dict[str, Any]) -> Dict[str, Any]:
+    rocket: Rocket = state["rocket"]
+    dest: Destination = state["dest"]
 
     d = dist((rocket.x, rocket.y), (dest.x, dest.y))
     v = norm(rocket.vx, rocket.vy)
@@ -56,7 +80,7 @@ def hud() -> Dict[str, Any]:
     return {
         "distance_to_destination": d,
         "speed": v,
-        "success_probability": compute_success_probability(),
-        "status": STATE["status"],
-        "fail_reason": STATE["fail_reason"],
+        "success_probability": success_probability(state),
+        "status": state["status"],
+        "fail_reason": state["fail_reason"],
     }
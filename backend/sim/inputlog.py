@@ -0,0 +1,153 @@
+"""
+Compact record of every input that changed a game.
+
+A log starts at a reset (seed and session settings) or at a snapshot, and
+then holds steps, burns and event choices in order. Runs of steps with the
+same dt collapse into one entry. Entries, packed little-endian after a
+b"DXIL" + version header:
+
+    R  reset     i8 seed, u8 gravity_field, u8 len + integrator name
+    N  snapshot  u32 len + sim.snapshot blob
+    S  steps     f8 dt, u32 count
+    W  warp      f8 dt, f8 horizon (sim.warp)
+    P  plan      f8 dvx, f8 dvy
+    C  choice    u8 len + choice id
+    H  hash      16-byte state hash (only in exported logs, always last)
+
+sim.replay re-executes a log and checks the hash.
+"""
+import struct
+from typing import Any, Iterator, Optional, Tuple
+
+from sim.config import INPUT_LOG_MAX_BYTES
+
+MAGIC = b"DXIL"
+FORMAT_VERSION = 1
+HASH_SIZE = 16
+
+_HEADER = MAGIC + bytes([FORMAT_VERSION])
+_RESET = struct.Struct("<qB")
+_STEPS = struct.Struct("<dI")
+_PLAN = struct.Struct("<dd")
+_WARP = struct.Struct("<dd")
+_U32 = struct.Struct("<I")
+
+Entry = Tuple[Any, ...]
+
+class InputLog:
+    """Append-only input log for one run. See the module docstring for the format."""
+
+    __slots__ = ("_buf", "_last_dt", "_steps_at", "_start_size")
+
+    def __init__(self):
+        self._buf = bytearray(_HEADER)
+        self._last_dt: Optional[float] = None
+        self._steps_at = -1  # offset of the open step run's count field
+        self._start_size = len(_HEADER)  # bytes up to and including the reset/snapshot entry
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    @property
+    def full(self) -> bool:
+        # Counted past the start entry, so a snapshot larger than the budget
+        # doesn't make every step restart the log
+        return len(self._buf) - self._start_size > INPUT_LOG_MAX_BYTES
+
+    def _restart(self) -> None:
+        del self._buf[len(_HEADER):]
+        self._last_dt = None
+        self._steps_at = -1
+
+    def _short(self, text: str) -> bytes:
+        raw = text.encode()
+        if len(raw) > 255:
+            raise ValueError("input log strings are limited to 255 bytes")
+        return bytes([len(raw)]) + raw
+
+    def start_reset(self, seed: int, integrator: str, gravity_field: bool) -> None:
+        self._restart()
+        self._buf += b"R" + _RESET.pack(seed, bool(gravity_field)) + self._short(integrator)
+        self._start_size = len(self._buf)
+
+    def start_snapshot(self, blob: bytes) -> None:
+        self._restart()
+        self._buf += b"N" + _U32.pack(len(blob)) + blob
+        self._start_size = len(self._buf)
+
+    def step(self, dt: float, count: int = 1) -> None:
+        """Record `count` steps of `dt` (sim.vector logs a whole batch at once)."""
+        if dt == self._last_dt:
+            (logged,) = _U32.unpack_from(self._buf, self._steps_at)
+            if logged + count <= 0xFFFFFFFF:
+                _U32.pack_into(self._buf, self._steps_at, logged + count)
+                return
+        self._buf += b"S" + _STEPS.pack(dt, count)
+        self._last_dt = dt
+        self._steps_at = len(self._buf) - _U32.size
+
+    def plan(self, dvx: float, dvy: float) -> None:
+        self._buf += b"P" + _PLAN.pack(dvx, dvy)
+        self._last_dt = None
+
+    def warp(self, dt: float, horizon: float) -> None:
+        self._buf += b"W" + _WARP.pack(dt, horizon)
+        self._last_dt = None
+
+    def choice(self, choice: str) -> None:
+        self._buf += b"C" + self._short(choice)
+        self._last_dt = None
+
+    def to_bytes(self, state_hash: Optional[bytes] = None) -> bytes:
+        """The log, optionally sealed with the hash of the state it leads to."""
+        if state_hash is None:
+            return bytes(self._buf)
+        return bytes(self._buf) + b"H" + state_hash
+
+def entries(data: bytes) -> Iterator[Entry]:
+    """
+    Decode a log into ("reset", seed, integrator, gravity_field),
+    ("snapshot", blob), ("steps", dt, count), ("plan", dvx, dvy),
+    ("warp", dt, horizon), ("choice", id) and ("hash", digest) tuples. Raises ValueError if malformed.
+    """
+    if data[:len(_HEADER)] != _HEADER:
+        raise ValueError("not an input log (or an unsupported version)")
+    off = len(_HEADER)
+    try:
+        while off < len(data):
+            op = data[off:off + 1]
+            off += 1
+            if op == b"S":
+                dt, count = _STEPS.unpack_from(data, off)
+                off += _STEPS.size
+                yield ("steps", dt, count)
+            elif op == b"P":
+                dvx, dvy = _PLAN.unpack_from(data, off)
+                off += _PLAN.size
+                yield ("plan", dvx, dvy)
+            elif op == b"W":
+                dt, horizon = _WARP.unpack_from(data, off)
+                off += _WARP.size
+                yield ("warp", dt, horizon)
+            elif op == b"C":
+                n = data[off]
+                yield ("choice", data[off + 1:off + 1 + n].decode())
+                off += 1 + n
+            elif op == b"R":
+                seed, field = _RESET.unpack_from(data, off)
+                off += _RESET.size
+                n = data[off]
+                yield ("reset", seed, data[off + 1:off + 1 + n].decode(), bool(field))
+                off += 1 + n
+            elif op == b"N":
+                (n,) = _U32.unpack_from(data, off)
+                off += _U32.size
+                yield ("snapshot", bytes(data[off:off + n]))
+                off += n
+            elif op == b"H":
+                yield ("hash", bytes(data[off:off + HASH_SIZE]))
+                off += HASH_SIZE
+            else:
+                raise ValueError(f"unknown input log entry {op!r} at byte {off - 1}")
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise ValueError(f"truncated input log: {exc}")
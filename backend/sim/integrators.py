@@ -0,0 +1,113 @@
+"""
+Flight-phase integrators.
+
+All of them advance a free-flying rocket by `dt` under planet gravity and
+report how many force evaluations they used:
+
+  euler     semi-implicit (symplectic) Euler, the original scheme. 1 eval.
+  verlet    velocity Verlet / kick-drift-kick leapfrog. 1 eval per step,
+            because the end-of-step acceleration is reused next step.
+  rk4       classic Runge-Kutta 4. 4 evals.
+  adaptive  velocity Verlet, split into substeps short enough to resolve
+            the nearest strong pull (a fraction of its orbital time scale).
+"""
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from sim.models import Rocket
+from sim.planets import PlanetArrays
+from sim.config import G, SOFTENING_R2, INTEGRATOR, ADAPTIVE_ETA, ADAPTIVE_MAX_SUBSTEPS
+
+INTEGRATORS = ("euler", "verlet", "rk4", "adaptive")
+
+Accel = Tuple[float, float]
+# x, y, vx, vy, acceleration at the new position (if known), force evaluations
+Advance = Tuple[float, float, float, float, Optional[Accel], int]
+
+def euler(planets: PlanetArrays, x, y, vx, vy, dt, a0: Optional[Accel] = None) -> Advance:
+    ax, ay = a0 if a0 is not None else planets.accel_at(x, y)
+    vx += ax * dt
+    vy += ay * dt
+    return x + vx * dt, y + vy * dt, vx, vy, None, int(a0 is None)
+
+def verlet(planets: PlanetArrays, x, y, vx, vy, dt, a0: Optional[Accel] = None) -> Advance:
+    evals = 0
+    if a0 is None:
+        a0 = planets.accel_at(x, y)
+        evals += 1
+    half = 0.5 * dt
+    vx += a0[0] * half
+    vy += a0[1] * half
+    x += vx * dt
+    y += vy * dt
+    a1 = planets.accel_at(x, y)
+    vx += a1[0] * half
+    vy += a1[1] * half
+    return x, y, vx, vy, a1, evals + 1
+
+def rk4(planets: PlanetArrays, x, y, vx, vy, dt, a0: Optional[Accel] = None) -> Advance:
+    evals = 0
+    if a0 is None:
+        a0 = planets.accel_at(x, y)
+        evals += 1
+    h = 0.5 * dt
+    k1x, k1y, k1vx, k1vy = vx, vy, a0[0], a0[1]
+    a2 = planets.accel_at(x + k1x * h, y + k1y * h)
+    k2x, k2y, k2vx, k2vy = vx + k1vx * h, vy + k1vy * h, a2[0], a2[1]
+    a3 = planets.accel_at(x + k2x * h, y + k2y * h)
+    k3x, k3y, k3vx, k3vy = vx + k2vx * h, vy + k2vy * h, a3[0], a3[1]
+    a4 = planets.accel_at(x + k3x * dt, y + k3y * dt)
+    k4x, k4y, k4vx, k4vy = vx + k3vx * dt, vy + k3vy * dt, a4[0], a4[1]
+
+    s = dt / 6.0
+    x += s * (k1x + 2 * k2x + 2 * k3x + k4x)
+    y += s * (k1y + 2 * k2y + 2 * k3y + k4y)
+    vx += s * (k1vx + 2 * k2vx + 2 * k3vx + k4vx)
+    vy += s * (k1vy + 2 * k2vy + 2 * k3vy + k4vy)
+    return x, y, vx, vy, None, evals + 3
+
+def substeps_for(planets: PlanetArrays, x: float, y: float, dt: float) -> int:
+    """How many pieces `dt` must be cut into near the strongest nearby body."""
+    if not len(planets):
+        return 1
+    r2 = np.maximum((planets.x - x) ** 2 + (planets.y - y) ** 2, SOFTENING_R2)
+    # Shortest dynamical time sqrt(r^3 / GM) over all planets
+    t_dyn = math.sqrt(float(np.min(r2 * np.sqrt(r2) / (G * planets.mass))))
+    n = math.ceil(dt / (ADAPTIVE_ETA * t_dyn))
+    return max(1, min(ADAPTIVE_MAX_SUBSTEPS, n))
+
+def adaptive(planets: PlanetArrays, x, y, vx, vy, dt, a0: Optional[Accel] = None) -> Advance:
+    n = substeps_for(planets, x, y, dt)
+    h = dt / n
+    evals = 0
+    for _ in range(n):
+        x, y, vx, vy, a0, e = verlet(planets, x, y, vx, vy, h, a0)
+        evals += e
+    return x, y, vx, vy, a0, evals
+
+METHODS = {"euler": euler, "verlet": verlet, "rk4": rk4, "adaptive": adaptive}
+
+def advance(method: str, planets: PlanetArrays, x, y, vx, vy, dt, a0: Optional[Accel] = None) -> Advance:
+    return METHODS[method](planets, x, y, vx, vy, dt, a0)
+
+def integrate(state: Dict[str, Any], dt: float) -> int:
+    """
+    Advance state["rocket"] by dt with the session's integrator. The
+    end-of-step acceleration is cached on the state so Verlet-based schemes
+    pay one force evaluation per step. The cache is keyed on world version and
+    position, so a snap, restore or reset simply misses it. Returns force evaluations used.
+    """
+    rocket: Rocket = state["rocket"]
+    method = state.get("integrator") or INTEGRATOR
+
+    a0 = None
+    cached = state.get("accel_cache")
+    if cached is not None and cached[:3] == (state["world_version"], rocket.x, rocket.y):
+        a0 = cached[3]
+
+    x, y, vx, vy, a1, evals = advance(method, state["planets"], rocket.x, rocket.y, rocket.vx, rocket.vy, dt, a0)
+    rocket.x, rocket.y, rocket.vx, rocket.vy = x, y, vx, vy
+    state["accel_cache"] = (state["world_version"], x, y, a1) if a1 is not None else None
+    return evals
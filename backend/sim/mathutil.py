@@ -1,6 +1,8 @@
 import math
 from typing import Tuple
 
+import numpy as np
+
 def norm(x: float, y: float) -> float:
     return math.sqrt(x * x + y * y)
 
@@ -12,3 +14,20 @@ def unit(x: float, y: float) -> Tuple[float, float]:
 
 def dist(a: Tuple[float, float], b: Tuple[float, float]) -> float:
     return norm(a[0] - b[0], a[1] - b[1])
+
+def segment_entry(x0, y0, x1, y1, cx, cy, r):
+    """
+    Fraction s in [0, 1] along the segment (x0, y0)->(x1, y1) where it first
+    enters the circle (cx, cy, r): 0 if it starts inside, inf if it never
+    gets there. Elementwise (and broadcasting) on NumPy arrays.
+    """
+    dx, dy = x1 - x0, y1 - y0
+    fx, fy = x0 - cx, y0 - cy
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+    s = np.where((disc >= 0) & (a > 0) & (s >= 0) & (s <= 1), s, np.inf)
+    return np.where(c <= 0, 0.0, s)
@@ -0,0 +1,273 @@
+"""
+Process-wide metrics in Prometheus text format (served at /api/metrics).
+
+Histograms are cheap to feed: `observe` only appends to a pending queue, and
+samples are binned in bulk (np.searchsorted) once the queue fills or when the
+metrics are scraped. With METRICS.enabled False, `timer()` returns None and
+`time()` a shared no-op context, so instrumented code pays an attribute check.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sim.config import METRICS_ENABLED
+
+# Seconds; covers a single phase of step_sim (~1us) up to a slow HTTP request
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+)
+FLUSH_AT = 4096  # pending samples before they are binned
+
+Labels = Tuple[str, ...]
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _drain(queue: deque) -> list:
+    """Pop what is queued now; a concurrent flush may take part of it."""
+    out = []
+    try:
+        for _ in range(len(queue)):
+            out.append(queue.popleft())
+    except IndexError:
+        pass
+    return out
+
+class Histogram:
+    """One labelled histogram series."""
+
+    __slots__ = ("registry", "bounds", "counts", "sum", "_pending", "_lock")
+
+    def __init__(self, registry: "Metrics", buckets: Sequence[float]):
+        self.registry = registry
+        self.bounds = np.asarray(buckets, dtype=np.float64)
+        # Last slot is the +Inf bucket
+        self.counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self.sum = 0.0
+        # deque.append / popleft are atomic, so observers never take the lock
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        self._pending.append(value)
+        if len(self._pending) >= FLUSH_AT:
+            self.flush()
+
+    def flush(self) -> None:
+        values = _drain(self._pending)
+        if values:
+            self.observe_many(values)
+
+    def observe_many(self, values: Sequence[float]) -> None:
+        """Bin a batch of samples at once."""
+        values = np.asarray(values, dtype=np.float64)
+        # le buckets: a value equal to a bound belongs to that bound
+        idx = np.searchsorted(self.bounds, values, side="left")
+        with self._lock:
+            self.counts += np.bincount(idx, minlength=len(self.counts))
+            self.sum += float(values.sum())
+
+    def time(self):
+        """Context manager observing the wall time of its block (no-op when disabled)."""
+        return _Timing(self) if self.registry.enabled else _NO_TIMING
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(suffix, le, value) rows, cumulative as Prometheus expects."""
+        self.flush()
+        cumulative = np.cumsum(self.counts)
+        for bound, c in zip(self.bounds, cumulative[:-1]):
+            yield "_bucket", _fmt(float(bound)), int(c)
+        yield "_bucket", "+Inf", int(cumulative[-1])
+        yield "_sum", "", self.sum
+        yield "_count", "", int(cumulative[-1])
+
+class _Timing:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+class _NoTiming:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_TIMING = _NoTiming()
+
+class PhaseTimer:
+    """
+    Splits one call into phases. `lap(phase)` only stores a timestamp; on
+    `finish()` the laps go to the family in one append and are binned later.
+    """
+
+    __slots__ = ("family", "marks")
+
+    def __init__(self, family: "Family"):
+        self.family = family
+        self.marks = [("", time.perf_counter())]
+
+    def lap(self, phase: str) -> None:
+        self.marks.append((phase, time.perf_counter()))
+
+    def finish(self) -> float:
+        """Record the laps; returns the time since the timer started."""
+        total = time.perf_counter() - self.marks[0][1]
+        self.family.record_laps(self.marks)
+        return total
+
+class Family:
+    """A named metric with a fixed set of label names; one series per label values."""
+
+    def __init__(self, registry: "Metrics", kind: str, name: str, help: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._series: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+        self._laps: deque = deque()  # PhaseTimer marks not yet split into series
+
+    def labels(self, *values: str):
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.get(values)
+                if series is None:
+                    series = Histogram(self.registry, self.buckets) if self.kind == "histogram" else _Count()
+                    self._series[values] = series
+        return series
+
+    # Unlabelled families act as their only series
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def record_laps(self, marks: List[Tuple[str, float]]) -> None:
+        self._laps.append(marks)
+        if len(self._laps) >= FLUSH_AT // 8:
+            self.flush_laps()
+
+    def flush_laps(self) -> None:
+        """Split pending PhaseTimer laps by phase and bin each phase in bulk."""
+        by_phase: Dict[str, List[float]] = {}
+        for marks in _drain(self._laps):
+            prev = marks[0][1]
+            for phase, t in marks[1:]:
+                by_phase.setdefault(phase, []).append(t - prev)
+                prev = t
+        for phase, values in by_phase.items():
+            self.labels(phase).observe_many(values)
+
+    def inc(self, *values: str, by: float = 1) -> None:
+        """Counters only: add `by` to the series for these label values."""
+        if self.registry.enabled:
+            self.labels(*values).add(by)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        self.flush_laps()
+        for values, series in sorted(self._series.items()):
+            if self.kind == "histogram":
+                for suffix, le, v in series.samples():
+                    extra = f'le="{le}"' if le else ""
+                    lines.append(f"{self.name}{suffix}{_label_text(self.labelnames, values, extra)} {_fmt(v)}")
+            else:
+                lines.append(f"{self.name}{_label_text(self.labelnames, values)} {_fmt(series.value)}")
+        return lines
+
+class _Count:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, by: float) -> None:
+        with self._lock:
+            self.value += by
+
+class Metrics:
+    """Registry of metric families; `render()` is the /api/metrics body."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._families: Dict[str, Family] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def _family(self, kind: str, name: str, help: str, labelnames: Sequence[str], **kw) -> Family:
+        fam = self._families.get(name)
+        if fam is None:
+            fam = self._families[name] = Family(self, kind, name, help, labelnames, **kw)
+        return fam
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Family:
+        return self._family("histogram", name, help, labelnames, buckets=buckets)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family("counter", name, help, labelnames)
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        """A gauge read from `fn` at scrape time."""
+        self._gauges[name] = (help, fn)
+
+    def timer(self, family: Family) -> Optional[PhaseTimer]:
+        """A PhaseTimer over `family`, or None when metrics are off."""
+        return PhaseTimer(family) if self.enabled else None
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for fam in self._families.values():
+            lines.extend(fam.render())
+        for name, (help, fn) in self._gauges.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {_fmt(fn())}"]
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+# Shared families, fed from sim.physics, sim.serialize and the servers (app.py, asgi.py)
+STEP_PHASES = METRICS.histogram("deltax_step_phase_seconds", "Time spent in each phase of step_sim.", ("phase",))
+STEP_SECONDS = METRICS.histogram("deltax_step_seconds", "Wall time of one step_sim call.")
+PAYLOAD_SECONDS = METRICS.histogram(
+    "deltax_payload_seconds", "Time spent building and encoding state payloads.", ("part",))
+REQUESTS = METRICS.counter(
+    "deltax_http_requests_total", "HTTP requests by endpoint, method and status.", ("endpoint", "method", "code"))
+REQUEST_SECONDS = METRICS.histogram("deltax_http_request_seconds", "HTTP request latency by endpoint.", ("endpoint",))
+OUTCOMES = METRICS.counter("deltax_outcomes_total", "Finished runs by status and reason.", ("status", "reason"))
+
+def outcome_reason(reason: Optional[str]) -> str:
+    """fail_reason with planet ids folded away, to keep label cardinality fixed."""
+    if not reason:
+        return "none"
+    if reason.startswith("crashed_into_"):
+        return "crashed"
+    return reason
@@ -1,13 +1,20 @@
 from dataclasses import dataclass
+from typing import Any, Dict
 
-@dataclass
+# slots: no per-instance __dict__, and to_dict is a plain dict literal
+# (dataclasses.asdict deep-copies field by field and is far slower).
+
+@dataclass(slots=True)
 class Rocket:
     x: float
     y: float
     vx: float
     vy: float
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {"x": self.x, "y": self.y, "vx": self.vx, "vy": self.vy}
+
+@dataclass(slots=True)
 class Planet:
     id: int
     x: float
@@ -19,14 +26,20 @@ class Planet:
     recoverable: bool
     color: str 
 
-@dataclass
+@dataclass(slots=True)
 class Destination:
     x: float
     y: float
     radius: float
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {"x": self.x, "y": self.y, "radius": self.radius}
+
+@dataclass(slots=True)
 class Camera:
     cx: float
     cy: float
     zoom: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cx": self.cx, "cy": self.cy, "zoom": self.zoom}
@@ -1,66 +1,72 @@
 import math
-from typing import Tuple, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from sim.state import STATE
-from sim.models import Rocket, Planet, Destination, Camera
+from sim.models import Rocket, Destination, Camera
+from sim.planets import PlanetArrays, KIND_OKAY, KIND_BAD, CAPTURE_MARGIN
 from sim.config import (
     G, SOFTENING_R2,
     CRASH_RADIUS_FACTOR,
-    MAX_WORLD_ABS, CAM_ALPHA,
+    MAX_WORLD_ABS, CAM_ALPHA, STEP_BATCH_MAX, ORBIT_MAX_DT, clamp,
 )
-from sim.mathutil import dist
-import random
+from sim.mathutil import dist, segment_entry
+from sim.integrators import integrate
+from sim.snapshot import snapshot
+from sim.trajectory import record as record_trajectory
+from sim.metrics import METRICS, STEP_PHASES, STEP_SECONDS, OUTCOMES, PhaseTimer, outcome_reason
+
+# Contact points are moved this fraction of the radius towards the centre
+CONTACT_INSET = 1.0 - 1e-9
 
 def clamp01_100(v: float) -> float:
     return max(0.0, min(100.0, v))
 
-def arm_grace_counters_if_needed() -> None:
+def arm_grace_counters_if_needed(state: Dict[str, Any]) -> None:
     """When food/water first hit 0, arm the grace planets counters."""
-    if STATE.get("water", 100.0) <= 0 and STATE.get("water_grace_planets") is None:
-        STATE["water_grace_planets"] = 1
+    if state.get("water", 100.0) <= 0 and state.get("water_grace_planets") is None:
+        state["water_grace_planets"] = 1
 
-    if STATE.get("food", 100.0) <= 0 and STATE.get("food_grace_planets") is None:
-        STATE["food_grace_planets"] = 2
+    if state.get("food", 100.0) <= 0 and state.get("food_grace_planets") is None:
+        state["food_grace_planets"] = 2
 
-def check_instant_gameover() -> None:
+def check_instant_gameover(state: Dict[str, Any]) -> None:
     """Immediate game over conditions."""
-    if STATE.get("oxygen", 100.0) <= 0:
-        STATE["status"] = "failed"
-        STATE["fail_reason"] = "oxygen_depleted"
+    if state.get("oxygen", 100.0) <= 0:
+        state["status"] = "failed"
+        state["fail_reason"] = "oxygen_depleted"
         return
 
-    if STATE.get("morale", 100.0) <= 0:
-        STATE["status"] = "failed"
-        STATE["fail_reason"] = "morale_depleted"
+    if state.get("morale", 100.0) <= 0:
+        state["status"] = "failed"
+        state["fail_reason"] = "morale_depleted"
         return
 
-def apply_morale_on_latch(kind: str) -> None:
-    morale = float(STATE.get("morale", 100.0))
+def apply_morale_on_latch(state: Dict[str, Any], kind: str) -> None:
+    morale = float(state.get("morale", 100.0))
 
     if kind == "good":
-        STATE["good_streak"] = int(STATE.get("good_streak", 0)) + 1
-        streak = STATE["good_streak"]
+        state["good_streak"] = int(state.get("good_streak", 0)) + 1
+        streak = state["good_streak"]
 
         # small gain, capped
         morale += min(3.0 + 1.5 * streak, 12.0)
 
     else:
-        STATE["good_streak"] = 0
+        state["good_streak"] = 0
 
         # BIG drops so morale can hit 0 in a single run
         if kind == "okay":
-            morale -= random.uniform(18.0, 32.0)
+            morale -= state["rng"].uniform(18.0, 32.0)
         elif kind == "bad":
-            morale -= random.uniform(45.0, 70.0)
+            morale -= state["rng"].uniform(45.0, 70.0)
         else:
             morale -= 10.0
 
-    STATE["morale"] = clamp01_100(morale)
+    state["morale"] = clamp01_100(morale)
 
 
 # this is making the moral of the crew ship st it depends on the % of other resources
-def update_morale_from_low_stats(dt: float) -> None:
-    morale = float(STATE.get("morale", 100.0))
+def update_morale_from_low_stats(state: Dict[str, Any], dt: float) -> None:
+    morale = float(state.get("morale", 100.0))
 
     # -------------------------
     # DEBUG: super fast morale drop
@@ -70,15 +76,15 @@ def update_morale_from_low_stats(dt: float) -> None:
     if DEBUG_FAST_MORALE:
         # drains 200 morale per sim-second -> hits 0 in ~0.5s
         morale -= 200.0 * dt
-        STATE["morale"] = clamp01_100(morale)
+        state["morale"] = clamp01_100(morale)
         return
 
     # Normal logic
-    oxygen = float(STATE.get("oxygen", 100.0))
-    food = float(STATE.get("food", 100.0))
-    ship = float(STATE.get("ship_health", 100.0))
-    water = float(STATE.get("water", 100.0))
-    fuel = float(STATE.get("fuel", 100.0))
+    oxygen = float(state.get("oxygen", 100.0))
+    food = float(state.get("food", 100.0))
+    ship = float(state.get("ship_health", 100.0))
+    water = float(state.get("water", 100.0))
+    fuel = float(state.get("fuel", 100.0))
 
     pen = 0.0
     if oxygen < 30: pen += 5.0  # only start worrying about fuel when its less than 30%
@@ -88,13 +94,13 @@ def update_morale_from_low_stats(dt: float) -> None:
     if fuel < 50: pen += 3.0    # only start worrying about fuel when its less than 30%
 
     morale -= pen * dt
-    STATE["morale"] = clamp01_100(morale)
+    state["morale"] = clamp01_100(morale)
 
-def maybe_create_latch_event(planet_id: str) -> None:
-    if STATE.get("pending_event") is not None:
+def maybe_create_latch_event(state: Dict[str, Any], planet_id: str) -> None:
+    if state.get("pending_event") is not None:
         return
 
-    last = STATE.get("last_event_type")
+    last = state.get("last_event_type")
 
     # Candidate events
     options = ["planet_latch_repair", "planet_crew_rest", "planet_water_recycler"]
@@ -103,11 +109,11 @@ def maybe_create_latch_event(planet_id: str) -> None:
     if last in options and len(options) > 1:
         options.remove(last)
 
-    ev_type = random.choice(options)
-    STATE["last_event_type"] = ev_type
+    ev_type = state["rng"].choice(options)
+    state["last_event_type"] = ev_type
 
     if ev_type == "planet_latch_repair":
-        STATE["pending_event"] = {
+        state["pending_event"] = {
             "type": "planet_latch_repair",
             "planet_id": planet_id,
             "prompt": "Vessel latched. Stop to repair ship?",
@@ -118,7 +124,7 @@ def maybe_create_latch_event(planet_id: str) -> None:
         }
 
     elif ev_type == "planet_crew_rest":
-        STATE["pending_event"] = {
+        state["pending_event"] = {
             "type": "planet_crew_rest",
             "planet_id": planet_id,
             "prompt": "Crew requests rest. Stop to recover morale?",
@@ -129,7 +135,7 @@ def maybe_create_latch_event(planet_id: str) -> None:
         }
 
     else:  # planet_water_recycler
-        STATE["pending_event"] = {
+        state["pending_event"] = {
             "type": "planet_water_recycler",
             "planet_id": planet_id,
             "prompt": "Water recycler is failing. Stop to fix it?",
@@ -140,22 +146,12 @@ def maybe_create_latch_event(planet_id: str) -> None:
         }
 
 
-def accel_from_planets(rocket: Rocket, planets: List[Planet]) -> Tuple[float, float]:
+def accel_from_planets(state: Dict[str, Any], rocket: Rocket, planets: PlanetArrays) -> Tuple[float, float]:
     # If latched, gravity doesn't move us (we are stuck)
-    if STATE.get("latched_planet_id") is not None:
+    if state.get("latched_planet_id") is not None:
         return 0.0, 0.0
 
-    ax, ay = 0.0, 0.0
-    for p in planets:
-        dx = p.x - rocket.x
-        dy = p.y - rocket.y
-        r2 = dx * dx + dy * dy
-        r2 = max(r2, SOFTENING_R2)
-        r = math.sqrt(r2)
-        a = G * p.mass / r2
-        ax += a * dx / r
-        ay += a * dy / r
-    return ax, ay
+    return planets.accel_at(rocket.x, rocket.y)
 
 # ------------------
 #   1. Check if you are already in orbit
@@ -168,176 +164,328 @@ def accel_from_planets(rocket: Rocket, planets: List[Planet]) -> Tuple[float, fl
 # • CAPTURE_ZONE : 
 # ------------------
 
-def update_reveals_and_collisions(dt: float) -> None:
-    rocket: Rocket = STATE["rocket"]
-    planets: List[Planet] = STATE["planets"]
+def update_reveals_and_collisions(state: Dict[str, Any], dt: float) -> None:
+    rocket: Rocket = state["rocket"]
+    planets: PlanetArrays = state["planets"]
     
     # 1. ORBITING LOGIC
-    if STATE.get("latched_planet_id") is not None:
+    if state.get("latched_planet_id") is not None:
         # Find the planet we are latched to
-        p = next((p for p in planets if p.id == STATE["latched_planet_id"]), None)
-        if not p: return
-
-        if p.kind == "okay":
-            STATE["countdown"] -= dt 
-            if STATE["countdown"] <= 0:
-                p.kind = "bad"
-                p.color = "#ff2c2c"
-                STATE["status"] = "failed"  # tells the UI to stop
-                STATE["fail_reason"] = "planet_instability_explosion"
+        i = planets.find(state["latched_planet_id"])
+        if i is None: return
+        px, py = float(planets.x[i]), float(planets.y[i])
+        p_mass, p_radius = float(planets.mass[i]), float(planets.radius[i])
+
+        if planets.kind[i] == KIND_OKAY:
+            state["countdown"] -= dt 
+            if state["countdown"] <= 0:
+                planets.set_kind(i, KIND_BAD)
+                state["status"] = "failed"  # tells the UI to stop
+                state["fail_reason"] = "planet_instability_explosion"
                 return
 
-        # Orbital Physics
-        dx, dy = rocket.x - p.x, rocket.y - p.y
-        r = math.sqrt(dx * dx + dy * dy)
-        orbital_speed = math.sqrt(G * p.mass / r)     # take out the factor of 2, to slow down the simulation
-        tx, ty = dy / r, -dx / r # Tangent vector
-        
-        target_vx = tx * orbital_speed
-        target_vy = ty * orbital_speed
-
-        # Smooth blending
-        SMOOTH_FACTOR = 0.1 
-        rocket.vx += (target_vx - rocket.vx) * SMOOTH_FACTOR
-        rocket.vy += (target_vy - rocket.vy) * SMOOTH_FACTOR
-
-        # Radial Correction
-        TARGET_R = p.radius + 20.0
-        r_err = TARGET_R - r
-        rocket.x += (dx / r) * r_err * 0.1
-        rocket.y += (dy / r) * r_err * 0.1
-
-        rocket.x += rocket.vx * dt
-        rocket.y += rocket.vy * dt
+        # Blending and radial correction act once per move, so a step longer
+        # than ORBIT_MAX_DT orbits in equal moves no longer than that
+        moves = 1 if dt <= ORBIT_MAX_DT else math.ceil(dt / ORBIT_MAX_DT)
+        h = dt / moves
+        for _ in range(moves):
+            # Orbital Physics
+            dx, dy = rocket.x - px, rocket.y - py
+            r = math.sqrt(dx * dx + dy * dy)
+            orbital_speed = math.sqrt(G * p_mass / r)     # take out the factor of 2, to slow down the simulation
+            tx, ty = dy / r, -dx / r # Tangent vector
+
+            target_vx = tx * orbital_speed
+            target_vy = ty * orbital_speed
+
+            # Smooth blending
+            SMOOTH_FACTOR = 0.1
+            rocket.vx += (target_vx - rocket.vx) * SMOOTH_FACTOR
+            rocket.vy += (target_vy - rocket.vy) * SMOOTH_FACTOR
+
+            # Radial Correction
+            TARGET_R = p_radius + 20.0
+            r_err = TARGET_R - r
+            rocket.x += (dx / r) * r_err * 0.1
+            rocket.y += (dy / r) * r_err * 0.1
+
+            rocket.x += rocket.vx * h
+            rocket.y += rocket.vy * h
         return
 
     # 2. CAPTURE & CRASH LOGIC
-    for p in planets:
-        d = dist((rocket.x, rocket.y), (p.x, p.y))
-        CAPTURE_ZONE = p.radius + 20.0 
-
-        # A. DEAD CENTER CRASH (Priority)
-        if d <= (p.radius * CRASH_RADIUS_FACTOR):
-            STATE["status"] = "failed"
-            STATE["fail_reason"] = f"crashed_into_{p.id}"
+    # Test every planet at once; the first planet (in list order) that is
+    # either crashed into or newly entered decides the outcome.
+    i, crashed = planets.first_hit(rocket.x, rocket.y)
+    if i < 0:
+        return
+
+    pid = int(planets.id[i])
+    px, py = float(planets.x[i]), float(planets.y[i])
+    d = math.hypot(rocket.x - px, rocket.y - py)
+    CAPTURE_ZONE = float(planets.radius[i]) + CAPTURE_MARGIN 
+
+    # A. DEAD CENTER CRASH (Priority)
+    if crashed:
+        state["status"] = "failed"
+        state["fail_reason"] = f"crashed_into_{pid}"
+        return
+
+    # B. LATCH CHECK
+    planets.reveal(i)
+    kind = planets.kind_name(i)
+    # --- Grace-based depletion game over (triggered on planet stops) ---
+    arm_grace_counters_if_needed(state)
+
+    # If water is 0 and grace is already used up -> game over BEFORE latching
+    if state.get("water", 100.0) <= 0:
+        gp = state.get("water_grace_planets")
+        if gp is not None and gp <= 0:
+            state["status"] = "failed"
+            state["fail_reason"] = "water_depleted"
             return
 
-        # B. LATCH CHECK
-        if not p.revealed and d <= CAPTURE_ZONE:
-            p.revealed = True
-            # --- Grace-based depletion game over (triggered on planet stops) ---
-            arm_grace_counters_if_needed()
-
-            # If water is 0 and grace is already used up -> game over BEFORE latching
-            if STATE.get("water", 100.0) <= 0:
-                gp = STATE.get("water_grace_planets")
-                if gp is not None and gp <= 0:
-                    STATE["status"] = "failed"
-                    STATE["fail_reason"] = "water_depleted"
-                    return
-
-            # If food is 0 and grace is already used up -> game over BEFORE latching
-            if STATE.get("food", 100.0) <= 0:
-                gp = STATE.get("food_grace_planets")
-                if gp is not None and gp <= 0:
-                    STATE["status"] = "failed"
-                    STATE["fail_reason"] = "food_depleted"
-                    return
-
-            STATE["latched_planet_id"] = p.id
-            # If we are at/below 0, spending a planet stop consumes grace
-            if STATE.get("water", 100.0) <= 0 and STATE.get("water_grace_planets") is not None:
-                STATE["water_grace_planets"] -= 1
-
-            if STATE.get("food", 100.0) <= 0 and STATE.get("food_grace_planets") is not None:
-                STATE["food_grace_planets"] -= 1
-
-            apply_morale_on_latch(p.kind)
-
-            STATE["food"] = max(0.0, STATE.get("food", 100.0) - 10.0)
-
-            # after orbiting a planet, the consecutive burns should reset
-            STATE["consecutive_burns"] = 0   # Resets the 3/3 counter to 0/3
-            STATE["can_space_burn"] = True    # Unlocks the "Red" lockout
-            if STATE.get("pending_event") is None:
-                if p.kind == "good":
-                    maybe_create_latch_event(p.id)
-
-
-            # Snap position to avoid clipping
-            push_x, push_y = (rocket.x - p.x) / d, (rocket.y - p.y) / d
-            rocket.x = p.x + push_x * CAPTURE_ZONE
-            rocket.y = p.y + push_y * CAPTURE_ZONE
-            
-            if p.kind == "okay":
-                STATE["countdown"] = 10.0
+    # If food is 0 and grace is already used up -> game over BEFORE latching
+    if state.get("food", 100.0) <= 0:
+        gp = state.get("food_grace_planets")
+        if gp is not None and gp <= 0:
+            state["status"] = "failed"
+            state["fail_reason"] = "food_depleted"
             return
 
-def check_success_and_bounds() -> None:
-    rocket: Rocket = STATE["rocket"]
-    dest: Destination = STATE["dest"]
+    state["latched_planet_id"] = pid
+    # If we are at/below 0, spending a planet stop consumes grace
+    if state.get("water", 100.0) <= 0 and state.get("water_grace_planets") is not None:
+        state["water_grace_planets"] -= 1
+
+    if state.get("food", 100.0) <= 0 and state.get("food_grace_planets") is not None:
+        state["food_grace_planets"] -= 1
+
+    apply_morale_on_latch(state, kind)
+
+    state["food"] = max(0.0, state.get("food", 100.0) - 10.0)
+
+    # after orbiting a planet, the consecutive burns should reset
+    state["consecutive_burns"] = 0   # Resets the 3/3 counter to 0/3
+    state["can_space_burn"] = True    # Unlocks the "Red" lockout
+    if state.get("pending_event") is None:
+        if kind == "good":
+            maybe_create_latch_event(state, pid)
+
+
+    # Snap position to avoid clipping
+    push_x, push_y = (rocket.x - px) / d, (rocket.y - py) / d
+    rocket.x = px + push_x * CAPTURE_ZONE
+    rocket.y = py + push_y * CAPTURE_ZONE
+    
+    if kind == "okay":
+        state["countdown"] = 10.0
+
+def stop_at_first_contact(state: Dict[str, Any], x0: float, y0: float) -> None:
+    """
+    Continuous collision check for the flight step just taken from (x0, y0).
+    The per-step checks only look at positions, so a long step can pass
+    straight through a planet, its capture zone or the destination, or land
+    deep in a crash radius it should have been captured outside of. See
+    first_contact_stop.
+    """
+    rocket: Rocket = state["rocket"]
+    stop = first_contact_stop(state["planets"], state["dest"], x0, y0, rocket.x, rocket.y)
+    if stop is not None:
+        rocket.x, rocket.y = stop
+        state["accel_cache"] = None
+
+def stop_at_destination(state: Dict[str, Any], x0: float, y0: float) -> None:
+    """
+    Swept destination check for an orbit step taken from (x0, y0). Planets
+    are not collision-checked while latched, so the destination is the only
+    thing an orbit step can pass through.
+    """
+    rocket: Rocket = state["rocket"]
+    dest: Destination = state["dest"]
+    if dist((rocket.x, rocket.y), (dest.x, dest.y)) <= dest.radius:
+        return
+    s = float(segment_entry(x0, y0, rocket.x, rocket.y, dest.x, dest.y, dest.radius))
+    if s <= 1.0:
+        px, py = x0 + (rocket.x - x0) * s, y0 + (rocket.y - y0) * s
+        rocket.x, rocket.y = _inset(px, py, dest.x, dest.y, dest.radius)
+
+def _inset(px: float, py: float, cx: float, cy: float, r: float) -> Tuple[float, float]:
+    """(px, py) on a circle's edge, pulled inside so rounding can't put it back out."""
+    d = math.hypot(px - cx, py - cy)
+    if d > 0.0:
+        k = min(1.0, r * CONTACT_INSET / d)
+        px, py = cx + (px - cx) * k, cy + (py - cy) * k
+    return px, py
+
+def first_contact_stop(planets: PlanetArrays, dest: Destination,
+                       x0: float, y0: float, x1: float, y1: float) -> Optional[Tuple[float, float]]:
+    """
+    Where a rocket flying (x0, y0)->(x1, y1) should stop: the path's first
+    contact with a capture/crash radius or the destination, moved just inside
+    that circle so the usual position checks take it from there. None when
+    the end point alone already gives the same outcome, which is how short
+    steps almost always go (they behave exactly as before).
+    """
+    i, crashed, s = planets.first_contact(x0, y0, x1, y1)
+    s_dest = float(segment_entry(x0, y0, x1, y1, dest.x, dest.y, dest.radius))
+
+    if s_dest < s:
+        if dist((x1, y1), (dest.x, dest.y)) <= dest.radius:
+            return None
+        cx, cy, r = dest.x, dest.y, dest.radius
+    elif i >= 0:
+        if planets.first_hit(x1, y1) == (i, crashed):
+            return None
+        cx, cy = float(planets.x[i]), float(planets.y[i])
+        r = float(planets.radius[i]) * CRASH_RADIUS_FACTOR if crashed else float(planets.radius[i]) + CAPTURE_MARGIN
+    else:
+        return None
+
+    s = min(s, s_dest)
+    return _inset(x0 + (x1 - x0) * s, y0 + (y1 - y0) * s, cx, cy, r)
+
+def check_success_and_bounds(state: Dict[str, Any]) -> None:
+    rocket: Rocket = state["rocket"]
+    dest: Destination = state["dest"]
 
     # Destination
     if dist((rocket.x, rocket.y), (dest.x, dest.y)) <= dest.radius:
-        STATE["status"] = "success"
-        STATE["fail_reason"] = None
+        state["status"] = "success"
+        state["fail_reason"] = None
         return
 
     # Bounds
     if abs(rocket.x) > MAX_WORLD_ABS or abs(rocket.y) > MAX_WORLD_ABS:
-        STATE["status"] = "failed"
-        STATE["fail_reason"] = "out_of_bounds"
+        state["status"] = "failed"
+        state["fail_reason"] = "out_of_bounds"
         return
 
-def step_sim(dt: float) -> None:
-    if STATE["status"] != "running":
+def step_sim(state: Dict[str, Any], dt: float, camera: bool = True) -> None:
+    """One sim step. Headless callers pass camera=False to skip camera easing."""
+    if state["status"] != "running":
         return
 
+    timer = METRICS.timer(STEP_PHASES)
+    _step(state, dt, camera, timer)
+    record_trajectory(state)
+    if timer is not None:
+        STEP_SECONDS.observe(timer.finish())
+    if state["status"] != "running":
+        record_outcome(state)
+
+def record_outcome(state: Dict[str, Any]) -> None:
+    """Count a finished run in OUTCOMES. Call once, from the step that ended it."""
+    OUTCOMES.inc(state["status"], outcome_reason(state["fail_reason"]))
+
+def _step(state: Dict[str, Any], dt: float, camera: bool, timer: Optional[PhaseTimer]) -> None:
+    log = state.get("input_log")
+    if log is not None:
+        log.step(dt)
+
     # 1. Update resources and Morale FIRST
-    update_resources(dt)
-    update_morale_from_low_stats(dt) # Move this up here!
+    update_resources(state, dt)
+    if timer is not None:
+        timer.lap("resources")
+    update_morale_from_low_stats(state, dt) # Move this up here!
     
     # 2. THEN check if these caused a game over
-    arm_grace_counters_if_needed()
-    check_instant_gameover()
+    arm_grace_counters_if_needed(state)
+    check_instant_gameover(state)
+    if timer is not None:
+        timer.lap("morale")
     
-    if STATE["status"] != "running":
+    if state["status"] != "running":
         # Now the Morale will have updated one last time before we exit
         return
 
     # If an event prompt is up, pause physics, but keep the world “alive”
-    if STATE.get("pending_event") is not None:
-        update_camera()
+    if state.get("pending_event") is not None:
+        if camera:
+            update_camera(state)
+            if timer is not None:
+                timer.lap("camera")
         return
 
-    update_reveals_and_collisions(dt)
-
-    if STATE.get("latched_planet_id") is None:
-        ax, ay = accel_from_planets(STATE["rocket"], STATE["planets"])
-        rocket = STATE["rocket"]
-        rocket.vx += ax * dt
-        rocket.vy += ay * dt
-        rocket.x += rocket.vx * dt
-        rocket.y += rocket.vy * dt
-
-    STATE["t"] += dt
-    if STATE["status"] == "running":
-        check_success_and_bounds()
-
-    update_camera()
-
-def update_camera() -> None:
-    rocket: Rocket = STATE["rocket"]
-    cam: Camera = STATE["camera"]
-
-    latched_id = STATE.get("latched_planet_id")
+    rocket = state["rocket"]
+    x0, y0 = rocket.x, rocket.y
+    was_latched = state.get("latched_planet_id") is not None
+    update_reveals_and_collisions(state, dt)
+    if was_latched and state["status"] == "running":
+        stop_at_destination(state, x0, y0)
+    if timer is not None:
+        timer.lap("collisions")
+
+    if state.get("latched_planet_id") is None:
+        x0, y0 = rocket.x, rocket.y
+        integrate(state, dt)
+        stop_at_first_contact(state, x0, y0)
+        if timer is not None:
+            timer.lap("integrate")
+
+    state["t"] += dt
+    if state["status"] == "running":
+        check_success_and_bounds(state)
+        if timer is not None:
+            timer.lap("success_bounds")
+
+    if camera:
+        update_camera(state)
+        if timer is not None:
+            timer.lap("camera")
+
+def step_many(state: Dict[str, Any], dt: float, steps: int) -> List[Tuple[float, float]]:
+    """
+    Run up to `steps` substeps of `dt` in one go. Stops early when the run ends
+    or a new event prompt comes up, so the client never overshoots a decision.
+    Returns the rocket position after every substep (for the trail).
+    """
+    trail: List[Tuple[float, float]] = []
+    had_event = state.get("pending_event") is not None
+
+    for _ in range(steps):
+        if state["status"] != "running":
+            break
+        step_sim(state, dt)
+        rocket = state["rocket"]
+        trail.append((rocket.x, rocket.y))
+
+        if not had_event and state.get("pending_event") is not None:
+            break
+
+    log = state.get("input_log")
+    if log is not None and log.full:
+        log.start_snapshot(snapshot(state))
+    return trail
+
+def requested_steps(data: Dict[str, Any], dt: float) -> int:
+    """
+    Substep count for a step request, from either `steps` or a sim-time `span`
+    (seconds). Raises ValueError for values that are not finite numbers.
+    """
+    key = "span" if data.get("span") is not None else "steps"
+    try:
+        value = float(data.get(key, 1))
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number") from None
+    if not math.isfinite(value):
+        raise ValueError(f"{key} must be finite")
+    steps = round(value / dt) if key == "span" else int(value)
+    return int(clamp(steps, 1, STEP_BATCH_MAX))
+
+def update_camera(state: Dict[str, Any]) -> None:
+    rocket: Rocket = state["rocket"]
+    cam: Camera = state["camera"]
+
+    latched_id = state.get("latched_planet_id")
     is_latched = latched_id is not None
 
     if is_latched:
         # Find the planet we are stuck to
-        p = next(p for p in STATE["planets"] if p.id == latched_id)
+        planets: PlanetArrays = state["planets"]
+        i = planets.index_of(latched_id)
         # The camera's goal is now the planet's center, not the moving rocket
-        target_x, target_y = p.x, p.y
+        target_x, target_y = float(planets.x[i]), float(planets.y[i])
         # Use a very firm alpha so it settles quickly and stays there
         alpha = 0.05 
     else:
@@ -368,55 +516,32 @@ def update_camera() -> None:
             cam.cy = rocket.y
 
 
-# this is about the 3-times allowed propulsion (out of orbit)
-def apply_propulsion(dvx, dvy):
-    is_latched = STATE.get("latched_planet_id") is not None
-    
-    if is_latched:
-        # Standard propulsion: Always allowed in orbit
-        STATE["rocket"].vx += dvx
-        STATE["rocket"].vy += dvy
-        # Once you launch from orbit, you are back in space
-        STATE["latched_planet_id"] = None 
-        # Reset the space burn cooldown so you can use one immediately if needed
-        STATE["can_space_burn"] = True 
-        
-    elif STATE["space_burns_left"] > 0 and STATE["can_space_burn"]:
-        # Emergency Space Burn: Allowed only 3 times, not in a row
-        STATE["rocket"].vx += dvx
-        STATE["rocket"].vy += dvy
-        STATE["space_burns_left"] -= 1
-        STATE["can_space_burn"] = False # Lock the next space burn
-    else:
-        # Action blocked: Either out of charges or cooldown active
-        pass
-
 # 
-def update_resources(dt: float) -> None:
+def update_resources(state: Dict[str, Any], dt: float) -> None:
     # DEBUG: super fast oxygen drain
     DEBUG_FAST_OXYGEN = False 
     if DEBUG_FAST_OXYGEN:
-        STATE["oxygen"] -= 200.0 * dt  # hits 0 in ~0.5 sec
+        state["oxygen"] -= 200.0 * dt  # hits 0 in ~0.5 sec
     else:
-        STATE["oxygen"] -= 0.05 * dt
+        state["oxygen"] -= 0.05 * dt
     # 1. Oxygen and Food drop slowly over time
     # (0.05 units per second means ~33 minutes of real-time play)
 
-    STATE["food"] -= 0.03 * dt
+    state["food"] -= 0.03 * dt
 
     # 2. Fuel only drops when the rocket is NOT latched (moving through deep space)
-    if STATE.get("latched_planet_id") is None:
-        STATE["fuel"] -= 0.01 * dt
+    if state.get("latched_planet_id") is None:
+        state["fuel"] -= 0.01 * dt
 
     # 3. Crew Health starts dropping if Oxygen or Food hits 0
-    if STATE["oxygen"] <= 0 or STATE["food"] <= 0:
-        STATE["crew_health"] -= 0.5 * dt # Health drops faster than resources
+    if state["oxygen"] <= 0 or state["food"] <= 0:
+        state["crew_health"] -= 0.5 * dt # Health drops faster than resources
 
-    if STATE.get("water_recycler_broken", False):
-        STATE["water"] -= 0.10 * dt  # faster drain
+    if state.get("water_recycler_broken", False):
+        state["water"] -= 0.10 * dt  # faster drain
     else:
-        STATE["water"] -= 0.04 * dt  # normal
+        state["water"] -= 0.04 * dt  # normal
 
     # Clamp everything to 0 so they don't go negative
     for key in ["oxygen", "food", "water", "fuel", "crew_health"]:
-        STATE[key] = max(0, STATE[key])
+        state[key] = max(0, state[key])
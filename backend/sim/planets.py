@@ -0,0 +1,221 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sim.models import Planet
+from sim.mathutil import segment_entry
+from sim.spatial import UniformGrid
+from sim.config import G, SOFTENING_R2, CRASH_RADIUS_FACTOR, SPATIAL_CELL_SIZE
+
+# Unrevealed planets capture the rocket within radius + CAPTURE_MARGIN
+CAPTURE_MARGIN = 20.0
+
+# Planet kinds are stored as small integer codes
+KIND_GOOD, KIND_OKAY, KIND_BAD = 0, 1, 2
+KINDS = ("good", "okay", "bad")
+KIND_CODES = {k: i for i, k in enumerate(KINDS)}
+KIND_COLORS = ("#9bb0ff", "#FF991c", "#ff2c2c")
+
+class PlanetArrays:
+    """
+    Struct-of-arrays planet storage: one contiguous NumPy array per field.
+
+    Physics, collisions, the HUD and the payload serializers work on whole
+    arrays at once; `planet`/`to_planets` give a Planet view for tooling.
+    Planets never move after reset, only `kind` and `revealed` change.
+    """
+
+    __slots__ = ("id", "x", "y", "mass", "radius", "kind", "revealed", "recoverable", "field",
+                 "bad_version", "changed_at", "_index", "_grid", "_bad")
+
+    def __init__(self, ids, x, y, mass, radius, kind, revealed, recoverable):
+        self.id = np.asarray(ids, dtype=np.int64)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.mass = np.asarray(mass, dtype=np.float64)
+        self.radius = np.asarray(radius, dtype=np.float64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.revealed = np.asarray(revealed, dtype=bool)
+        self.recoverable = np.asarray(recoverable, dtype=bool)
+        # Optional precomputed GravityField (sim.field) used by accel_at
+        self.field = None
+        self._index: Dict[int, int] = {int(pid): i for i, pid in enumerate(self.id)}
+        self._grid: Optional[UniformGrid] = None
+        # Revealed bad planets (see revealed_bad), kept up to date by reveal /
+        # set_kind; None means rebuild from the arrays on next use
+        self._bad: Optional[Tuple[np.ndarray, ...]] = None
+        # Bumped on every reveal / kind change; changed_at holds each planet's last bump
+        self.bad_version = 0
+        self.changed_at = np.zeros(len(self.id), dtype=np.int64)
+
+    @classmethod
+    def empty(cls) -> "PlanetArrays":
+        return cls([], [], [], [], [], [], [], [])
+
+    @classmethod
+    def from_planets(cls, planets: Iterable[Planet]) -> "PlanetArrays":
+        planets = list(planets)
+        return cls(
+            [p.id for p in planets],
+            [p.x for p in planets],
+            [p.y for p in planets],
+            [p.mass for p in planets],
+            [p.radius for p in planets],
+            [KIND_CODES[p.kind] for p in planets],
+            [p.revealed for p in planets],
+            [p.recoverable for p in planets],
+        )
+
+    def freeze(self) -> None:
+        """Make every array read-only, for templates shared between games."""
+        for arr in (self.id, self.x, self.y, self.mass, self.radius, self.kind, self.revealed, self.recoverable):
+            arr.flags.writeable = False
+
+    def clone(self) -> "PlanetArrays":
+        """
+        A playable copy. Only `kind` and `revealed` change during a game, so
+        those are copied; the static arrays, id index and spatial grid are shared.
+        """
+        c = PlanetArrays.__new__(PlanetArrays)
+        c.id, c.x, c.y, c.mass, c.radius, c.recoverable = (
+            self.id, self.x, self.y, self.mass, self.radius, self.recoverable)
+        c.kind = self.kind.copy()
+        c.revealed = self.revealed.copy()
+        c.field = self.field
+        c._index = self._index
+        c._grid = self.grid
+        c._bad = None
+        c.bad_version = 0
+        c.changed_at = np.zeros(len(self.id), dtype=np.int64)
+        return c
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def index_of(self, pid: int) -> int:
+        """Array index of the planet with id `pid` (KeyError if unknown)."""
+        return self._index[pid]
+
+    def find(self, pid: int) -> Optional[int]:
+        """Like index_of, but None for unknown ids."""
+        return self._index.get(pid)
+
+    def reveal(self, i: int) -> None:
+        if not self.revealed[i]:
+            self.revealed[i] = True
+            self._bad_changed(i)
+
+    def set_kind(self, i: int, kind: int) -> None:
+        if self.kind[i] != kind:
+            self.kind[i] = kind
+            self._bad_changed(i)
+
+    def _bad_changed(self, i: int) -> None:
+        is_bad = bool(self.revealed[i]) and self.kind[i] == KIND_BAD
+        if self._bad is not None and is_bad != (i in self._bad[0]):
+            idx = self._bad[0]
+            idx = np.append(idx, i) if is_bad else idx[idx != i]
+            self._bad = self._bad_arrays(np.sort(idx))
+        self.bad_version += 1
+        self.changed_at[i] = self.bad_version
+
+    def changed_since(self, version: int) -> np.ndarray:
+        """Indices of planets revealed or changed kind after bad_version `version`."""
+        return np.flatnonzero(self.changed_at > version)
+
+    def _bad_arrays(self, idx: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # Non-recoverable planets weigh 25% more in the HUD risk term
+        weight = np.where(self.recoverable[idx], 1.0, 1.25)
+        return idx, self.x[idx], self.y[idx], self.mass[idx] * weight
+
+    @property
+    def revealed_bad(self) -> Tuple[np.ndarray, ...]:
+        """(indices, x, y, weighted mass) of the planets revealed as bad."""
+        if self._bad is None:
+            self._bad = self._bad_arrays(np.flatnonzero(self.revealed & (self.kind == KIND_BAD)))
+        return self._bad
+
+    def kind_name(self, i: int) -> str:
+        return KINDS[self.kind[i]]
+
+    def planet(self, i: int) -> Planet:
+        kind = int(self.kind[i])
+        return Planet(
+            id=int(self.id[i]), x=float(self.x[i]), y=float(self.y[i]),
+            mass=float(self.mass[i]), radius=float(self.radius[i]),
+            kind=KINDS[kind], revealed=bool(self.revealed[i]),
+            recoverable=bool(self.recoverable[i]), color=KIND_COLORS[kind],
+        )
+
+    def to_planets(self) -> List[Planet]:
+        return [self.planet(i) for i in range(len(self))]
+
+    def distances(self, x: float, y: float) -> np.ndarray:
+        """Distance from (x, y) to every planet centre."""
+        return np.hypot(self.x - x, self.y - y)
+
+    def accel_at(self, x: float, y: float) -> Tuple[float, float]:
+        """Softened Newtonian acceleration at (x, y), summed over all planets."""
+        if self.field is not None:
+            return self.field.accel_at(x, y)
+        if not len(self):
+            return 0.0, 0.0
+        dx = self.x - x
+        dy = self.y - y
+        r2 = np.maximum(dx * dx + dy * dy, SOFTENING_R2)
+        # a * d / r == G m d / r^3
+        f = G * self.mass / (r2 * np.sqrt(r2))
+        return float(f @ dx), float(f @ dy)
+
+    def potential_at(self, x: float, y: float) -> float:
+        """Gravitational potential matching accel_at (softened inside sqrt(SOFTENING_R2))."""
+        if not len(self):
+            return 0.0
+        r2 = np.maximum((self.x - x) ** 2 + (self.y - y) ** 2, SOFTENING_R2)
+        return float(-G * np.sum(self.mass / np.sqrt(r2)))
+
+    @property
+    def grid(self) -> UniformGrid:
+        """Spatial index over crash/capture reach, built on first use (planets never move)."""
+        if self._grid is None:
+            reach = np.maximum(self.radius * CRASH_RADIUS_FACTOR, self.radius + CAPTURE_MARGIN)
+            self._grid = UniformGrid(self.x, self.y, reach, SPATIAL_CELL_SIZE)
+        return self._grid
+
+    def first_hit(self, x: float, y: float) -> Tuple[int, bool]:
+        """
+        First planet (in list order) that a rocket at (x, y) crashes into or
+        is captured by. Returns (index, crashed), or (-1, False) if none.
+        """
+        near = self.grid.query(x, y)
+        if not near.size:
+            return -1, False
+        radius = self.radius[near]
+        d = np.hypot(self.x[near] - x, self.y[near] - y)
+        crash = d <= radius * CRASH_RADIUS_FACTOR
+        capture = ~self.revealed[near] & (d <= radius + CAPTURE_MARGIN)
+        hits = np.flatnonzero(crash | capture)
+        if not hits.size:
+            return -1, False
+        j = int(hits[0])
+        return int(near[j]), bool(crash[j])
+
+    def first_contact(self, x0: float, y0: float, x1: float, y1: float) -> Tuple[int, bool, float]:
+        """
+        Swept first_hit: the earliest point along the segment (x0, y0)->(x1, y1)
+        where the rocket would crash or be captured. Returns (index, crashed, s)
+        with s in [0, 1] the fraction of the segment flown at contact, or
+        (-1, False, inf). Ties go to the first planet in list order.
+        """
+        near = self.grid.query_segment(x0, y0, x1, y1)
+        if not near.size:
+            return -1, False, np.inf
+        radius = self.radius[near]
+        crash_r = radius * CRASH_RADIUS_FACTOR
+        # Revealed planets only crash; unrevealed ones capture from further out
+        reach = np.where(self.revealed[near], crash_r, np.maximum(crash_r, radius + CAPTURE_MARGIN))
+        s = segment_entry(x0, y0, x1, y1, self.x[near], self.y[near], reach)
+        j = int(np.argmin(s))
+        if not np.isfinite(s[j]):
+            return -1, False, np.inf
+        return int(near[j]), bool(reach[j] == crash_r[j]), float(s[j])
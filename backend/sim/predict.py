@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sim.models import Rocket, Destination
+from sim.planets import PlanetArrays
+from sim.commands import can_plan, finite_arg, plan_args
+from sim.lru import LRUCache
+from sim.integrators import advance
+from sim.physics import first_contact_stop
+from sim.config import (
+    clamp, MAX_WORLD_ABS, INTEGRATOR,
+    PREDICT_DT, PREDICT_HORIZON_S, PREDICT_HORIZON_MAX, PREDICT_PATH_POINTS, PREDICT_CACHE_SIZE,
+    PREDICT_DV_QUANTUM, PREDICT_POS_QUANTUM, PREDICT_VEL_QUANTUM,
+)
+
+def quantize(v: float, q: float) -> float:
+    return round(v / q) * q
+
+def predict_args(data: Dict[str, Any]) -> Tuple[float, float, float]:
+    """(dvx, dvy, horizon) of a predict request. Raises ValueError unless all are finite numbers."""
+    dvx, dvy = plan_args(data)
+    horizon = clamp(finite_arg(data, "horizon", PREDICT_HORIZON_S), PREDICT_DT, PREDICT_HORIZON_MAX)
+    return dvx, dvy, horizon
+
+def predict_trajectory(
+    planets: PlanetArrays,
+    dest: Destination,
+    x: float, y: float, vx: float, vy: float,
+    horizon: float = PREDICT_HORIZON_S,
+    dt: float = PREDICT_DT,
+    integrator: str = INTEGRATOR,
+) -> Dict[str, Any]:
+    """
+    Coast a rocket from (x, y, vx, vy) with the flight physics of step_sim
+    (collision check, integrator step, swept contact, success/bounds check) until the
+    first encounter or the horizon. Pure: nothing in the game state changes.
+    """
+    steps = max(1, int(horizon / dt))
+    stride = max(1, steps // PREDICT_PATH_POINTS)
+    path: List[Tuple[float, float]] = [(x, y)]
+    encounter: Optional[Dict[str, Any]] = None
+    a0 = None
+    t = 0.0
+
+    for n in range(1, steps + 1):
+        i, crashed = planets.first_hit(x, y)
+        if i >= 0:
+            encounter = {"type": "crash" if crashed else "capture", "planet_id": int(planets.id[i])}
+            break
+
+        x0, y0 = x, y
+        x, y, vx, vy, a0, _ = advance(integrator, planets, x, y, vx, vy, dt, a0)
+        t += dt
+        stop = first_contact_stop(planets, dest, x0, y0, x, y)
+        if stop is not None:
+            # Passed through something; the checks below and next round see it
+            x, y = stop
+        if n % stride == 0:
+            path.append((x, y))
+
+        if (x - dest.x) ** 2 + (y - dest.y) ** 2 <= dest.radius ** 2:
+            encounter = {"type": "success"}
+            break
+        if abs(x) > MAX_WORLD_ABS or abs(y) > MAX_WORLD_ABS:
+            encounter = {"type": "out_of_bounds"}
+            break
+
+    if path[-1] != (x, y):
+        path.append((x, y))
+    if encounter is not None:
+        encounter.update({"t": t, "x": x, "y": y})
+    return {"path": path, "encounter": encounter, "horizon": horizon}
+
+def predict_burn(state: Dict[str, Any], dvx: float, dvy: float, horizon: float = PREDICT_HORIZON_S) -> Dict[str, Any]:
+    """
+    Predicted path if (dvx, dvy) were applied now. Results are memoized per
+    session by world version, revealed planets, quantized rocket state and
+    quantized dv, so a joystick dragged at 60 Hz mostly hits the cache.
+    """
+    rocket: Rocket = state["rocket"]
+    planets: PlanetArrays = state["planets"]
+
+    qx, qy = quantize(rocket.x, PREDICT_POS_QUANTUM), quantize(rocket.y, PREDICT_POS_QUANTUM)
+    qvx, qvy = quantize(rocket.vx, PREDICT_VEL_QUANTUM), quantize(rocket.vy, PREDICT_VEL_QUANTUM)
+    qdvx, qdvy = quantize(dvx, PREDICT_DV_QUANTUM), quantize(dvy, PREDICT_DV_QUANTUM)
+    key = (
+        state["world_version"], planets.revealed.tobytes(), state["integrator"], planets.field is not None,
+        qx, qy, qvx, qvy, qdvx, qdvy, horizon,
+    )
+
+    cache: LRUCache = state.get("predict_cache")
+    if cache is None:
+        cache = state["predict_cache"] = LRUCache(PREDICT_CACHE_SIZE)
+
+    result = cache.get(key)
+    cached = result is not None
+    if result is None:
+        result = predict_trajectory(
+            planets, state["dest"], qx, qy, qvx + qdvx, qvy + qdvy,
+            horizon=horizon, integrator=state["integrator"],
+        )
+        cache.put(key, result)
+
+    return {**result, "burn_allowed": can_plan(state), "cached": cached}
@@ -0,0 +1,98 @@
+"""
+Headless replay of recorded input logs (sim.inputlog).
+
+Re-executes a log as fast as the sim runs and checks that the final state
+hashes to the value sealed into the log:
+
+    python -m sim.replay runs/*.dxil
+
+exits non-zero if any log fails to reproduce.
+"""
+import argparse
+import glob
+import hashlib
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from sim.state import new_state
+from sim.world import reset_world
+from sim.physics import step_sim
+from sim.commands import apply_plan, resolve_event
+from sim.warp import warp
+from sim.snapshot import snapshot, restore
+from sim.inputlog import HASH_SIZE, entries
+
+def state_hash(state: Dict[str, Any]) -> bytes:
+    """Digest of the full game (everything a snapshot holds, RNG included)."""
+    return hashlib.blake2b(snapshot(state), digest_size=HASH_SIZE).digest()
+
+def replay(data: bytes, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run a log from its first entry. Returns the final state, its hash, the
+    sealed hash (if any), whether they match, and how many steps ran.
+    """
+    state = state if state is not None else new_state()
+    state["input_log"] = None
+    expected = None
+    steps = 0
+
+    for entry in entries(data):
+        kind = entry[0]
+        if kind == "steps":
+            _, dt, count = entry
+            for _ in range(count):
+                step_sim(state, dt)
+            steps += count
+        elif kind == "plan":
+            apply_plan(state, entry[1], entry[2])
+        elif kind == "warp":
+            warp(state, entry[1], entry[2])
+        elif kind == "choice":
+            resolve_event(state, entry[1])
+        elif kind == "reset":
+            _, seed, integrator, gravity_field = entry
+            state["integrator"] = integrator
+            state["gravity_field"] = gravity_field
+            reset_world(state, seed=seed)
+        elif kind == "snapshot":
+            restore(state, entry[1])
+        elif kind == "hash":
+            expected = entry[1]
+
+    digest = state_hash(state)
+    return {
+        "state": state,
+        "hash": digest.hex(),
+        "expected": expected.hex() if expected is not None else None,
+        "ok": expected is None or digest == expected,
+        "steps": steps,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Replay input logs and verify their final state hash.")
+    ap.add_argument("logs", nargs="+", help="input log files (globs allowed)")
+    args = ap.parse_args(argv)
+
+    paths = [p for pattern in args.logs for p in (glob.glob(pattern) or [pattern])]
+    failed = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        t0 = time.perf_counter()
+        try:
+            result = replay(data)
+        except ValueError as exc:
+            print(f"{path}: ERROR {exc}")
+            failed += 1
+            continue
+        wall = time.perf_counter() - t0
+        state = result["state"]
+        verdict = "ok" if result["expected"] and result["ok"] else ("MISMATCH" if not result["ok"] else "unsealed")
+        failed += not result["ok"]
+        print(f"{path}: {verdict} hash={result['hash']} steps={result['steps']} "
+              f"t={state['t']:.2f} status={state['status']} ({wall * 1000:.0f} ms)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Server-driven fixed-rate ticking.
+
+With SERVER_TICK_HZ > 0 the servers advance every active session themselves
+instead of waiting for clients to POST /api/step: clients read the latest
+state and submit commands. Wall time feeds an accumulator that is spent in
+whole SERVER_TICK_DT steps, so a session's physics never depends on how
+often (or how late) the scheduler wakes up.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from typing import List, Optional
+
+from sim.session import SessionStore, SimSession
+from sim.physics import step_many
+from sim.vector import step_sessions
+from sim.metrics import METRICS
+from sim.config import (
+    SERVER_TICK_HZ, SERVER_TICK_DT, SERVER_TICK_MAX_CATCHUP, SERVER_TICK_ACTIVE_S, SERVER_TICK_VECTORIZED,
+    SERVER_TICK_CHUNK,
+)
+
+log = logging.getLogger(__name__)
+
+TICK_SECONDS = METRICS.histogram("deltax_tick_seconds", "Wall time of one scheduler pass over all sessions.")
+TICK_STEPS = METRICS.counter("deltax_tick_steps_total", "Fixed steps run by the scheduler, and steps dropped on overload.", ("result",))
+TICK_ERRORS = METRICS.counter("deltax_tick_errors_total", "Sessions dropped by the scheduler because stepping them raised.")
+
+class TickScheduler:
+    """
+    Background thread that steps sessions at a fixed rate.
+
+    Each wake-up adds the elapsed wall time to an accumulator and runs
+    floor(acc / dt) steps of exactly `dt` on every session that is running,
+    recently seen, not paused and not waiting on an event prompt (in batched
+    sim.vector passes of `chunk` sessions when `vectorized`, holding only
+    that chunk's locks). If a pass
+    falls behind by more than `max_catchup` steps the excess is dropped: sim
+    time slows down under overload instead of spiralling. A session whose
+    step raises is logged and dropped from the store; the rest keep ticking.
+    """
+
+    def __init__(self, sessions: SessionStore, hz: float = SERVER_TICK_HZ, dt: float = SERVER_TICK_DT,
+                 max_catchup: int = SERVER_TICK_MAX_CATCHUP, active_s: float = SERVER_TICK_ACTIVE_S,
+                 vectorized: bool = SERVER_TICK_VECTORIZED, chunk: int = SERVER_TICK_CHUNK):
+        self.sessions = sessions
+        self.period = 1.0 / hz
+        self.dt = dt
+        self.max_catchup = max_catchup
+        self.active_s = active_s
+        self.vectorized = vectorized
+        self.chunk = chunk
+        self.ticks = 0       # fixed steps run since start
+        self.dropped = 0     # fixed steps skipped on overload
+        self._acc = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _due(sess: SimSession) -> bool:
+        state = sess.state
+        return state["status"] == "running" and state.get("pending_event") is None
+
+    def _step_one(self, sess: SimSession, steps: int) -> None:
+        """step_many on one session (lock held); drops the session if it raises."""
+        try:
+            # step_many stops at a new event prompt, which pauses the session
+            step_many(sess.state, self.dt, steps)
+        except Exception:
+            log.exception("tick failed for session %s; dropping it", sess.id)
+            TICK_ERRORS.inc()
+            self.sessions.drop(sess.id)
+
+    def _step_vectorized(self, active: List[SimSession], steps: int) -> None:
+        """
+        Step due sessions in sim.vector passes of `chunk` sessions, holding
+        only the locks of the chunk being stepped so requests for the others
+        go through meanwhile.
+        """
+        # sim.vector batches sessions of equal planet count, so keep those
+        # together, and the same sessions in a chunk from tick to tick
+        active = sorted(active, key=lambda sess: (len(sess.state["planets"]), sess.id))
+        for lo in range(0, len(active), self.chunk):
+            chunk = active[lo:lo + self.chunk]
+            with ExitStack() as stack:
+                for sess in chunk:
+                    stack.enter_context(sess.lock)
+                due = [sess for sess in chunk if self._due(sess)]
+                t0 = [sess.state["t"] for sess in due]
+                try:
+                    step_sessions([sess.state for sess in due], self.dt, steps)
+                except Exception:
+                    # Finish each session alone from where the pass left it,
+                    # which singles out (and drops) the one that raised
+                    for sess, t in zip(due, t0):
+                        left = steps - round((sess.state["t"] - t) / self.dt)
+                        if left > 0 and self._due(sess):
+                            self._step_one(sess, left)
+
+    def start(self) -> "TickScheduler":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tick-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        last = time.monotonic()
+        next_wake = last + self.period
+        while not self._stop.wait(max(0.0, next_wake - time.monotonic())):
+            now = time.monotonic()
+            try:
+                self.advance(now - last)
+            except Exception:
+                # Never let one bad pass stop server ticking for everyone
+                log.exception("tick pass failed")
+            last = now
+            next_wake += self.period
+            if next_wake < now:
+                # A pass overran its slot; wake again one period from now
+                next_wake = now + self.period
+
+    def advance(self, elapsed: float) -> int:
+        """Spend `elapsed` wall seconds: run the whole fixed steps it buys. Returns steps run."""
+        self._acc += elapsed
+        steps = int(self._acc / self.dt)
+        self._acc -= steps * self.dt
+        if steps > self.max_catchup:
+            self.dropped += steps - self.max_catchup
+            TICK_STEPS.inc("dropped", by=steps - self.max_catchup)
+            steps = self.max_catchup
+        if steps <= 0:
+            return 0
+
+        with TICK_SECONDS.time():
+            cutoff = time.monotonic() - self.active_s
+            active = [sess for sess in self.sessions.all() if not sess.paused and sess.last_seen >= cutoff]
+            if self.vectorized:
+                self._step_vectorized(active, steps)
+            else:
+                for sess in active:
+                    with sess.lock:
+                        if self._due(sess):
+                            self._step_one(sess, steps)
+        self.ticks += steps
+        TICK_STEPS.inc("run", by=steps)
+        return steps
+
+def start_scheduler(sessions: SessionStore) -> Optional[TickScheduler]:
+    """The running scheduler when server ticking is configured, else None."""
+    if SERVER_TICK_HZ <= 0:
+        return None
+    return TickScheduler(sessions).start()
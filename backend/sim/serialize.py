@@ -1,72 +1,181 @@
-from dataclasses import asdict
-from typing import Any, Dict, List
-from sim.state import STATE
-from sim.models import Planet, Rocket, Destination, Camera
-from sim.hud import hud
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
-def serialize_planet(p: Planet) -> Dict[str, Any]:
-    if not p.revealed:
-            color = "grey"
-            status = "unknown"
-    else:
+import numpy as np
+
+from sim.models import Rocket, Destination, Camera
+from sim.planets import PlanetArrays, KINDS, KIND_COLORS
+from sim.hud import hud
+from sim.metrics import PAYLOAD_SECONDS
 
-        status = p.kind # Keep the actual kind
+UNREVEALED_COLOR = "grey"
 
-        # Map specific colors based on the 'kind' or other attributes
-        if p.kind == "good":            # "Good planets"
-            color = "#9bb0ff"
-        elif p.kind == "bad":           # "bad planets", rocket will crash
-            color = "#ff2c2c"
-        elif p.kind == "okay":          # "ish good planet "
-            color = "#FF991c"
+def planet_status_colors(planets: PlanetArrays) -> Tuple[List[str], List[str]]:
+    """Per-planet display status and colour; unrevealed planets hide their kind."""
+    status: List[str] = []
+    color: List[str] = []
+    for k, revealed in zip(planets.kind.tolist(), planets.revealed.tolist()):
+        if revealed:
+            status.append(KINDS[k])
+            color.append(KIND_COLORS[k])
         else:
-            color = "#f8f7ff" # Default white
-            
-        status = p.kind
+            status.append("unknown")
+            color.append(UNREVEALED_COLOR)
+    return status, color
 
-    return {
-        "id": p.id,
-        "x": p.x, "y": p.y,
-        "mass": p.mass,
-        "radius": p.radius,
-        "revealed": p.revealed,
-        "recoverable": p.recoverable,
-        "status": status,
-        "color": color,
-    }
+def serialize_planets(planets: PlanetArrays) -> List[Dict[str, Any]]:
+    """Every planet as a payload dict, read column-wise straight from the arrays."""
+    status, color = planet_status_colors(planets)
+    return [
+        {
+            "id": pid,
+            "x": x, "y": y,
+            "mass": mass,
+            "radius": radius,
+            "revealed": revealed,
+            "recoverable": recoverable,
+            "status": st,
+            "color": c,
+        }
+        for pid, x, y, mass, radius, revealed, recoverable, st, c in zip(
+            planets.id.tolist(), planets.x.tolist(), planets.y.tolist(),
+            planets.mass.tolist(), planets.radius.tolist(),
+            planets.revealed.tolist(), planets.recoverable.tolist(), status, color,
+        )
+    ]
+
+def state_payload(state: Dict[str, Any]) -> Dict[str, Any]:
+    with PAYLOAD_SECONDS.labels("state_payload").time():
+        dest: Destination = state["dest"]
 
-def state_payload() -> Dict[str, Any]:
-    rocket: Rocket = STATE["rocket"]
-    dest: Destination = STATE["dest"]
-    cam: Camera = STATE["camera"]
-    planets: List[Planet] = STATE["planets"]
+        payload = dynamic_payload(state)
+        payload["seed"] = state.get("seed")
+        payload["destination"] = dest.to_dict()
+        payload["planets"] = serialize_planets(state["planets"])
+        return payload
+
+def dynamic_payload(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Everything in state_payload except the static world (seed, destination, planets)."""
+    rocket: Rocket = state["rocket"]
+    cam: Camera = state["camera"]
+    with PAYLOAD_SECONDS.labels("hud").time():
+        hud_block = hud(state)
 
     return {
-        "t": STATE["t"],
-        "seed": STATE.get("seed"),
-        "rocket": asdict(rocket),
-        "destination": asdict(dest),
-        "camera": asdict(cam),
-        "planets": [serialize_planet(p) for p in planets],
-        "hud": hud(),
+        "t": state["t"],
+        "rocket": rocket.to_dict(),
+        "camera": cam.to_dict(),
+        "hud": hud_block,
 
         # --- ADD THESE TWO LINES ---
-        "latched_planet_id": STATE.get("latched_planet_id"),
-        "countdown": STATE.get("countdown", 0.0),
+        "latched_planet_id": state.get("latched_planet_id"),
+        "countdown": state.get("countdown", 0.0),
 
         # --- CRITICAL: Add these lines ---
-        "consecutive_burns": STATE.get("consecutive_burns", 0),
-        "space_burns_left": STATE.get("space_burns_left", 10),
-        "can_space_burn": STATE.get("can_space_burn", True),
+        "consecutive_burns": state.get("consecutive_burns", 0),
+        "space_burns_left": state.get("space_burns_left", 10),
+        "can_space_burn": state.get("can_space_burn", True),
         
-        "fuel": STATE.get("fuel", 100.0),
-        "oxygen": STATE.get("oxygen", 100.0),
-        "food": STATE.get("food", 100.0),
-        "water": STATE.get("water", 100.0),
-        "crew_health": STATE.get("crew_health", 100.0),
-        "morale": STATE.get("morale", 100.0),
-
-        "pending_event": STATE.get("pending_event"),
-        "ship_health": STATE.get("ship_health", 100.0),
-        "fail_reason": STATE.get("fail_reason"),
+        "fuel": state.get("fuel", 100.0),
+        "oxygen": state.get("oxygen", 100.0),
+        "food": state.get("food", 100.0),
+        "water": state.get("water", 100.0),
+        "crew_health": state.get("crew_health", 100.0),
+        "morale": state.get("morale", 100.0),
+
+        "pending_event": state.get("pending_event"),
+        "ship_health": state.get("ship_health", 100.0),
+        "fail_reason": state.get("fail_reason"),
+    }
+
+# -------------------------
+# Versioned (delta) payloads
+# -------------------------
+# The static world only changes on reset, so it is serialized once per world
+# and sent only when the client has no usable base version. Everything else is
+# diffed per top-level field against the snapshot the client acknowledged.
+
+DELTA_HISTORY = 8  # how many past snapshots a client may ack against
+
+def planets_dynamic(planets: PlanetArrays, idx: Optional[np.ndarray] = None) -> Dict[str, Dict[str, Any]]:
+    """The per-planet fields that can change after reset, keyed by planet id (only `idx` if given)."""
+    if idx is None:
+        status, color = planet_status_colors(planets)
+        ids, revealed = planets.id.tolist(), planets.revealed.tolist()
+    else:
+        ids, kinds, revealed = planets.id[idx].tolist(), planets.kind[idx].tolist(), planets.revealed[idx].tolist()
+        status = [KINDS[k] if r else "unknown" for k, r in zip(kinds, revealed)]
+        color = [KIND_COLORS[k] if r else UNREVEALED_COLOR for k, r in zip(kinds, revealed)]
+    return {
+        str(pid): {"revealed": r, "status": st, "color": c}
+        for pid, r, st, c in zip(ids, revealed, status, color)
+    }
+
+def world_static_json(state: Dict[str, Any]) -> str:
+    """Pre-serialized static world, cached until the next reset."""
+    cached = state.get("world_static")
+    if cached is not None and cached[0] == state["world_version"]:
+        return cached[1]
+
+    dest: Destination = state["dest"]
+    planets: PlanetArrays = state["planets"]
+    text = json.dumps({
+        "world_version": state["world_version"],
+        "seed": state.get("seed"),
+        "destination": dest.to_dict(),
+        "planets": [
+            {"id": pid, "x": x, "y": y, "mass": mass, "radius": radius, "recoverable": recoverable}
+            for pid, x, y, mass, radius, recoverable in zip(
+                planets.id.tolist(), planets.x.tolist(), planets.y.tolist(),
+                planets.mass.tolist(), planets.radius.tolist(), planets.recoverable.tolist(),
+            )
+        ],
+    })
+    state["world_static"] = (state["world_version"], text)
+    return text
+
+def versioned_payload(state: Dict[str, Any], since: Optional[int], extra: Dict[str, Any]) -> str:
+    """
+    JSON text for a versioned reply. With a known `since` version from the same
+    world only changed fields are sent; otherwise the full dynamic state plus
+    the cached static world (under "world").
+    """
+    with PAYLOAD_SECONDS.labels("versioned_payload").time():
+        return _versioned_payload(state, since, extra)
+
+def _versioned_payload(state: Dict[str, Any], since: Optional[int], extra: Dict[str, Any]) -> str:
+    current = dynamic_payload(state)
+    planets: PlanetArrays = state["planets"]
+
+    history: Dict[int, Any] = state.setdefault("delta_history", {})
+    base = history.get(since) if since is not None else None
+    if base is not None and base[0] != state["world_version"]:
+        base = None
+
+    version = state.get("delta_version", 0) + 1
+    state["delta_version"] = version
+    history[version] = (state["world_version"], current, planets.bad_version)
+    for old in [v for v in history if v <= version - DELTA_HISTORY]:
+        del history[old]
+
+    if base is None:
+        changed, changed_planets = current, planets_dynamic(planets)
+    else:
+        # Planets only change by reveal / kind change, so send just those since the base
+        _, base_fields, base_bad_version = base
+        changed = {k: v for k, v in current.items() if k not in base_fields or base_fields[k] != v}
+        changed_planets = planets_dynamic(planets, planets.changed_since(base_bad_version))
+
+    body = {
+        "version": version,
+        "base": since if base is not None else None,
+        "world_version": state["world_version"],
+        "state": changed,
+        "planets": changed_planets,
+        **extra,
     }
+    with PAYLOAD_SECONDS.labels("json").time():
+        text = json.dumps(body)
+    if base is None:
+        text = '{"world": ' + world_static_json(state) + ", " + text[1:]
+    return text
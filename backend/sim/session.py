@@ -0,0 +1,107 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from random import Random
+from typing import Any, Dict, List, Optional
+
+from sim.state import new_state
+from sim.world import reset_world
+from sim.inputlog import InputLog
+from sim.trajectory import Trajectory
+from sim.config import SESSION_IDLE_TTL_S, SESSION_MAX, RECORD_INPUTS, TRAJECTORY_CAPACITY
+
+@dataclass(slots=True)
+class SimSession:
+    """One game: its world, rocket, resources and RNG all live in `state`."""
+    id: str
+    state: Dict[str, Any] = field(default_factory=new_state)
+    # Held while a request reads or mutates `state`
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_seen: float = field(default_factory=time.monotonic)
+    # Skipped by the tick scheduler (sim.scheduler) while set
+    paused: bool = False
+
+    @property
+    def rng(self) -> Random:
+        return self.state["rng"]
+
+class SessionStore:
+    """
+    In-process session store keyed by session id.
+
+    Sessions idle for longer than `idle_ttl` are evicted, and once `max_sessions`
+    is reached the least recently used session makes room for the new one.
+    """
+
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL_S, max_sessions: int = SESSION_MAX):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SimSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, sid: Optional[str]) -> Optional[SimSession]:
+        if not sid:
+            return None
+        with self._lock:
+            sess = self._sessions.get(sid)
+            if sess is None:
+                return None
+            now = time.monotonic()
+            if now - sess.last_seen > self.idle_ttl:
+                del self._sessions[sid]
+                return None
+            sess.last_seen = now
+            self._sessions.move_to_end(sid)
+            return sess
+
+    def create(self, seed: Optional[int] = None) -> SimSession:
+        sess = SimSession(id=secrets.token_urlsafe(12))
+        if RECORD_INPUTS:
+            sess.state["input_log"] = InputLog()
+        if TRAJECTORY_CAPACITY > 0:
+            sess.state["trajectory"] = Trajectory()
+        reset_world(sess.state, seed=seed)
+        with self._lock:
+            self._evict_locked()
+            self._sessions[sess.id] = sess
+        return sess
+
+    def all(self) -> List[SimSession]:
+        """Current sessions, copied so callers can iterate without the store lock."""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def touch(self, sess: SimSession) -> None:
+        """Mark a session as active (long-lived connections call this per tick)."""
+        with self._lock:
+            sess.last_seen = time.monotonic()
+            if sess.id in self._sessions:
+                self._sessions.move_to_end(sess.id)
+
+    def get_or_create(self, sid: Optional[str]) -> SimSession:
+        return self.get(sid) or self.create()
+
+    def drop(self, sid: str) -> None:
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        # OrderedDict is kept in last-seen order, so idle sessions sit at the front
+        evicted = 0
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            sess = next(iter(self._sessions.values()))
+            if sess.last_seen >= cutoff and len(self._sessions) < self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
@@ -0,0 +1,240 @@
+"""
+Compact binary snapshots of a whole game.
+
+Unlike state_payload, a snapshot keeps everything needed to continue the
+run bit-for-bit, hidden state included: planet kinds, grace counters, the
+last event type and the session RNG. Layout (little-endian):
+
+    header    magic b"DXSN", format version, flags, planet count
+    scalars   struct of every float/int field (SCALARS)
+    meta      u32 length + JSON of the optional and free-form fields (META)
+    rng       625 x u32 Mersenne Twister state, gauss_next flag + double
+    planets   kind (i1) and revealed (?) per planet, and with FLAG_WORLD
+              also id (i8), x, y, mass, radius (f8) and recoverable (?)
+
+Worlds generated from a seed are not embedded: restore rebuilds them from
+the world cache, so a typical snapshot is about 3 KB.
+"""
+import json
+import math
+import struct
+from typing import Any, Dict
+
+import numpy as np
+
+from sim.models import Rocket, Destination, Camera
+from sim.planets import PlanetArrays, KINDS
+from sim.world import cached_world
+from sim.field import field_for
+from sim.trajectory import record as record_trajectory
+from sim.integrators import INTEGRATORS
+
+MAGIC = b"DXSN"
+FORMAT_VERSION = 1
+
+FLAG_WORLD = 1  # planet geometry is embedded (world not reproducible from the seed)
+
+HEADER = struct.Struct("<4sBBI")
+FLOAT_KEYS = (
+    "t", "last_plan_time", "countdown",
+    "fuel", "oxygen", "food", "water", "crew_health", "ship_health", "morale",
+)
+INT_KEYS = ("space_burns_left", "consecutive_burns")
+BOOL_KEYS = ("can_space_burn", "gravity_field", "water_recycler_broken")
+# rocket (4), destination (3) and camera (3), then the keyed fields
+SCALARS = struct.Struct(f"<{10 + len(FLOAT_KEYS)}d{len(INT_KEYS)}q{len(BOOL_KEYS)}B")
+STATUSES = ("running", "success", "failed")
+EVENT_TYPES = ("planet_latch_repair", "planet_crew_rest", "planet_water_recycler")  # see physics.maybe_create_latch_event
+
+def _count(v: Any) -> bool:
+    return type(v) is int and v >= 0
+
+def _event_ok(ev: Any) -> bool:
+    return (
+        isinstance(ev, dict)
+        and set(ev) == {"type", "planet_id", "prompt", "choices"}
+        and ev["type"] in EVENT_TYPES
+        and type(ev["planet_id"]) is int
+        and isinstance(ev["prompt"], str)
+        and isinstance(ev["choices"], list)
+        and all(isinstance(c, dict) and set(c) == {"id", "label"}
+                and all(isinstance(s, str) for s in c.values()) for c in ev["choices"])
+    )
+
+# The optional and free-form fields, each with what restore accepts for it
+META_CHECKS = {
+    "status": lambda v: v in STATUSES,
+    "fail_reason": lambda v: v is None or isinstance(v, str),
+    "seed": lambda v: v is None or type(v) is int,
+    "pending_event": lambda v: v is None or _event_ok(v),
+    "latched_planet_id": lambda v: v is None or type(v) is int,
+    "good_streak": _count,
+    "water_grace_planets": lambda v: v is None or _count(v),
+    "food_grace_planets": lambda v: v is None or _count(v),
+    "last_event_type": lambda v: v is None or v in EVENT_TYPES,
+    "integrator": lambda v: v in INTEGRATORS,
+}
+META = tuple(META_CHECKS)
+RNG_WORDS = 625
+RNG = struct.Struct(f"<{RNG_WORDS}IBd")
+U32 = struct.Struct("<I")
+
+def _world_from_seed(state: Dict[str, Any]) -> bool:
+    """True when the planets (and destination) are exactly what the seed generates."""
+    seed = state.get("seed")
+    if seed is None:
+        return False
+    world = cached_world(seed)
+    planets: PlanetArrays = state["planets"]
+    tpl = world.planets
+    dest: Destination = state["dest"]
+    return (
+        (dest.x, dest.y, dest.radius) == world.dest
+        and len(planets) == len(tpl)
+        and all(np.array_equal(getattr(planets, k), getattr(tpl, k))
+                for k in ("id", "x", "y", "mass", "radius", "recoverable"))
+    )
+
+def _check_fields(values: tuple, meta: Any) -> None:
+    """Raise ValueError unless the decoded scalars and meta are ones a game could have."""
+    if not all(math.isfinite(v) for v in values[:10 + len(FLOAT_KEYS)]):
+        raise ValueError("snapshot has non-finite scalars")
+    if any(v < 0 for v in values[10 + len(FLOAT_KEYS):10 + len(FLOAT_KEYS) + len(INT_KEYS)]):
+        raise ValueError("snapshot has negative counters")
+    if not isinstance(meta, dict):
+        raise ValueError("snapshot meta is not an object")
+    for k, v in meta.items():
+        if k not in META_CHECKS:
+            raise ValueError(f"snapshot has unknown field {k!r}")
+        if not META_CHECKS[k](v):
+            raise ValueError(f"snapshot has invalid {k}")
+
+def _check_planets(meta: Dict[str, Any], planets: PlanetArrays) -> None:
+    latched = meta.get("latched_planet_id")
+    if latched is not None and latched not in planets.id:
+        raise ValueError("snapshot is latched to a planet that does not exist")
+    if np.any((planets.kind < 0) | (planets.kind >= len(KINDS))):
+        raise ValueError("snapshot has invalid planet kinds")
+    if not all(np.isfinite(a).all() for a in (planets.x, planets.y, planets.mass, planets.radius)):
+        raise ValueError("snapshot has non-finite planet geometry")
+
+def snapshot(state: Dict[str, Any]) -> bytes:
+    """Serialize the full game in `state`. Does not modify it."""
+    rocket: Rocket = state["rocket"]
+    dest: Destination = state["dest"]
+    cam: Camera = state["camera"]
+    planets: PlanetArrays = state["planets"]
+
+    flags = 0 if _world_from_seed(state) else FLAG_WORLD
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(planets))]
+
+    parts.append(SCALARS.pack(
+        rocket.x, rocket.y, rocket.vx, rocket.vy,
+        dest.x, dest.y, dest.radius,
+        cam.cx, cam.cy, cam.zoom,
+        *(float(state.get(k, 0.0)) for k in FLOAT_KEYS),
+        *(int(state.get(k, 0)) for k in INT_KEYS),
+        *(bool(state.get(k, False)) for k in BOOL_KEYS),
+    ))
+
+    meta = json.dumps({k: state.get(k) for k in META}, separators=(",", ":")).encode()
+    parts.append(U32.pack(len(meta)))
+    parts.append(meta)
+
+    _, words, gauss = state["rng"].getstate()
+    parts.append(RNG.pack(*words, gauss is not None, gauss or 0.0))
+
+    parts.append(planets.kind.astype(np.int8).tobytes())
+    parts.append(planets.revealed.astype(bool).tobytes())
+    if flags & FLAG_WORLD:
+        parts.append(planets.id.astype("<i8").tobytes())
+        for arr in (planets.x, planets.y, planets.mass, planets.radius):
+            parts.append(arr.astype("<f8").tobytes())
+        parts.append(planets.recoverable.astype(bool).tobytes())
+    return b"".join(parts)
+
+def restore(state: Dict[str, Any], blob: bytes) -> None:
+    """
+    Load a snapshot into `state` in place. Session-level settings not in the
+    snapshot are untouched. Raises ValueError on a malformed or foreign blob,
+    or one whose fields no game could have; `state` is then left as it was.
+    """
+    try:
+        magic, version, flags, n = HEADER.unpack_from(blob, 0)
+    except struct.error:
+        raise ValueError("snapshot too short")
+    if magic != MAGIC:
+        raise ValueError("not a snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+
+    try:
+        off = HEADER.size
+        values = SCALARS.unpack_from(blob, off)
+        off += SCALARS.size
+        (meta_len,) = U32.unpack_from(blob, off)
+        off += U32.size
+        meta = json.loads(blob[off:off + meta_len])
+        off += meta_len
+        rng_values = RNG.unpack_from(blob, off)
+        off += RNG.size
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            nonlocal off
+            size = np.dtype(dtype).itemsize * count
+            if off + size > len(blob):
+                raise ValueError("snapshot truncated")
+            arr = np.frombuffer(blob, dtype=dtype, count=count, offset=off).copy()
+            off += size
+            return arr
+
+        kind = take("i1", n)
+        revealed = take("?", n)
+        if flags & FLAG_WORLD:
+            ids = take("<i8", n)
+            x, y, mass, radius = (take("<f8", n) for _ in range(4))
+            recoverable = take("?", n)
+    except (struct.error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"corrupt snapshot: {exc}")
+
+    _check_fields(values, meta)
+    if flags & FLAG_WORLD:
+        planets = PlanetArrays(ids, x, y, mass, radius, kind, revealed, recoverable)
+    else:
+        if meta.get("seed") is None:
+            raise ValueError("snapshot has neither a seed nor an embedded world")
+        planets = cached_world(meta["seed"]).planets.clone()
+        if len(planets) != n:
+            raise ValueError("snapshot does not match the world of its seed")
+        planets.kind[:] = kind
+        planets.revealed[:] = revealed
+    _check_planets(meta, planets)
+
+    it = iter(values)
+    state["rocket"] = Rocket(next(it), next(it), next(it), next(it))
+    state["dest"] = Destination(next(it), next(it), next(it))
+    state["camera"] = Camera(next(it), next(it), next(it))
+    for k in FLOAT_KEYS:
+        state[k] = next(it)
+    for k in INT_KEYS:
+        state[k] = next(it)
+    for k in BOOL_KEYS:
+        state[k] = bool(next(it))
+    state.update(meta)
+
+    *words, has_gauss, gauss = rng_values
+    state["rng"].setstate((3, tuple(words), gauss if has_gauss else None))
+
+    if state.get("gravity_field"):
+        planets.field = field_for(planets.x, planets.y, planets.mass)
+    state["planets"] = planets
+    state["accel_cache"] = None
+    log = state.get("input_log")
+    if log is not None:
+        log.start_snapshot(bytes(blob))
+    traj = state.get("trajectory")
+    if traj is not None:
+        traj.clear()
+        record_trajectory(state)
+    # A restore is a new world as far as clients and payload caches can tell
+    state["world_version"] = state.get("world_version", 0) + 1
@@ -0,0 +1,56 @@
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+class UniformGrid:
+    """
+    Static uniform grid over circles (planet centre + reach radius).
+
+    Each circle is registered in every cell its bounding box touches, so a
+    point query is a single dict lookup that returns every circle that could
+    contain the point. Only occupied cells are stored, so memory does not grow
+    with the size of the playable area.
+    """
+
+    __slots__ = ("cell", "_cells")
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, reach: np.ndarray, cell: float):
+        self.cell = float(cell)
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        inv = 1.0 / self.cell
+        for i in range(len(x)):
+            r = float(reach[i])
+            x0, x1 = math.floor((x[i] - r) * inv), math.floor((x[i] + r) * inv)
+            y0, y1 = math.floor((y[i] - r) * inv), math.floor((y[i] + r) * inv)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cells.setdefault((cx, cy), []).append(i)
+        # Indices stay ascending so callers keep list-order priority
+        self._cells = {k: np.asarray(v, dtype=np.intp) for k, v in cells.items()}
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def query(self, x: float, y: float) -> np.ndarray:
+        """Indices of circles whose bounding box covers (x, y), ascending."""
+        key = (math.floor(x / self.cell), math.floor(y / self.cell))
+        return self._cells.get(key, _EMPTY)
+
+    def query_segment(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Indices of circles whose bounding box meets the segment's bounding box, ascending."""
+        cx0, cx1 = sorted((math.floor(x0 / self.cell), math.floor(x1 / self.cell)))
+        cy0, cy1 = sorted((math.floor(y0 / self.cell), math.floor(y1 / self.cell)))
+        if cx0 == cx1 and cy0 == cy1:
+            return self._cells.get((cx0, cy0), _EMPTY)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(self._cells):
+            found = [self._cells.get((cx, cy)) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        else:
+            # A long segment: cheaper to scan the occupied cells
+            found = [v for (cx, cy), v in self._cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        found = [v for v in found if v is not None]
+        if not found:
+            return _EMPTY
+        return np.unique(np.concatenate(found))
@@ -0,0 +1,156 @@
+"""
+Server-side flight history.
+
+Every session keeps a fixed-size ring buffer of (t, x, y, vx, vy) samples,
+taken at most every TRAJECTORY_SAMPLE_DT of sim time, so a reconnecting
+client or an analytics job can fetch the path flown so far instead of
+rebuilding it from step replies. `decimate` thins a path to a point budget
+with Douglas-Peucker.
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from sim.config import clamp, TRAJECTORY_CAPACITY, TRAJECTORY_SAMPLE_DT, TRAJECTORY_POINTS, TRAJECTORY_POINTS_MAX
+
+# Sample columns
+T, X, Y, VX, VY = range(5)
+
+# Rows allocated up front; the buffer doubles from here until it reaches capacity
+INITIAL_ROWS = 64
+
+class Trajectory:
+    """
+    Ring buffer of the newest `capacity` flight samples, oldest overwritten
+    first. Storage grows geometrically as samples arrive, so short-lived
+    sessions never pay for the full ring.
+    """
+
+    __slots__ = ("_buf", "_capacity", "_next", "_count", "every", "_due")
+
+    def __init__(self, capacity: int = TRAJECTORY_CAPACITY, every: float = TRAJECTORY_SAMPLE_DT):
+        self._buf = np.empty((min(capacity, INITIAL_ROWS), 5), dtype=np.float64)
+        self._capacity = capacity
+        self.every = every
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+        self._due = float("-inf")
+
+    def record(self, t: float, x: float, y: float, vx: float, vy: float) -> None:
+        """Store a sample unless the last one is less than `every` sim seconds old."""
+        if t < self._due:
+            return
+        self._due = t + self.every
+        if self._count == len(self._buf) < self._capacity:
+            # Not wrapped yet, so the samples are the first _count rows
+            grown = np.empty((min(2 * len(self._buf), self._capacity), 5), dtype=np.float64)
+            grown[:self._count] = self._buf
+            self._buf = grown
+        i = self._next
+        self._buf[i] = (t, x, y, vx, vy)
+        self._next = (i + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def samples(self) -> np.ndarray:
+        """(n, 5) copy of the held samples, oldest first."""
+        if self._count < self._capacity:
+            return self._buf[:self._count].copy()
+        return np.concatenate((self._buf[self._next:], self._buf[:self._next]))
+
+def record(state: Dict[str, Any]) -> None:
+    """Sample the rocket into the state's trajectory, if it keeps one."""
+    traj: Optional[Trajectory] = state.get("trajectory")
+    if traj is not None:
+        r = state["rocket"]
+        traj.record(state["t"], r.x, r.y, r.vx, r.vy)
+
+def decimate(samples: np.ndarray, budget: int, tolerance: float = 0.0) -> np.ndarray:
+    """
+    Douglas-Peucker on the (x, y) columns, driven by a point budget: segments
+    are split at their farthest point, farthest first, until `budget` points
+    are kept or no point is more than `tolerance` off its segment. Endpoints
+    are always kept; rows come back in time order.
+    """
+    n = len(samples)
+    if n <= 2 or (budget >= n and tolerance <= 0.0):
+        return samples
+    budget = max(budget, 2)
+    xy = samples[:, X:Y + 1]
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    kept = 2
+    heap: List[tuple] = []
+
+    def push(lo: int, hi: int) -> None:
+        if hi - lo < 2:
+            return
+        a, b = xy[lo], xy[hi]
+        pts = xy[lo + 1:hi]
+        seg = b - a
+        length = float(np.hypot(*seg))
+        if length > 0.0:
+            # Perpendicular distance to the line through a and b
+            d = np.abs(seg[0] * (pts[:, 1] - a[1]) - seg[1] * (pts[:, 0] - a[0])) / length
+        else:
+            d = np.hypot(pts[:, 0] - a[0], pts[:, 1] - a[1])
+        i = int(np.argmax(d))
+        heapq.heappush(heap, (-float(d[i]), lo, hi, lo + 1 + i))
+
+    push(0, n - 1)
+    while heap and kept < budget:
+        neg_d, lo, hi, i = heapq.heappop(heap)
+        if -neg_d <= tolerance:
+            break
+        keep[i] = True
+        kept += 1
+        push(lo, i)
+        push(i, hi)
+    return samples[keep]
+
+def trajectory_args(args: Mapping[str, Any]) -> Tuple[int, float]:
+    """
+    (points, tolerance) of a trajectory request's query args. Raises
+    ValueError unless points is an integer and tolerance a finite number >= 0.
+    """
+    try:
+        points = int(args.get("points", TRAJECTORY_POINTS))
+    except (TypeError, ValueError):
+        raise ValueError("points must be an integer") from None
+    try:
+        tolerance = float(args.get("tolerance", 0.0))
+    except (TypeError, ValueError):
+        raise ValueError("tolerance must be a number") from None
+    if not math.isfinite(tolerance) or tolerance < 0.0:
+        raise ValueError("tolerance must be a finite number >= 0")
+    return int(clamp(points, 2, TRAJECTORY_POINTS_MAX)), tolerance
+
+def trajectory_payload(state: Dict[str, Any], budget: int, tolerance: float = 0.0) -> Dict[str, Any]:
+    """The session's flight history, thinned to `budget` points, ending at the rocket now."""
+    traj: Optional[Trajectory] = state.get("trajectory")
+    if traj is None:
+        return {"samples": [], "count": 0, "capacity": 0}
+
+    samples = traj.samples()
+    r = state["rocket"]
+    if not len(samples) or samples[-1, T] < state["t"]:
+        now = np.array([[state["t"], r.x, r.y, r.vx, r.vy]])
+        samples = np.concatenate((samples, now)) if len(samples) else now
+    return {
+        "samples": decimate(samples, budget, tolerance).tolist(),
+        "count": len(samples),
+        "capacity": traj.capacity,
+    }
@@ -0,0 +1,204 @@
+"""
+Vectorized stepping of many sessions at once.
+
+`step_sessions` advances a list of game states by `steps` x `dt`. Sessions
+that are flying freely (running, no event prompt, not latched, Euler
+integrator, exact gravity) are gathered into arrays per planet count and
+stepped together: resource decay, morale, gravity, integration, success and
+bounds checks and camera easing are one NumPy pass per step for the group.
+
+The batched arithmetic is the same as step_sim's, operation for operation
+(per-session gravity dot products go through a stacked matmul, which keeps
+BLAS's summation order), so a session ends bit-identical to stepping it
+alone and its input log still replays. Any session that would hit a discrete
+transition in a step (entering a capture/crash radius or touching one along
+the step's path, arming a grace counter, game over, success, out of bounds)
+is put back to its state before
+that step and finishes through step_many.
+"""
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from sim.physics import step_many
+from sim.planets import PlanetArrays, CAPTURE_MARGIN
+from sim.snapshot import snapshot
+from sim.trajectory import record as record_trajectory
+from sim.metrics import METRICS
+from sim.mathutil import segment_entry
+from sim.lru import LRUCache
+from sim.config import G, SOFTENING_R2, CRASH_RADIUS_FACTOR, MAX_WORLD_ABS, CAM_ALPHA, STACK_CACHE_SIZE
+
+VECTOR_STEPS = METRICS.counter(
+    "deltax_vector_steps_total", "Session steps run by sim.vector, batched or per session.", ("path",))
+
+# Per-session scalars the batched step changes, gathered into arrays in this order
+FIELDS = ("t", "oxygen", "food", "fuel", "crew_health", "water", "morale")
+
+def batchable(state: Dict[str, Any]) -> bool:
+    """Whether step_sim for this state is the plain free-flight step handled here."""
+    return (
+        state["status"] == "running"
+        and state.get("pending_event") is None
+        and state.get("latched_planet_id") is None
+        and state.get("integrator") == "euler"
+        and state["planets"].field is None
+    )
+
+def step_sessions(states: Sequence[Dict[str, Any]], dt: float, steps: int, camera: bool = True) -> None:
+    """Same effect as step_many(state, dt, steps) on every state (trails are not kept)."""
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for state in states:
+        if batchable(state):
+            groups.setdefault(len(state["planets"]), []).append(state)
+        elif state["status"] == "running":
+            step_many(state, dt, steps)
+    for group in groups.values():
+        _step_group(group, dt, steps, camera)
+
+# Stacked arrays of recently stepped sets of worlds, keyed by the ids of their
+# x arrays. A scheduler steps the same chunks of sessions every tick between
+# resets; each entry keeps its x arrays alive, and so their ids valid.
+_STACK_CACHE = LRUCache(STACK_CACHE_SIZE)
+
+def _stacked_planets(planets: List[PlanetArrays]) -> Tuple[np.ndarray, ...]:
+    """(n, P) planet x, y, G*mass and capture/crash reach, cached per set of worlds."""
+    xs = [p.x for p in planets]
+    key = tuple(map(id, xs))
+    cached = _STACK_CACHE.get(key)
+    if cached is not None:
+        return cached[1]
+    x = np.stack(xs)
+    y = np.stack([p.y for p in planets])
+    gm = G * np.stack([p.mass for p in planets])
+    radius = np.stack([p.radius for p in planets])
+    reach = np.maximum(radius * CRASH_RADIUS_FACTOR, radius + CAPTURE_MARGIN)
+    stacked = (x, y, gm, reach)
+    _STACK_CACHE.put(key, (xs, stacked))
+    return stacked
+
+def _step_group(states: List[Dict[str, Any]], dt: float, steps: int, camera: bool) -> None:
+    px, py, gm, reach = _stacked_planets([s["planets"] for s in states])
+
+    rockets = [s["rocket"] for s in states]
+    x = np.array([r.x for r in rockets])
+    y = np.array([r.y for r in rockets])
+    vx = np.array([r.vx for r in rockets])
+    vy = np.array([r.vy for r in rockets])
+    t, oxygen, food, fuel, crew, water, morale = (np.array([float(s[k]) for s in states]) for k in FIELDS)
+    ship = np.array([float(s.get("ship_health", 100.0)) for s in states])
+    water_drain = np.array([0.10 * dt if s.get("water_recycler_broken", False) else 0.04 * dt for s in states])
+    water_grace_unset = np.array([s.get("water_grace_planets") is None for s in states])
+    food_grace_unset = np.array([s.get("food_grace_planets") is None for s in states])
+    dest_x = np.array([s["dest"].x for s in states])
+    dest_y = np.array([s["dest"].y for s in states])
+    dest_r = np.array([s["dest"].radius for s in states])
+    cams = [s["camera"] for s in states]
+    cx = np.array([c.cx for c in cams])
+    cy = np.array([c.cy for c in cams])
+
+    rows = np.arange(len(states))  # states[rows[i]] is row i of the arrays
+    done = np.zeros(len(states), dtype=np.int64)  # batched steps per state
+
+    for k in range(steps):
+        if not rows.size:
+            break
+        # update_resources (not latched, so fuel drains)
+        o2 = oxygen - 0.05 * dt
+        fd = food - 0.03 * dt
+        fu = fuel - 0.01 * dt
+        cr = np.where((o2 <= 0) | (fd <= 0), crew - 0.5 * dt, crew)
+        wa = water - water_drain
+        o2, fd, wa, fu, cr = (np.maximum(v, 0.0) for v in (o2, fd, wa, fu, cr))
+
+        # update_morale_from_low_stats
+        pen = 5.0 * (o2 < 30) + 25.0 * (fd < 30) + 3.0 * (ship < 30) + 3.0 * (fu < 50)
+        mo = np.maximum(0.0, np.minimum(100.0, morale - pen * dt))
+
+        # Discrete transitions before the flight step: grace arming, game over,
+        # and entering any planet's capture or crash radius
+        flagged = (o2 <= 0) | (mo <= 0) | ((wa <= 0) & water_grace_unset) | ((fd <= 0) & food_grace_unset)
+        ddx = px - x[:, None]
+        ddy = py - y[:, None]
+        flagged |= np.any(np.hypot(ddx, ddy) <= reach, axis=1)
+
+        # Semi-implicit Euler under the summed planet gravity (PlanetArrays.accel_at)
+        r2 = np.maximum(ddx * ddx + ddy * ddy, SOFTENING_R2)
+        f = gm / (r2 * np.sqrt(r2))
+        ax = np.matmul(f[:, None, :], ddx[:, :, None])[:, 0, 0]
+        ay = np.matmul(f[:, None, :], ddy[:, :, None])[:, 0, 0]
+        nvx = vx + ax * dt
+        nvy = vy + ay * dt
+        nx = x + nvx * dt
+        ny = y + nvy * dt
+        nt = t + dt
+
+        # stop_at_first_contact: the step's path touches a reach or the destination
+        flagged |= np.isfinite(segment_entry(x[:, None], y[:, None], nx[:, None], ny[:, None], px, py, reach)).any(axis=1)
+        flagged |= np.isfinite(segment_entry(x, y, nx, ny, dest_x, dest_y, dest_r))
+
+        # check_success_and_bounds
+        sx, sy = nx - dest_x, ny - dest_y
+        flagged |= np.sqrt(sx * sx + sy * sy) <= dest_r
+        flagged |= (np.abs(nx) > MAX_WORLD_ABS) | (np.abs(ny) > MAX_WORLD_ABS)
+
+        if flagged.any():
+            # Back to the pre-step values; these finish one by one
+            keep = ~flagged
+            for i in np.flatnonzero(flagged):
+                state = states[rows[i]]
+                x_, y_, vx_, vy_, cx_, cy_, *values = (
+                    float(a[i]) for a in (x, y, vx, vy, cx, cy, t, oxygen, food, fuel, crew, water, morale))
+                _write_back(state, x_, y_, vx_, vy_, cx_, cy_, values, int(done[rows[i]]), dt)
+                step_many(state, dt, steps - k)
+                VECTOR_STEPS.inc("scalar", by=steps - k)
+            rows = rows[keep]
+            px, py, gm, reach = px[keep], py[keep], gm[keep], reach[keep]
+            (nx, ny, nvx, nvy, nt, o2, fd, fu, cr, wa, mo, ship, water_drain, water_grace_unset, food_grace_unset,
+             dest_x, dest_y, dest_r, cx, cy) = (
+                a[keep] for a in (nx, ny, nvx, nvy, nt, o2, fd, fu, cr, wa, mo, ship, water_drain,
+                                  water_grace_unset, food_grace_unset, dest_x, dest_y, dest_r, cx, cy))
+
+        x, y, vx, vy, t = nx, ny, nvx, nvy, nt
+        oxygen, food, fuel, crew, water, morale = o2, fd, fu, cr, wa, mo
+        done[rows] += 1
+
+        if camera:
+            cx, cy = _ease_camera(x, y, vx, vy, cx, cy)
+
+    columns = [a.tolist() for a in (x, y, vx, vy, cx, cy, t, oxygen, food, fuel, crew, water, morale)]
+    for row, (x_, y_, vx_, vy_, cx_, cy_, *values) in zip(rows.tolist(), zip(*columns)):
+        _write_back(states[row], x_, y_, vx_, vy_, cx_, cy_, values, int(done[row]), dt)
+    VECTOR_STEPS.inc("batched", by=int(done.sum()))
+
+def _ease_camera(x, y, vx, vy, cx, cy) -> Tuple[np.ndarray, np.ndarray]:
+    """update_camera for flying rockets. Speed uses math.hypot, as update_camera does."""
+    speed = np.array([math.hypot(a, b) for a, b in zip(vx.tolist(), vy.tolist())])
+    moving = speed > 1e-6
+    ux = np.divide(vx, speed, out=np.zeros_like(vx), where=moving)
+    uy = np.divide(vy, speed, out=np.zeros_like(vy), where=moving)
+    ahead = np.minimum(220.0, 6.0 * speed)
+    cx = cx + (x + ux * ahead - cx) * CAM_ALPHA
+    cy = cy + (y + uy * ahead - cy) * CAM_ALPHA
+    # Safety snap when the rocket gets more than 800 units away
+    dx, dy = x - cx, y - cy
+    snap = (dx * dx + dy * dy) > 800.0 * 800.0
+    return np.where(snap, x, cx), np.where(snap, y, cy)
+
+def _write_back(state: Dict[str, Any], x: float, y: float, vx: float, vy: float, cx: float, cy: float,
+                values: Sequence[float], steps: int, dt: float) -> None:
+    rocket = state["rocket"]
+    rocket.x, rocket.y, rocket.vx, rocket.vy = x, y, vx, vy
+    cam = state["camera"]
+    cam.cx, cam.cy = cx, cy
+    state.update(zip(FIELDS, values))
+    if not steps:
+        return
+    state["accel_cache"] = None
+    record_trajectory(state)
+    log = state.get("input_log")
+    if log is not None:
+        log.step(dt, steps)
+        if log.full:
+            log.start_snapshot(snapshot(state))
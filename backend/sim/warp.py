@@ -0,0 +1,180 @@
+"""
+Time warp: coast to the next discrete event in one call.
+
+A warp runs the same steps of the session's `dt` that stepping would, with
+the session's integrator, so it lands in exactly the state stepping would.
+What it saves is the per-step work that cannot matter in open space: while
+the path stays more than WARP_MARGIN clear of every capture/crash radius,
+the destination and the world edge, a step is just the flight integration
+plus the resource, morale and camera updates, with no collision queries,
+contact sweeps or step timings (a run that ends there is still counted in
+OUTCOMES, as step_sim counts it). Clearance is re-measured only once the path
+flown since the last measurement has used it up. Near anything that could
+fire, the warp falls back to ordinary step_sim calls.
+
+Warps are recorded in the input log as their own entry and replay exactly.
+"""
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from sim.models import Destination
+from sim.planets import PlanetArrays, CAPTURE_MARGIN
+from sim.integrators import advance
+from sim.physics import (
+    step_sim, update_resources, update_morale_from_low_stats,
+    arm_grace_counters_if_needed, check_instant_gameover, update_camera, record_outcome,
+)
+from sim.snapshot import snapshot
+from sim.trajectory import record as record_trajectory
+from sim.metrics import METRICS, outcome_reason
+from sim.config import (
+    clamp, DT_MIN, DT_MAX, INTEGRATOR, MAX_WORLD_ABS, CRASH_RADIUS_FACTOR,
+    WARP_MIN_STEPS, WARP_MARGIN, WARP_HORIZON_S, WARP_HORIZON_MAX,
+)
+
+WARPS = METRICS.counter("deltax_warps_total", "Time warps by what ended them.", ("reason",))
+
+def warp_args(data: Dict[str, Any]) -> Tuple[float, float]:
+    """(dt, horizon) of a warp request: the session step size and the most sim time to cover."""
+    dt = clamp(float(data.get("dt", 0.016)), DT_MIN, DT_MAX)
+    horizon = clamp(float(data.get("horizon", WARP_HORIZON_S)), dt, WARP_HORIZON_MAX)
+    return dt, horizon
+
+def warp_blocker(state: Dict[str, Any]) -> Optional[str]:
+    """Why the state cannot warp right now, or None if it can."""
+    if state["status"] != "running":
+        return state["status"]
+    if state.get("pending_event") is not None:
+        return "event"
+    if state.get("latched_planet_id") is not None:
+        return "latched"
+    return None
+
+def warp(state: Dict[str, Any], dt: float, horizon: float) -> Dict[str, Any]:
+    """
+    Advance up to `horizon` sim seconds, stopping at the step where a capture,
+    crash, success, out-of-bounds, game over or event prompt happens. Returns
+    the sim time covered, step counts and `reason`: "captured", "event",
+    "success", the fail_reason, or "horizon".
+    """
+    blocked = warp_blocker(state)
+    if blocked is not None:
+        return {"warped": 0.0, "coarse_steps": 0, "fine_steps": 0, "reason": blocked}
+
+    log = state.get("input_log")
+    if log is not None:
+        log.warp(dt, horizon)
+    # The warp entry stands for everything below; replay re-runs the warp
+    state["input_log"] = None
+    try:
+        result = _warp(state, dt, horizon)
+    finally:
+        state["input_log"] = log
+
+    if log is not None and log.full:
+        log.start_snapshot(snapshot(state))
+    WARPS.inc(outcome_reason(result["reason"]))
+    return result
+
+def _warp(state: Dict[str, Any], dt: float, horizon: float) -> Dict[str, Any]:
+    t0 = state["t"]
+    left = int(round(horizon / dt))  # budget in session steps
+    coasted = fine = 0
+
+    while left > 0 and warp_blocker(state) is None:
+        n = _coast(state, dt, left)
+        coasted += n
+        left -= n
+        if n >= WARP_MIN_STEPS or warp_blocker(state) is not None:
+            continue
+
+        # Something discrete may be close: take a few ordinary steps
+        for _ in range(min(left, WARP_MIN_STEPS)):
+            step_sim(state, dt)
+            fine += 1
+            left -= 1
+            if warp_blocker(state) is not None:
+                break
+
+    return {
+        "warped": state["t"] - t0,
+        "coarse_steps": coasted,
+        "fine_steps": fine,
+        "reason": _stop_reason(state),
+    }
+
+def _stop_reason(state: Dict[str, Any]) -> str:
+    if state["status"] == "success":
+        return "success"
+    if state["status"] == "failed":
+        return state.get("fail_reason") or "failed"
+    if state.get("latched_planet_id") is not None:
+        return "captured"
+    if state.get("pending_event") is not None:
+        return "event"
+    return "horizon"
+
+def _clearance(planets: PlanetArrays, reach: np.ndarray, dest: Destination, x: float, y: float) -> float:
+    """Distance from (x, y) to the nearest capture/crash radius, destination or world edge."""
+    c = MAX_WORLD_ABS - max(abs(x), abs(y))
+    c = min(c, math.hypot(x - dest.x, y - dest.y) - dest.radius)
+    if len(planets):
+        c = min(c, float(np.min(np.hypot(planets.x - x, planets.y - y) - reach)))
+    return c
+
+def _coast(state: Dict[str, Any], dt: float, budget: int) -> int:
+    """
+    Run up to `budget` steps of `dt` that cannot touch anything, each exactly
+    as step_sim would run it in open space. Stops before the first step whose
+    segment could come within WARP_MARGIN of a capture/crash radius, the
+    destination or the world edge. Returns the steps run.
+    """
+    planets: PlanetArrays = state["planets"]
+    dest: Destination = state["dest"]
+    rocket = state["rocket"]
+    method = state.get("integrator") or INTEGRATOR
+    radius = planets.radius
+    # Revealed planets only crash; unrevealed ones also capture
+    reach = np.where(planets.revealed, radius * CRASH_RADIUS_FACTOR,
+                     np.maximum(radius * CRASH_RADIUS_FACTOR, radius + CAPTURE_MARGIN))
+
+    # Same acceleration reuse as sim.integrators.integrate
+    a0 = None
+    cached = state.get("accel_cache")
+    if cached is not None and cached[:3] == (state["world_version"], rocket.x, rocket.y):
+        a0 = cached[3]
+
+    # Everything within `room` of the last measurement point is clear
+    room = moved = 0.0
+    n = 0
+    while n < budget:
+        x, y = rocket.x, rocket.y
+        nx, ny, nvx, nvy, a1, _ = advance(method, planets, x, y, rocket.vx, rocket.vy, dt, a0)
+        d = math.hypot(nx - x, ny - y)
+        if moved + d >= room:
+            room, moved = _clearance(planets, reach, dest, x, y) - WARP_MARGIN, 0.0
+            if d >= room:
+                break
+
+        # The open-space part of physics._step, in the same order
+        update_resources(state, dt)
+        update_morale_from_low_stats(state, dt)
+        arm_grace_counters_if_needed(state)
+        check_instant_gameover(state)
+        if state["status"] != "running":
+            record_trajectory(state)
+            record_outcome(state)
+            n += 1
+            break
+
+        rocket.x, rocket.y, rocket.vx, rocket.vy = nx, ny, nvx, nvy
+        state["accel_cache"] = (state["world_version"], nx, ny, a1) if a1 is not None else None
+        a0 = a1
+        moved += d
+        state["t"] += dt
+        update_camera(state)
+        record_trajectory(state)
+        n += 1
+    return n
@@ -1,15 +1,39 @@
+import hashlib
+import os
 import random
-from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
-from sim.state import STATE
 from sim.models import Rocket, Planet, Destination, Camera
+from sim.planets import PlanetArrays
+from sim.field import field_for
+from sim.lru import LRUCache
 from sim.mathutil import dist
+from sim.trajectory import record as record_trajectory
 from sim.config import (
     GOOD_COUNT, BAD_COUNT,
     GOOD_MASS_RANGE, BAD_MASS_RANGE,
-    PLANET_RADIUS_RANGE, ZOOM_DEFAULT
+    PLANET_RADIUS_RANGE, ZOOM_DEFAULT,
+    WORLD_CACHE_SIZE, WORLD_CACHE_DIR,
 )
 
+# Rocket start position
+START = (0.0, 0.0)
+
+# Fresh seeds for unseeded resets; never part of a run's own draws
+_SEEDS = random.SystemRandom()
+
+@dataclass(frozen=True)
+class GeneratedWorld:
+    """Everything reset_world derives from the seed. Shared; never mutate."""
+    seed: int
+    dest: Tuple[float, float, float]  # x, y, radius
+    planets: PlanetArrays              # frozen template, see PlanetArrays.clone
+
+_ARRAY_FIELDS = ("id", "x", "y", "mass", "radius", "kind", "revealed", "recoverable")
+
 def generate_good_positions(seed: int) -> List[Tuple[float, float]]:
     """
     Hand-curated-ish "corridor" of planets toward the destination,
@@ -52,49 +76,15 @@ def is_space_free(x: float, y: float, radius: float, existing_planets: List[Plan
             return False
     return True
 
-def reset_world(seed: Optional[int] = None) -> None:
-    seed = int(seed) if seed is not None else random.randint(1, 10_000_000)
+def generate_world(seed: int) -> GeneratedWorld:
+    """Destination and planets for `seed`. Deterministic: same seed, same world."""
     rng = random.Random(seed)
 
-    # Rocket start and destination
-    STATE["t"] = 0.0
-    STATE["status"] = "running"
-    STATE["fail_reason"] = None
-    STATE["last_plan_time"] = -1e9
-    STATE["latched_planet_id"] = None
-    STATE["countdown"] = 10.0
-
-    STATE["space_burns_left"] = 10      
-    STATE["consecutive_burns"] = 0      # this is tracking consecutive burns left
-    STATE["can_space_burn"] = True
-    
-    STATE["fuel"] = 100.0
-    STATE["oxygen"] = 100.0
-    STATE["food"] = 100.0
-    STATE["water"] = 100.0
-    STATE["crew_health"] = 100.0
-    STATE["ship_health"] = 100.0
-    STATE["morale"] = 100.0
-    STATE["good_streak"] = 0
-    STATE["pending_event"] = None
-    STATE["water_grace_planets"] = None
-    STATE["food_grace_planets"] = None
-
-    rocket = Rocket(
-        x=0.0,
-        y=0.0,
-        vx=3.0,
-        vy=0.0,
-    )
-    dest = Destination(
-        x=rng.uniform(2400.0, 2900.0),
-        y=rng.uniform(-120.0, 120.0),
-        radius=40.0,
-    )
+    dest = (rng.uniform(2400.0, 2900.0), rng.uniform(-120.0, 120.0), 40.0)
 
     # Generate planets
     goods = generate_good_positions(seed)
-    bads = generate_bad_positions(seed, (rocket.x, rocket.y), (dest.x, dest.y))
+    bads = generate_bad_positions(seed, START, dest[:2])
 
     planets: List[Planet] = []
     pid = 1
@@ -144,9 +134,124 @@ def reset_world(seed: Optional[int] = None) -> None:
     # Shuffle positions slightly so good/bad aren't visually patterned
     rng.shuffle(planets)
 
-    STATE["rocket"] = rocket
-    STATE["dest"] = dest
-    STATE["planets"] = planets
-    STATE["camera"] = Camera(cx=rocket.x, cy=rocket.y, zoom=ZOOM_DEFAULT)
-    STATE["seed"] = seed
-    STATE["last_event_type"] = None
+    template = PlanetArrays.from_planets(planets)
+    template.freeze()
+    return GeneratedWorld(seed=seed, dest=dest, planets=template)
+
+# -------------------------
+# World cache
+# -------------------------
+
+# Worlds depend only on the seed and these settings; WORLD_GEN_VERSION is
+# bumped whenever generate_world changes so stale disk entries are ignored.
+WORLD_GEN_VERSION = 1
+WORLD_CACHE = LRUCache(WORLD_CACHE_SIZE)
+_disk_stats = {"disk_hits": 0, "disk_writes": 0}
+
+def world_key(seed: int) -> Tuple:
+    return (
+        WORLD_GEN_VERSION, int(seed), START,
+        GOOD_COUNT, BAD_COUNT, GOOD_MASS_RANGE, BAD_MASS_RANGE, PLANET_RADIUS_RANGE,
+    )
+
+def _disk_path(key: Tuple) -> str:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+    return os.path.join(WORLD_CACHE_DIR, f"world-{key[1]}-{digest}.npz")
+
+def _load_world(path: str, seed: int) -> Optional[GeneratedWorld]:
+    try:
+        with np.load(path) as f:
+            template = PlanetArrays(*(f[k] for k in _ARRAY_FIELDS))
+            dest = tuple(float(v) for v in f["dest"])
+    except (OSError, KeyError, ValueError):
+        return None
+    template.freeze()
+    return GeneratedWorld(seed=seed, dest=dest, planets=template)
+
+def _save_world(path: str, world: GeneratedWorld) -> None:
+    os.makedirs(WORLD_CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    arrays = {k: getattr(world.planets, k) for k in _ARRAY_FIELDS}
+    with open(tmp, "wb") as f:
+        np.savez(f, dest=np.asarray(world.dest), **arrays)
+    os.replace(tmp, path)
+
+def cached_world(seed: int) -> GeneratedWorld:
+    """
+    The generated world for `seed`, from memory, then disk (if WORLD_CACHE_DIR
+    is set), then generate_world. Cached worlds are shared and read-only;
+    reset_world clones their planets.
+    """
+    key = world_key(seed)
+    world = WORLD_CACHE.get(key)
+    if world is not None:
+        return world
+
+    path = _disk_path(key) if WORLD_CACHE_DIR else None
+    if path and os.path.exists(path):
+        world = _load_world(path, seed)
+        if world is not None:
+            _disk_stats["disk_hits"] += 1
+    if world is None:
+        world = generate_world(seed)
+        if path:
+            try:
+                _save_world(path, world)
+                _disk_stats["disk_writes"] += 1
+            except OSError:
+                pass  # the disk tier is best-effort
+
+    WORLD_CACHE.put(key, world)
+    return world
+
+def world_cache_stats() -> Dict[str, Any]:
+    return {**WORLD_CACHE.stats(), **_disk_stats}
+
+def reset_world(state: Dict[str, Any], seed: Optional[int] = None) -> None:
+    seed = int(seed) if seed is not None else _SEEDS.randint(1, 10_000_000)
+    world = cached_world(seed)
+    state["rng"].seed(seed)
+
+    state["t"] = 0.0
+    state["status"] = "running"
+    state["fail_reason"] = None
+    state["last_plan_time"] = -1e9
+    state["latched_planet_id"] = None
+    state["countdown"] = 10.0
+
+    state["space_burns_left"] = 10      
+    state["consecutive_burns"] = 0      # this is tracking consecutive burns left
+    state["can_space_burn"] = True
+    
+    state["fuel"] = 100.0
+    state["oxygen"] = 100.0
+    state["food"] = 100.0
+    state["water"] = 100.0
+    state["crew_health"] = 100.0
+    state["ship_health"] = 100.0
+    state["morale"] = 100.0
+    state["good_streak"] = 0
+    state["pending_event"] = None
+    state["water_grace_planets"] = None
+    state["food_grace_planets"] = None
+
+    rocket = Rocket(x=START[0], y=START[1], vx=3.0, vy=0.0)
+    state["rocket"] = rocket
+    state["dest"] = Destination(*world.dest)
+    state["planets"] = world.planets.clone()
+    if state.get("gravity_field"):
+        arrays = state["planets"]
+        arrays.field = field_for(arrays.x, arrays.y, arrays.mass)
+    state["camera"] = Camera(cx=rocket.x, cy=rocket.y, zoom=ZOOM_DEFAULT)
+    state["seed"] = seed
+    state["last_event_type"] = None
+    # Bumped on every reset so cached/delta payloads know the world changed
+    state["world_version"] = state.get("world_version", 0) + 1
+
+    log = state.get("input_log")
+    if log is not None:
+        log.start_reset(seed, state["integrator"], state.get("gravity_field", False))
+    traj = state.get("trajectory")
+    if traj is not None:
+        traj.clear()
+        record_trajectory(state)
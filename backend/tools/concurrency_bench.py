@@ -0,0 +1,112 @@
+"""
+Concurrency benchmark: Flask (app.py) vs the ASGI server (asgi.py).
+
+Starts each server on a local port, then runs N client threads against it.
+Every client owns a session: one /api/reset, then /api/step calls back to
+back for the duration. Reports throughput and latency per server and
+client count.
+
+    python tools/concurrency_bench.py --clients 8,64,256 --seconds 5
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask": lambda port: [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port)],
+    "asgi": lambda port: [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"],
+}
+
+def wait_ready(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1.0)
+            conn.request("GET", "/api/cache")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+def client(port: int, seconds: float, body: Dict[str, Any], latencies: List[float], errors: List[int]) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30.0)
+    headers = {"Content-Type": "application/json"}
+
+    conn.request("POST", "/api/reset", json.dumps({"seed": 42}), headers)
+    headers["X-Session-Id"] = json.loads(conn.getresponse().read())["session_id"]
+    payload = json.dumps(body)
+
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/api/step", payload, headers)
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+        latencies.append(time.perf_counter() - t0)
+        if not ok:
+            errors.append(1)
+
+def run_load(port: int, clients: int, seconds: float, body: Dict[str, Any]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[int] = []
+    threads = [threading.Thread(target=client, args=(port, seconds, body, latencies, errors)) for _ in range(clients)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - t0
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "req_per_sec": len(latencies) / wall,
+        "p50_ms": float(np.percentile(ms, 50)) if ms.size else None,
+        "p95_ms": float(np.percentile(ms, 95)) if ms.size else None,
+        "p99_ms": float(np.percentile(ms, 99)) if ms.size else None,
+        "errors": len(errors),
+    }
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--servers", default="flask,asgi")
+    ap.add_argument("--clients", default="8,64,256", help="comma-separated client counts")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--steps", type=int, default=1, help="substeps per /api/step call")
+    ap.add_argument("--port", type=int, default=5055)
+    args = ap.parse_args()
+
+    body = {"dt": 0.016, "steps": args.steps}
+    report: Dict[str, List[Dict[str, Any]]] = {}
+    for name in args.servers.split(","):
+        proc = subprocess.Popen(SERVERS[name](args.port), cwd=BACKEND,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready(args.port)
+            report[name] = [run_load(args.port, int(n), args.seconds, body) for n in args.clients.split(",")]
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
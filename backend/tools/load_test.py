@@ -0,0 +1,284 @@
+"""
+Load test: N virtual players against a local backend.
+
+Each virtual client plays the way the browser frontend does (frontend/js):
+one /api/reset, then an /api/step every STEP_INTERVAL asking for the sim time
+that passed since the last one, with versioned (`since`) replies. Now and
+then it aims: a burst of /api/predict previews, then an /api/plan burn. It
+answers event prompts with /api/event/resolve after a short think, and
+resets a while after the run ends. Per endpoint it reports throughput,
+p50/p95/p99 latency and error rate, plus how far apart each player's steps
+ended up (STEP_INTERVAL while the server keeps up), as JSON.
+
+    python tools/load_test.py --servers flask,asgi --clients 16,64,256 --seconds 20
+    python tools/load_test.py --url http://127.0.0.1:5000 --clients 100 --out run.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from concurrency_bench import BACKEND, SERVERS, wait_ready
+
+# Client pacing, as in frontend/js/config.js
+STEP_DT = 0.016
+STEP_INTERVAL = 0.1
+STEP_SPAN_MAX = 0.25
+JOY_DV_MAX = 60.0
+
+# Player habits (seconds unless noted)
+AIM_EVERY = 8.0              # mean time between burns
+AIM_PREVIEWS = (3, 8)        # predict calls per aim, inclusive range
+THINK_S = (0.5, 2.0)         # delay before answering an event prompt
+RESTART_S = (1.0, 3.0)       # delay before resetting after a run ends
+
+ENDPOINTS = ("reset", "step", "predict", "plan", "event/resolve")
+
+class Recorder:
+    """Latencies and error counts per endpoint, shared by all client threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {e: [] for e in ENDPOINTS}
+        self.errors: Dict[str, int] = {e: 0 for e in ENDPOINTS}
+        self.recording = False
+
+    def add(self, endpoint: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+class Player:
+    """One virtual player: its own connection, session and client-side state."""
+
+    def __init__(self, host: str, port: int, rec: Recorder, seed: int):
+        self.host, self.port = host, port
+        self.rec = rec
+        self.rng = random.Random(seed)
+        self.conn: Optional[http.client.HTTPConnection] = None
+        self.session_id: Optional[str] = None
+        self.version: Optional[int] = None
+        self.state: Dict[str, Any] = {}
+        self.step_gaps: List[float] = []
+
+    def call(self, endpoint: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """POST /api/<endpoint>; the decoded reply, or None on any failure."""
+        headers = {"Content-Type": "application/json"}
+        if self.session_id:
+            headers["X-Session-Id"] = self.session_id
+        if endpoint != "predict":
+            fields = {**fields, "since": self.version}
+
+        data = None
+        t0 = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30.0)
+            self.conn.request("POST", "/api/" + endpoint, json.dumps(fields), headers)
+            resp = self.conn.getresponse()
+            raw = resp.read()
+            if resp.status == 200:
+                data = json.loads(raw)
+        except (OSError, http.client.HTTPException, ValueError):
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        self.rec.add(endpoint, time.perf_counter() - t0, data is not None)
+
+        if data is not None and endpoint != "predict":
+            self.accept(data)
+        return data
+
+    def accept(self, data: Dict[str, Any]) -> None:
+        """Merge a versioned reply the way frontend/js/api.js does."""
+        self.session_id = data.get("session_id", self.session_id)
+        if "world" not in data and data.get("base") != self.version:
+            self.version = None
+            return
+        if "world" in data:
+            self.state = {}
+        self.state.update(data.get("state", {}))
+        self.version = data.get("version")
+
+    def burn(self) -> Tuple[float, float]:
+        ang = self.rng.uniform(0.0, 2.0 * math.pi)
+        mag = self.rng.uniform(0.1, 1.0) * JOY_DV_MAX
+        return mag * math.cos(ang), mag * math.sin(ang)
+
+    def play(self, until: float) -> None:
+        rng = self.rng
+        # Spread the first requests over one step interval
+        time.sleep(rng.uniform(0.0, STEP_INTERVAL))
+        self.call("reset", {"seed": rng.randrange(2 ** 31)})
+        last_step = time.monotonic()
+        next_aim = last_step + rng.expovariate(1.0 / AIM_EVERY)
+        wait_until: Optional[float] = None
+
+        while True:
+            now = time.monotonic()
+            if now >= until:
+                break
+            status = (self.state.get("hud") or {}).get("status", "running")
+            if self.session_id is None:
+                self.call("reset", {"seed": rng.randrange(2 ** 31)})
+                last_step = time.monotonic()
+            elif status != "running":
+                # Game over: look at the result for a moment, then play again
+                wait_until = wait_until or now + rng.uniform(*RESTART_S)
+                if now >= wait_until:
+                    self.call("reset", {"seed": rng.randrange(2 ** 31)})
+                    wait_until = None
+                    last_step = time.monotonic()
+            elif self.state.get("pending_event"):
+                # Stepping pauses while the prompt is up
+                wait_until = wait_until or now + rng.uniform(*THINK_S)
+                if now >= wait_until:
+                    choices = self.state["pending_event"].get("choices") or [{"id": None}]
+                    self.call("event/resolve", {"choice": rng.choice(choices)["id"]})
+                    wait_until = None
+                    last_step = time.monotonic()
+            elif now >= next_aim:
+                # Drag the joystick around, then let go
+                dvx, dvy = self.burn()
+                for _ in range(rng.randint(*AIM_PREVIEWS)):
+                    dvx, dvy = self.burn()
+                    self.call("predict", {"dvx": dvx, "dvy": dvy})
+                self.call("plan", {"dvx": dvx, "dvy": dvy})
+                next_aim = time.monotonic() + rng.expovariate(1.0 / AIM_EVERY)
+            elif now - last_step >= STEP_INTERVAL:
+                gap = now - last_step
+                last_step = now
+                self.call("step", {"dt": STEP_DT, "span": min(gap, STEP_SPAN_MAX)})
+                if self.rec.recording:
+                    self.step_gaps.append(gap)
+
+            # Wake for the next step, or poll at the step rate while waiting
+            wake = max(last_step, time.monotonic()) + STEP_INTERVAL if wait_until else last_step + STEP_INTERVAL
+            time.sleep(max(0.0, min(wake, until) - time.monotonic()))
+
+        if self.conn is not None:
+            self.conn.close()
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    ms = np.asarray(latencies) * 1000.0
+    pct = lambda q: float(np.percentile(ms, q)) if ms.size else None
+    return {
+        "requests": len(latencies),
+        "req_per_sec": len(latencies) / seconds,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": float(ms.max()) if ms.size else None,
+        "errors": errors,
+        "error_rate": errors / len(latencies) if latencies else 0.0,
+    }
+
+def run_load(host: str, port: int, clients: int, seconds: float, warmup: float, seed: int) -> Dict[str, Any]:
+    """Play `clients` players for warmup + seconds; only the last `seconds` are measured."""
+    rec = Recorder()
+    start = time.monotonic()
+    until = start + warmup + seconds
+    players = [Player(host, port, rec, seed * 100003 + i) for i in range(clients)]
+    threads = [threading.Thread(target=p.play, args=(until,), daemon=True) for p in players]
+    for t in threads:
+        t.start()
+
+    time.sleep(warmup)
+    rec.recording = True
+    measured_from = time.monotonic()
+    for t in threads:
+        t.join()
+    rec.recording = False
+    wall = time.monotonic() - measured_from
+
+    per_endpoint = {e: summarize(rec.latencies[e], rec.errors[e], wall)
+                    for e in ENDPOINTS if rec.latencies[e]}
+    every = [x for e in ENDPOINTS for x in rec.latencies[e]]
+    gaps = np.asarray([g for p in players for g in p.step_gaps]) * 1000.0
+    return {
+        "clients": clients,
+        "seconds": wall,
+        "total": summarize(every, sum(rec.errors.values()), wall),
+        "endpoints": per_endpoint,
+        # Wall time between a player's step requests; grows once replies lag
+        "step_gap_ms": {
+            "target": STEP_INTERVAL * 1000.0,
+            "p50": float(np.percentile(gaps, 50)) if gaps.size else None,
+            "p95": float(np.percentile(gaps, 95)) if gaps.size else None,
+        },
+    }
+
+def commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--servers", default="asgi", help="comma-separated servers to start (flask, asgi)")
+    ap.add_argument("--url", help="load an already running backend instead of starting one")
+    ap.add_argument("--clients", default="16,64,256", help="comma-separated virtual player counts")
+    ap.add_argument("--seconds", type=float, default=20.0, help="measured time per client count")
+    ap.add_argument("--warmup", type=float, default=3.0, help="unmeasured lead-in per client count")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--label", help="free-form note stored in the report, e.g. the server mode")
+    ap.add_argument("--out", help="also write the report to this file")
+    args = ap.parse_args()
+
+    report: Dict[str, Any] = {
+        "label": args.label,
+        "commit": commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "seconds": args.seconds,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "runs": {},
+    }
+    counts = [int(n) for n in args.clients.split(",")]
+
+    if args.url:
+        parts = urlsplit(args.url)
+        report["runs"][args.url] = [
+            run_load(parts.hostname, parts.port or 80, n, args.seconds, args.warmup, args.seed) for n in counts
+        ]
+    else:
+        for name in args.servers.split(","):
+            proc = subprocess.Popen(SERVERS[name](args.port), cwd=BACKEND,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(args.port)
+                report["runs"][name] = [
+                    run_load("127.0.0.1", args.port, n, args.seconds, args.warmup, args.seed) for n in counts
+                ]
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Minimal client for the /api/stream WebSocket.
+
+Connects to a running backend, records frames for a while, sends a couple of
+commands and reports the observed frame rate and whether frames arrived in
+order. Exits non-zero if ordering or command acks look wrong.
+
+    python app.py                      # in one shell
+    python tools/stream_client.py      # in another
+"""
+import argparse
+import json
+import sys
+import time
+
+from simple_websocket import Client, ConnectionClosed
+
+def run(url: str, seconds: float, seed: int) -> dict:
+    ws = Client.connect(url)
+    frames = []
+    sent_ids = []
+    started = time.monotonic()
+
+    ws.send(json.dumps({"cmd": "reset", "seed": seed, "id": 1}))
+    sent_ids.append(1)
+
+    try:
+        while time.monotonic() - started < seconds:
+            msg = ws.receive(timeout=1.0)
+            if msg is None:
+                continue
+            frame = json.loads(msg)
+            frame["received_at"] = time.monotonic()
+            frames.append(frame)
+
+            # Halfway through, push a small burn down the same socket
+            if len(sent_ids) == 1 and frame["received_at"] - started > seconds / 2:
+                ws.send(json.dumps({"cmd": "plan", "dvx": 0.5, "dvy": 0.0, "id": 2}))
+                sent_ids.append(2)
+    except ConnectionClosed:
+        pass
+    finally:
+        ws.close()
+
+    seqs = [f["seq"] for f in frames]
+    # Sim time restarts at our reset, so only frames after its ack must be monotonic
+    times = [f["state"]["t"] for f in frames if f["ack"] is not None]
+    acks = [f["ack"] for f in frames if f["ack"] is not None]
+    span = frames[-1]["received_at"] - frames[0]["received_at"] if len(frames) > 1 else 0.0
+
+    return {
+        "frames": len(frames),
+        "fps": (len(frames) - 1) / span if span > 0 else 0.0,
+        "seq_in_order": all(b == a + 1 for a, b in zip(seqs, seqs[1:])),
+        "sim_time_monotonic": all(b >= a for a, b in zip(times, times[1:])),
+        "acks_in_order": acks == sorted(acks),
+        "last_ack": acks[-1] if acks else None,
+        "expected_last_ack": sent_ids[-1],
+        "sim_time": times[-1] if times else 0.0,
+    }
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--url", default="ws://127.0.0.1:5000/api/stream")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    report = run(args.url, args.seconds, args.seed)
+    print(json.dumps(report, indent=2))
+
+    ok = (report["seq_in_order"] and report["sim_time_monotonic"]
+          and report["acks_in_order"] and report["last_ack"] == report["expected_last_ack"])
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,101 @@
-import { API } from "./config.js";
+import { API, TRAIL_MAX } from "./config.js";
 import { sim, setState } from "./state.js";
 import { updateHUD } from "./hud.js";
+import { pushSnapshot } from "./smooth.js";
+
+// Every call carries our session id so the backend routes it to our game
+function headers() {
+  const h = { "Content-Type": "application/json" };
+  if (sim.sessionId) h["X-Session-Id"] = sim.sessionId;
+  return h;
+}
+
+// Requests ask for versioned replies: only fields that changed since the
+// version we last applied, plus the static world after a reset.
+function body(fields = {}) {
+  return JSON.stringify({ ...fields, since: sim.version ?? null });
+}
+
+// Merge a versioned reply and rebuild the full state object the rest of the
+// client reads (same shape as the plain /api payload). `sentAt` is when the
+// request left, for step replies. Returns false when the reply was discarded.
+function accept(data, sentAt = null) {
+  sim.sessionId = data.session_id;
+  if (!data.world && data.base !== sim.version) {
+    // Diffed against a version we no longer hold (overlapping requests)
+    sim.version = null;
+    return false;
+  }
+  if (data.world) {
+    sim.world = data.world;
+    sim.dynamic = {};
+    sim.planetDynamic = {};
+  }
+  Object.assign(sim.dynamic, data.state);
+  Object.assign(sim.planetDynamic, data.planets);
+  sim.version = data.version;
+
+  setState({
+    ...sim.dynamic,
+    seed: sim.world.seed,
+    destination: sim.world.destination,
+    planets: sim.world.planets.map((p) => ({ ...p, ...sim.planetDynamic[p.id] })),
+  });
+  pushSnapshot(sim.state, { reset: !!data.world, sentAt });
+  return true;
+}
+
+// Accept a reply, or if it was discarded fetch a full one so its changes
+// (a burn, a resolved event) are not lost. True if `data` itself was applied.
+async function merge(data, sentAt = null) {
+  if (accept(data, sentAt)) return true;
+  await apiGetState();
+  return false;
+}
 
 export async function apiGetState() {
-  const res = await fetch(`${API}/state`);
+  const res = await fetch(`${API}/state?since=${sim.version ?? ""}`, { headers: headers() });
   const data = await res.json();
-  setState(data);
+  accept(data);
   return data;
 }
 
 export async function apiReset(seed = null) {
-  const body = seed == null ? {} : { seed };
   const res = await fetch(`${API}/reset`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(body),
+    headers: headers(),
+    body: body(seed == null ? {} : { seed }),
   });
   const data = await res.json();
-  setState(data);
+  await merge(data);
 
-  sim.initialDistance = data.hud.distance_to_destination;
+  sim.initialDistance = sim.state.hud.distance_to_destination;
   sim.trail.length = 0;
-  sim.trail.push({ x: data.rocket.x, y: data.rocket.y });
+  sim.trail.push({ x: sim.state.rocket.x, y: sim.state.rocket.y, t: sim.state.t });
 
   updateHUD();
   return data;
 }
 
-export async function apiStep(dt) {
+// Advance `span` seconds of sim time in substeps of `dt` with a single request
+export async function apiStep(dt, span = dt) {
+  const sentAt = performance.now();
   const res = await fetch(`${API}/step`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ dt }),
+    headers: headers(),
+    body: body({ dt, span }),
   });
   const data = await res.json();
-  setState(data);
+  if (!(await merge(data, sentAt))) {
+    // The trail's times are relative to a state we did not apply
+    updateHUD();
+    return data;
+  }
 
-  sim.trail.push({ x: data.rocket.x, y: data.rocket.y });
+  // Trail points are one substep apart and end at the reply's sim time
+  const t = sim.state.t;
+  data.trail.forEach(([x, y], i) => sim.trail.push({ x, y, t: t - (data.trail.length - 1 - i) * dt }));
+  if (sim.trail.length > TRAIL_MAX) sim.trail.splice(0, sim.trail.length - TRAIL_MAX);
   updateHUD();
   return data;
 }
@@ -44,11 +103,11 @@ export async function apiStep(dt) {
 export async function apiPlan(dvx, dvy) {
   const res = await fetch(`${API}/plan`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ dvx, dvy }),
+    headers: headers(),
+    body: body({ dvx, dvy }),
   });
   const data = await res.json();
-  setState(data);
+  await merge(data);
 
   updateHUD();
   return data;
@@ -57,11 +116,21 @@ export async function apiPlan(dvx, dvy) {
 export async function apiResolveEvent(choice) {
   const res = await fetch(`${API}/event/resolve`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ choice }),
+    headers: headers(),
+    body: body({ choice }),
   });
   const data = await res.json();
-  setState(data);
+  await merge(data);
   updateHUD();
   return data;
 }
+
+// Read-only burn preview: predicted path and first encounter for (dvx, dvy)
+export async function apiPredict(dvx, dvy) {
+  const res = await fetch(`${API}/predict`, {
+    method: "POST",
+    headers: headers(),
+    body: JSON.stringify({ dvx, dvy }),
+  });
+  return res.json();
+}
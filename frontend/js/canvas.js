@@ -44,8 +44,8 @@ export function updateRenderCamera() {
 
   const r = sim.state.rocket;
 
-  // Use backend camera directly
-  const cam = sim.state.camera || { cx: r.x, cy: r.y, zoom: 1.0 };
+  // Smoothed camera when there is one, else the backend camera directly
+  const cam = sim.view?.camera || sim.state.camera || { cx: r.x, cy: r.y, zoom: 1.0 };
 
   sim.renderCam.cx = cam.cx;
   sim.renderCam.cy = cam.cy;
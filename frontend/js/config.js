@@ -1,5 +1,25 @@
 export const API = "http://127.0.0.1:5000/api";
 export const STEP_DT = 0.016;
+// Longest stretch of sim time one /step request may cover (after a stall)
+export const STEP_SPAN_MAX = 0.25;
+// Sim time to collect before sending the next /step request
+export const STEP_INTERVAL = 0.1;
+
+// Rendering between replies (smooth.js): draw this far behind the client's
+// sim clock, predict at most EXTRAPOLATE_MAX past the newest reply, and ease
+// corrections out over CORRECTION_TAU (snapping when larger than SNAP_DISTANCE)
+export const INTERP_DELAY = 0.1;
+export const EXTRAPOLATE_MAX = 1.0;
+export const CORRECTION_TAU = 0.15;
+export const SNAP_DISTANCE = 150;
+export const SNAPSHOT_MAX = 32;
+// Client sim clock drift (seconds) beyond which it jumps to the server's
+export const PLAYHEAD_RESYNC = 0.5;
+
+// Same as backend sim/config.py, for local prediction
+export const G = 1.0;
+export const SOFTENING_R2 = 25.0;
+export const CAM_ALPHA = 0.35;
 
 export const STAR_COUNT = 120;
 export const SHIP_SIZE = 10;
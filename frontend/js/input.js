@@ -1,6 +1,6 @@
 import { sim } from "./state.js";
 import { JOY_DV_MAX, JOY_GAIN } from "./config.js";
-import { apiPlan, apiReset } from "./api.js";
+import { apiPlan, apiPredict, apiReset } from "./api.js";
 import { resetHudFlags } from "./hud.js";
 
 resetHudFlags();
@@ -31,6 +31,46 @@ function dvToG(dv) {
   return a_mps2 / G0;
 }
 
+// Burn the joystick currently points at (same mapping as on release)
+function joystickDv() {
+  const mag = Math.min(1.0, Math.sqrt(sim.joyVec.x ** 2 + sim.joyVec.y ** 2));
+
+  let dvx = -sim.joyVec.x * JOY_GAIN * mag;
+  let dvy =  sim.joyVec.y * JOY_GAIN * mag;
+
+  const m = Math.sqrt(dvx * dvx + dvy * dvy);
+  if (m > JOY_DV_MAX) {
+    dvx = (dvx / m) * JOY_DV_MAX;
+    dvy = (dvy / m) * JOY_DV_MAX;
+  }
+  return { dvx, dvy };
+}
+
+// Keep at most one preview request in flight; the newest stick position wins
+let previewInFlight = false;
+let previewQueued = false;
+
+async function requestPreview() {
+  if (previewInFlight) {
+    previewQueued = true;
+    return;
+  }
+  previewInFlight = true;
+  try {
+    const { dvx, dvy } = joystickDv();
+    const pred = await apiPredict(dvx, dvy);
+    if (sim.joyActive) sim.prediction = pred;
+  } catch (e) {
+    sim.prediction = null;
+  } finally {
+    previewInFlight = false;
+  }
+  if (previewQueued && sim.joyActive) {
+    previewQueued = false;
+    requestPreview();
+  }
+}
+
 function setKnob(joystick, knob, nx, ny) {
   const r = joystick.getBoundingClientRect();
   const radius = Math.min(r.width, r.height) * 0.38;
@@ -111,6 +151,7 @@ export function initInput() {
 
     const dv = plannedDvMag(j.mag);
     joystickMag.textContent = `${dvToG(dv).toFixed(2)} g`;
+    requestPreview();
   });
 
   joystick.addEventListener("pointermove", (evt) => {
@@ -122,22 +163,15 @@ export function initInput() {
 
     const dv = plannedDvMag(j.mag);
     joystickMag.textContent = `${dvToG(dv).toFixed(2)} g`;
+    requestPreview();
   });
 
   joystick.addEventListener("pointerup", async () => {
     sim.joyActive = false;
     sim.started = true;
+    sim.prediction = null;
 
-    const mag = Math.min(1.0, Math.sqrt(sim.joyVec.x ** 2 + sim.joyVec.y ** 2));
-
-    let dvx = -sim.joyVec.x * JOY_GAIN * mag;
-    let dvy =  sim.joyVec.y * JOY_GAIN * mag;
-
-    const m = Math.sqrt(dvx * dvx + dvy * dvy);
-    if (m > JOY_DV_MAX) {
-      dvx = (dvx / m) * JOY_DV_MAX;
-      dvy = (dvy / m) * JOY_DV_MAX;
-    }
+    const { dvx, dvy } = joystickDv();
 
     if (Math.abs(dvx) > 1e-6 || Math.abs(dvy) > 1e-6) {
       await apiPlan(dvx, dvy);
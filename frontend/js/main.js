@@ -1,9 +1,10 @@
-import { STEP_DT } from "./config.js";
+import { STEP_DT, STEP_SPAN_MAX, STEP_INTERVAL } from "./config.js";
 import { sim } from "./state.js";
 import { initCanvas, updateRenderCamera } from "./canvas.js";
 import { initHUD, setStatus } from "./hud.js";
 import { renderFrame } from "./render.js";
 import { initInput } from "./input.js";
+import { updateView } from "./smooth.js";
 import { apiGetState, apiReset, apiStep, apiResolveEvent } from "./api.js";
 
 const { canvas, ctx } = initCanvas();
@@ -23,41 +24,72 @@ if (playBtn && overlay) {
   });
 }
 
-async function tick() {
+let stepInFlight = false;
+let lastStepAt = null;
+
+// Ask the server for all the sim time that has passed since the last step,
+// at most every STEP_INTERVAL: frames in between are drawn by smooth.js.
+// Only one request is in flight at a time, so a slow backend means fewer,
+// larger steps instead of a queue of tiny ones.
+async function advance(now) {
+  if (stepInFlight) return;
+  if (lastStepAt == null) {
+    lastStepAt = now;
+    return;
+  }
+
+  const span = Math.min((now - lastStepAt) / 1000, STEP_SPAN_MAX);
+  if (span < Math.max(STEP_DT, STEP_INTERVAL)) return;
+
+  stepInFlight = true;
+  lastStepAt = now;
+  try {
+    await apiStep(STEP_DT, span);
+  } finally {
+    stepInFlight = false;
+  }
+
+  const status = sim.state?.hud?.status;
+
+  // Show "And then..." overlay on depletion deaths
+  if (status === "failed") {
+    const r = sim.state?.fail_reason;
+
+    const depletionReasons = new Set([
+      "oxygen_depleted",
+      "morale_depleted",
+      "water_depleted",
+      "food_depleted",
+    ]);
+
+    if (depletionReasons.has(r)) {
+      sim.missed = true;    // reuse existing "And then..." overlay logic
+      sim.freeze = true;    // stop stepping
+      sim.started = false;  // stop further stepping
+    } else {
+      // Non-depletion failures still freeze + show miss overlay
+      sim.freeze = true;
+      sim.started = false;
+      const ov = document.getElementById("missOverlay");
+      if (ov) ov.style.display = "grid";
+    }
+  }
+
+  updatePlanetUI();
+}
+
+function tick(now) {
   if (sim.state) {
     const s = sim.state.hud.status;
+    const running = sim.started && !sim.freeze && !sim.missed && (s === "ready" || s === "running");
 
-    if (sim.started && !sim.freeze && !sim.missed && (s === "ready" || s === "running")) {
-      await apiStep(STEP_DT);
-
-      const status = sim.state?.hud?.status;
-
-      // Show "And then..." overlay on depletion deaths
-      if (status === "failed") {
-        const r = sim.state?.fail_reason;
-
-        const depletionReasons = new Set([
-          "oxygen_depleted",
-          "morale_depleted",
-          "water_depleted",
-          "food_depleted",
-        ]);
-
-        if (depletionReasons.has(r)) {
-          sim.missed = true;    // reuse existing "And then..." overlay logic
-          sim.freeze = true;    // stop stepping
-          sim.started = false;  // stop further stepping
-        } else {
-          // Non-depletion failures still freeze + show miss overlay
-          sim.freeze = true;
-          sim.started = false;
-          const ov = document.getElementById("missOverlay");
-          if (ov) ov.style.display = "grid";
-        }
-      }
-
-      updatePlanetUI();
+    if (running) {
+      advance(now);
+    } else {
+      // Don't bill paused time (prompts, overlays) to the next step
+      lastStepAt = null;
     }
+    updateView(now, running);
 
 
     // 2. Trigger the "And then there were none" overlay on failure
@@ -13,7 +13,7 @@ const stars = Array.from({ length: STAR_COUNT }, () => ({
 const AU_KM = 149_597_870.7;
 
 function getRocketAndDest() {
-  const r = sim.state?.rocket;
+  const r = sim.view?.rocket ?? sim.state?.rocket;
   const d = sim.state?.destination ?? sim.state?.dest; // tolerate either key
   return { r, d };
 }
@@ -96,18 +96,62 @@ function drawStars(canvas, ctx) {
 function drawTrail(canvas, ctx) {
   if (!sim.state || sim.trail.length < 2) return;
 
+  // Stop at the rendered time and finish at the drawn ship, which runs a
+  // little behind the newest reply
+  const until = sim.view?.t ?? Infinity;
   ctx.beginPath();
-  for (let i = 0; i < sim.trail.length; i++) {
+  let i = 0;
+  for (; i < sim.trail.length; i++) {
     const p = sim.trail[i];
+    if (i > 0 && p.t > until) break;
     const sp = worldToScreen(canvas, p.x, p.y);
     if (i === 0) ctx.moveTo(sp.x, sp.y);
     else ctx.lineTo(sp.x, sp.y);
   }
+  if (sim.view) {
+    const sp = worldToScreen(canvas, sim.view.rocket.x, sim.view.rocket.y);
+    ctx.lineTo(sp.x, sp.y);
+  }
   ctx.strokeStyle = "rgba(95,227,255,0.22)";
   ctx.lineWidth = 2;
   ctx.stroke();
 }
 
+const ENCOUNTER_COLORS = {
+  capture: "#9bb0ff",
+  crash: "#ff2c2c",
+  success: "#5fe3ff",
+  out_of_bounds: "#FF991c",
+};
+
+function drawPrediction(canvas, ctx) {
+  const pred = sim.prediction;
+  if (!pred || pred.path.length < 2) return;
+
+  ctx.save();
+  ctx.beginPath();
+  pred.path.forEach(([x, y], i) => {
+    const sp = worldToScreen(canvas, x, y);
+    if (i === 0) ctx.moveTo(sp.x, sp.y);
+    else ctx.lineTo(sp.x, sp.y);
+  });
+  ctx.setLineDash([4, 6]);
+  ctx.strokeStyle = pred.burn_allowed ? "rgba(255,255,255,0.45)" : "rgba(255,80,80,0.35)";
+  ctx.lineWidth = 1.5;
+  ctx.stroke();
+  ctx.setLineDash([]);
+
+  const enc = pred.encounter;
+  if (enc) {
+    const sp = worldToScreen(canvas, enc.x, enc.y);
+    ctx.beginPath();
+    ctx.arc(sp.x, sp.y, 5, 0, Math.PI * 2);
+    ctx.fillStyle = ENCOUNTER_COLORS[enc.type] ?? "#ffffff";
+    ctx.fill();
+  }
+  ctx.restore();
+}
+
 function drawPlanets(canvas, ctx) {
   for (const p of sim.state.planets) {
     const sp = worldToScreen(canvas, p.x, p.y);
@@ -230,7 +274,7 @@ function drawGlobalWarning(canvas, ctx) {
 }
 
 function drawShip(canvas, ctx) {
-  const r = sim.state.rocket;
+  const { r } = getRocketAndDest();
   const sp = worldToScreen(canvas, r.x, r.y);
 
   ctx.save();
@@ -398,7 +442,7 @@ function drawDestinationAndArrow(canvas, ctx) {
 
 function drawJoystickVector(canvas, ctx) {
   if (len(sim.joyVec.x, sim.joyVec.y) < 0.05) return;
-  const r = sim.state.rocket;
+  const { r } = getRocketAndDest();
   const ship = worldToScreen(canvas, r.x, r.y);
 
   const arrowPx = 110 * Math.min(1, len(sim.joyVec.x, sim.joyVec.y));
@@ -485,6 +529,7 @@ export function renderFrame(canvas, ctx) {
 
   drawStars(canvas, ctx);
   drawTrail(canvas, ctx);
+  drawPrediction(canvas, ctx);
   drawPlanets(canvas, ctx);
 
   drawEarthDestination(canvas, ctx);
@@ -0,0 +1,178 @@
+import {
+  STEP_DT, INTERP_DELAY, EXTRAPOLATE_MAX, CORRECTION_TAU, SNAP_DISTANCE, SNAPSHOT_MAX,
+  PLAYHEAD_RESYNC, G, SOFTENING_R2, CAM_ALPHA,
+} from "./config.js";
+import { sim } from "./state.js";
+
+// What gets drawn for the rocket and camera, decoupled from the request loop.
+//
+// Server replies are buffered by sim time. Every frame renders at
+// `playhead - INTERP_DELAY`, where the playhead is the client's own estimate
+// of the server's sim time. Between two buffered states the rocket is
+// interpolated; past the newest one (a reply is still in flight) it is
+// extrapolated with the server's gravity and Euler step. When a reply moves
+// the answer, the jump becomes an offset that decays over CORRECTION_TAU
+// instead of a visible snap.
+
+const buffer = [];            // { t, x, y, vx, vy, cx, cy }, sorted by t
+let ext = null;               // extrapolation stepped forward from the newest entry
+const offset = { x: 0, y: 0 }; // display error still being corrected away
+let playhead = null;
+let lastFrame = null;
+
+function sample(state) {
+  const r = state.rocket;
+  const c = state.camera || { cx: r.x, cy: r.y };
+  return { t: state.t, x: r.x, y: r.y, vx: r.vx, vy: r.vy, cx: c.cx, cy: c.cy };
+}
+
+// Buffer an authoritative state. `reset` (new world) drops everything held;
+// `sentAt` (performance.now() when the request left) lets step replies pull
+// the playhead back in line with the server.
+export function pushSnapshot(state, { reset = false, sentAt = null } = {}) {
+  const s = sample(state);
+
+  if (reset || playhead == null) {
+    buffer.length = 0;
+    buffer.push(s);
+    ext = null;
+    offset.x = offset.y = 0;
+    playhead = s.t + INTERP_DELAY;
+    return;
+  }
+
+  const before = sim.view ? positionAt(renderTime()) : null;
+
+  // A reply at or before an entry we hold supersedes it (e.g. a burn at the same t)
+  while (buffer.length && buffer[buffer.length - 1].t >= s.t) buffer.pop();
+  buffer.push(s);
+  if (buffer.length > SNAPSHOT_MAX) buffer.splice(0, buffer.length - SNAPSHOT_MAX);
+  ext = null;
+
+  if (sentAt != null) {
+    // The reply covers sim time up to when the request was sent
+    const err = s.t + (performance.now() - sentAt) / 1000 - playhead;
+    playhead += Math.abs(err) > PLAYHEAD_RESYNC ? err : err * 0.1;
+  }
+
+  if (before) {
+    const after = positionAt(renderTime());
+    offset.x += before.x - after.x;
+    offset.y += before.y - after.y;
+    if (Math.hypot(offset.x, offset.y) > SNAP_DISTANCE) offset.x = offset.y = 0;
+  }
+}
+
+// Advance the playhead to frame time `now` and rebuild sim.view. The
+// playhead moves while the sim runs, and otherwise only until the newest
+// reply is on screen (so the ship still reaches a crash or an event prompt).
+export function updateView(now, running) {
+  const frameDt = lastFrame == null ? 0 : Math.max(0, (now - lastFrame) / 1000);
+  lastFrame = now;
+  if (!buffer.length) return;
+
+  if (running) {
+    playhead += frameDt;
+  } else {
+    playhead = Math.min(playhead + frameDt, Math.max(playhead, buffer[buffer.length - 1].t + INTERP_DELAY));
+  }
+
+  const decay = Math.exp(-frameDt / CORRECTION_TAU);
+  offset.x *= decay;
+  offset.y *= decay;
+
+  const t = renderTime();
+  const p = positionAt(t);
+  sim.view = {
+    t,
+    rocket: { x: p.x + offset.x, y: p.y + offset.y, vx: p.vx, vy: p.vy },
+    camera: { cx: p.cx + offset.x, cy: p.cy + offset.y, zoom: sim.state?.camera?.zoom || 1.0 },
+  };
+}
+
+function renderTime() {
+  const newest = buffer[buffer.length - 1].t;
+  return Math.min(playhead - INTERP_DELAY, newest + EXTRAPOLATE_MAX);
+}
+
+function positionAt(t) {
+  const first = buffer[0];
+  if (t <= first.t) return first;
+
+  for (let i = buffer.length - 1; i > 0; i--) {
+    const a = buffer[i - 1];
+    const b = buffer[i];
+    if (t >= a.t && t <= b.t) return interpolate(a, b, t);
+  }
+  return extrapolate(t);
+}
+
+// Cubic Hermite on position and velocity: follows the curve of an orbit
+// where a straight line between replies would cut the corner.
+function interpolate(a, b, t) {
+  const h = b.t - a.t;
+  if (h <= 0) return b;
+  const s = (t - a.t) / h;
+  const s2 = s * s;
+  const s3 = s2 * s;
+  const h00 = 2 * s3 - 3 * s2 + 1;
+  const h10 = s3 - 2 * s2 + s;
+  const h01 = -2 * s3 + 3 * s2;
+  const h11 = s3 - s2;
+  return {
+    x: h00 * a.x + h10 * h * a.vx + h01 * b.x + h11 * h * b.vx,
+    y: h00 * a.y + h10 * h * a.vy + h01 * b.y + h11 * h * b.vy,
+    vx: a.vx + (b.vx - a.vx) * s,
+    vy: a.vy + (b.vy - a.vy) * s,
+    cx: a.cx + (b.cx - a.cx) * s,
+    cy: a.cy + (b.cy - a.cy) * s,
+  };
+}
+
+// Step the newest reply forward to `t` the way step_sim would in free
+// flight. Latched or stopped rockets are held where the server left them.
+function extrapolate(t) {
+  const newest = buffer[buffer.length - 1];
+  const st = sim.state;
+  if (!st || !sim.world || st.latched_planet_id != null || st.hud?.status !== "running") return newest;
+
+  if (!ext || ext.t > t) ext = { ...newest };
+  while (ext.t + STEP_DT <= t) stepFlight(ext, STEP_DT);
+
+  // Partial step to the frame time, so 60 fps motion doesn't stair-step
+  const rem = t - ext.t;
+  return { ...ext, x: ext.x + ext.vx * rem, y: ext.y + ext.vy * rem };
+}
+
+// Semi-implicit Euler under the summed planet gravity, then camera easing
+// (backend PlanetArrays.accel_at, step_sim and update_camera).
+function stepFlight(p, dt) {
+  let ax = 0;
+  let ay = 0;
+  for (const pl of sim.world.planets) {
+    const dx = pl.x - p.x;
+    const dy = pl.y - p.y;
+    const r2 = Math.max(dx * dx + dy * dy, SOFTENING_R2);
+    const f = (G * pl.mass) / (r2 * Math.sqrt(r2));
+    ax += f * dx;
+    ay += f * dy;
+  }
+  p.vx += ax * dt;
+  p.vy += ay * dt;
+  p.x += p.vx * dt;
+  p.y += p.vy * dt;
+  p.t += dt;
+
+  const speed = Math.hypot(p.vx, p.vy);
+  const ux = speed > 1e-6 ? p.vx / speed : 0;
+  const uy = speed > 1e-6 ? p.vy / speed : 0;
+  const ahead = Math.min(220.0, 6.0 * speed);
+  p.cx += (p.x + ux * ahead - p.cx) * CAM_ALPHA;
+  p.cy += (p.y + uy * ahead - p.cy) * CAM_ALPHA;
+  const dx = p.x - p.cx;
+  const dy = p.y - p.cy;
+  if (dx * dx + dy * dy > 800.0 * 800.0) {
+    p.cx = p.x;
+    p.cy = p.y;
+  }
+}
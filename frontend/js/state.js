@@ -1,5 +1,12 @@
 export const sim = {
   state: null,
+  sessionId: null,
+
+  // versioned payloads: last applied version, static world, merged dynamic fields
+  version: null,
+  world: null,
+  dynamic: {},
+  planetDynamic: {},
   running: false,
   started: false,
 
@@ -14,11 +21,17 @@ export const sim = {
   joyActive: false,
   joyVec: { x: 0, y: 0 },
 
+  // smoothed rocket and camera to draw: { t, rocket, camera } (smooth.js)
+  view: null,
+
   // camera
   renderCam: { cx: 0, cy: 0, zoom: 1.0 },
 
   // trail
   trail: [],
+
+  // burn preview while the joystick is held: { path, encounter } or null
+  prediction: null,
 };
 
 export function setState(newState) {